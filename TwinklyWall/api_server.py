@@ -10,9 +10,15 @@ import traceback
 from pathlib import Path
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-from dotmatrix import DotMatrix
+from collections import deque
+from dotmatrix import DotMatrix, MatrixPool
 from video_player import VideoPlayer
-from game_players import join_game, leave_game, heartbeat, get_active_players_for_game, is_game_full, get_game_for_player, player_count_for_game
+from rendered_video import RAW_SUFFIX
+from game_players import join_game, leave_game, heartbeat, get_active_players_for_game, is_game_full, get_game_for_player, player_count_for_game, start_idle_expiry, stop_idle_expiry
+from game_input import DEFAULT_INPUT_PORT, GameInputServer
+from input_trace import get_tracer
+from latency_stats import LatencyHistogram
+from players import handle_input, input_stats
 from logger import log
 
 app = Flask(__name__)
@@ -27,9 +33,17 @@ current_video_name = None
 rendered_videos_dir = Path("dotmatrix/rendered_videos")
 source_videos_dir = Path("assets/source_videos")
 
+# Long-lived output contexts; sessions borrow them instead of rebuilding DotMatrix/FPPOutput
+matrix_pool = MatrixPool()
+# Recent /api/game/join -> first frame on the wall measurements (see record_session_start)
+session_latency = deque(maxlen=100)
+
+# UDP controller input (game_input.py); /api/game/heartbeat stays as the fallback
+input_server = None
+http_input_ms = LatencyHistogram()  # heartbeat request -> handle_input returned
+
 # Cleanup thread for idle players
 cleanup_thread = None
-cleanup_active = False
 
 
 def _resolve_fpp_memory_file():
@@ -51,45 +65,77 @@ def _resolve_fpp_memory_file():
 def get_video_name_from_source(source_filename):
     """Convert source video filename to rendered video filename."""
     base_name = Path(source_filename).stem
-    # Look for matching rendered file
-    for rendered_file in rendered_videos_dir.glob(f"{base_name}*.npz"):
-        return rendered_file.name
+    # Look for matching rendered file, preferring memory-mapped renders over .npz
+    for suffix in (RAW_SUFFIX, '.npz'):
+        for rendered_file in rendered_videos_dir.glob(f"{base_name}*{suffix}"):
+            return rendered_file.name
     return None
 
 
+def _build_video_matrix():
+    """Build the DotMatrix used for video playback and test endpoints."""
+    # Detect if running on Pi
+    try:
+        with open('/proc/device-tree/model', 'r') as f:
+            on_pi = 'raspberry pi' in f.read().lower()
+    except:
+        on_pi = False
+
+    headless = on_pi or ('DISPLAY' not in os.environ)
+
+    fpp_memory_file = _resolve_fpp_memory_file()
+    # With TWINKLYWALL_FRAME_RING set, output_service.py owns FPP and playback publishes to the "video" ring
+    use_ring = on_pi and os.environ.get('TWINKLYWALL_FRAME_RING', '').lower() in ('1', 'true', 'yes')
+    print(f"DotMatrix init: headless={headless}")
+    print(f"DotMatrix FPP output enabled: {on_pi}")
+    if use_ring:
+        print("DotMatrix publishing to output ring: video")
+    elif on_pi:
+        print(f"DotMatrix FPP memory file: {fpp_memory_file}")
+
+    return DotMatrix(
+        headless=headless,
+        fpp_output=on_pi,
+        show_source_preview=True,
+        enable_performance_monitor=True,
+        disable_blending=True,
+        supersample=1,
+        fpp_gamma=2.2,
+        fpp_color_order="RGB",
+        fpp_memory_buffer_file=fpp_memory_file,
+        fpp_direct_mmap=True,
+        output_ring="video" if use_ring else None,
+    )
+
+
+matrix_pool.register("video", _build_video_matrix)
+
+
 def initialize_matrix():
-    """Initialize the DotMatrix if not already initialized."""
+    """The pooled video DotMatrix (built on first use, then kept for every playback)."""
     global current_matrix
     if current_matrix is None:
-        # Detect if running on Pi
-        try:
-            with open('/proc/device-tree/model', 'r') as f:
-                on_pi = 'raspberry pi' in f.read().lower()
-        except:
-            on_pi = False
-        
-        headless = on_pi or ('DISPLAY' not in os.environ)
-        
-        fpp_memory_file = _resolve_fpp_memory_file()
-        print(f"DotMatrix init: headless={headless}")
-        print(f"DotMatrix FPP output enabled: {on_pi}")
-        if on_pi:
-            print(f"DotMatrix FPP memory file: {fpp_memory_file}")
-
-        current_matrix = DotMatrix(
-            headless=headless,
-            fpp_output=on_pi,
-            show_source_preview=True,
-            enable_performance_monitor=True,
-            disable_blending=True,
-            supersample=1,
-            fpp_gamma=2.2,
-            fpp_color_order="RGB",
-            fpp_memory_buffer_file=fpp_memory_file,
-        )
+        current_matrix = matrix_pool.get("video")
     return current_matrix
 
 
+def record_session_start(game, joined_at, acquire_ms, woke_at, first_frame_at):
+    """Record one join -> first-frame measurement (all times are time.time())."""
+    session_latency.append({
+        'game': game,
+        'join_to_wake_ms': round((woke_at - joined_at) * 1000, 2),
+        'acquire_ms': round(acquire_ms, 2),
+        'join_to_first_frame_ms': round((first_frame_at - joined_at) * 1000, 2),
+    })
+    log(f"⏱️  {game} join -> first frame {session_latency[-1]['join_to_first_frame_ms']:.1f}ms "
+        f"(acquire {acquire_ms:.1f}ms)", module="API")
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
 def stop_current_playback():
     """Stop the current playback if any."""
     global playback_active, current_player, playback_thread, current_video_name
@@ -109,11 +155,8 @@ def stop_current_playback():
     try:
         matrix = initialize_matrix()
         if matrix:
-            # Set internal buffer to black
-            matrix.clear()
-            # Push the black frame to hardware immediately
-            if getattr(matrix, 'fpp', None):
-                matrix.fpp.write(matrix.dot_colors)
+            # Black frame to FPP (or release the ring layer so the output service crossfades)
+            matrix.blank()
     except Exception as e:
         # Avoid crashing stop flow on clear failures; just log
         print(f"Warning: failed to clear LEDs after stop: {e}")
@@ -153,7 +196,7 @@ def play_video_thread(video_path, loop, speed, brightness, playback_fps):
 
 @app.route('/api/videos', methods=['GET'])
 def get_videos():
-    """Get list of available rendered videos (.npz)."""
+    """Get list of available rendered videos (.twv / .npz)."""
     try:
         # Ensure the rendered videos directory exists; create if missing
         if not rendered_videos_dir.exists():
@@ -165,7 +208,7 @@ def get_videos():
 
         videos = []
         for file in rendered_videos_dir.iterdir():
-            if file.is_file() and file.suffix.lower() == '.npz':
+            if file.is_file() and file.suffix.lower() in (RAW_SUFFIX, '.npz'):
                 videos.append(file.name)
 
         videos.sort()
@@ -191,7 +234,7 @@ def play_video():
         
         # Accept a rendered filename directly (preferred)
         rendered_name = None
-        if video_name.endswith('.npz'):
+        if video_name.endswith((RAW_SUFFIX, '.npz')):
             rendered_name = video_name
         else:
             # Backward compatibility: map source name to rendered
@@ -283,6 +326,7 @@ def game_join():
             'game': game,
             'player_count': len(players),
             'player_index': len(players) - 1,  # 0-indexed position
+            'input_port': input_server.port if input_server else None,
         }), 200
 
     except Exception as e:
@@ -326,10 +370,8 @@ def game_heartbeat():
     Also routes any input command to the player registry.
     Request body: {"player_id": "uuid-123", "cmd": "MOVE_LEFT", ...}
     """
+    start = time.perf_counter()
     try:
-        from game_players import get_game_for_player
-        from players import handle_input
-
         data = request.json
         player_id = data.get('player_id')
 
@@ -339,15 +381,16 @@ def game_heartbeat():
         # Update heartbeat
         heartbeat(player_id)
 
+        game = get_game_for_player(player_id)
         # If there's a command, route it to the player registry
         if 'cmd' in data:
-            from game_players import get_game_for_player as get_player_game
-            player_game = get_player_game(player_id)
             cmd = data.get('cmd', 'UNKNOWN')
-            log(f"🕹️  BUTTON PRESS - Player: {player_id} | Game: {player_game} | Command: {cmd}", module="API")
+            log(f"🕹️  BUTTON PRESS - Player: {player_id} | Game: {game} | Command: {cmd}", module="API")
+            data['transport'] = 'http'
+            data['recv_t'] = start
             handle_input(player_id, data)
+            http_input_ms.record((time.perf_counter() - start) * 1000)
 
-        game = get_game_for_player(player_id)
         return jsonify({'status': 'ok', 'player_id': player_id, 'game': game}), 200
 
     except Exception as e:
@@ -382,6 +425,38 @@ def game_status():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/game/latency', methods=['GET'])
+def game_latency():
+    """Join -> first frame on the wall for recent game sessions, plus pool reuse counters."""
+    samples = list(session_latency)
+    totals = [s['join_to_first_frame_ms'] for s in samples]
+    return jsonify({
+        'sessions': len(samples),
+        'last': samples[-1] if samples else None,
+        'p50_ms': _percentile(totals, 50) if totals else None,
+        'p95_ms': _percentile(totals, 95) if totals else None,
+        'pool': {'builds': matrix_pool.builds, 'reuses': matrix_pool.reuses},
+    }), 200
+
+
+@app.route('/api/game/input/stats', methods=['GET'])
+def game_input_stats():
+    """Input handling latency per transport (UDP channel and the HTTP fallback), plus per-player queue counters."""
+    return jsonify({
+        'udp': input_server.stats() if input_server else None,
+        'http': http_input_ms.to_dict(),
+        'queues': input_stats(),
+    }), 200
+
+
+@app.route('/api/game/trace', methods=['GET', 'DELETE'])
+def game_trace():
+    """Input-to-photon latency per stage (p50/p95/p99). DELETE resets the window."""
+    tracer = get_tracer()
+    if request.method == 'DELETE':
+        tracer.reset()
+    return jsonify(tracer.stats()), 200
+
 
 @app.route('/api/test/solid', methods=['POST'])
 def test_solid():
@@ -413,33 +488,33 @@ def test_black():
 
 def cleanup():
     """Cleanup function to be called on shutdown."""
-    global current_matrix, cleanup_active
-    cleanup_active = False
+    global current_matrix
+    stop_idle_expiry()
     stop_current_playback()
-    if current_matrix:
-        current_matrix.shutdown()
+    if input_server:
+        input_server.stop()
+    matrix_pool.close()
+    current_matrix = None
 
 
-def cleanup_idle_loop():
-    """Background thread that periodically removes idle players."""
-    from game_players import cleanup_idle_players
-    
-    while cleanup_active:
-        try:
-            cleanup_idle_players()
-            time.sleep(5)  # Check every 5 seconds
-        except Exception as e:
-            print(f"Error in cleanup loop: {e}")
+def start_input_server(port=DEFAULT_INPUT_PORT):
+    """Start the UDP controller input channel (port 0 or TWINKLYWALL_INPUT_PORT=0 disables it)."""
+    global input_server
+    if input_server or not port:
+        return input_server
+    try:
+        input_server = GameInputServer(port=port).start()
+    except OSError as e:
+        print(f"Warning: UDP game input disabled, HTTP only: {e}")
+    return input_server
 
 
 def start_cleanup_thread():
-    """Start the background cleanup thread."""
-    global cleanup_thread, cleanup_active
+    """Start the background thread that removes idle players at their heartbeat deadlines."""
+    global cleanup_thread
     if cleanup_thread and cleanup_thread.is_alive():
         return
-    cleanup_active = True
-    cleanup_thread = threading.Thread(target=cleanup_idle_loop, daemon=True)
-    cleanup_thread.start()
+    cleanup_thread = start_idle_expiry()
 
 
 if __name__ == '__main__':
@@ -448,6 +523,7 @@ if __name__ == '__main__':
     
     # Start background cleanup thread for idle players
     start_cleanup_thread()
+    start_input_server()
     
     # Run the Flask server
     print("Starting Flask API server on port 5000...")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark FPP color correction on the 4500-pixel Light Wall.
+
+Compares the fused per-channel LUT path (FPPOutput._apply_correction_numpy)
+against the float32 gain/gamma path it replaced (_apply_correction_float),
+checks that both produce identical bytes, and reports µs per frame.
+
+Usage: python3 bench_color_correction.py [--gamma 2.2] [--order RGB] [--gains 1,1,1]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from dotmatrix.fpp_output import FPPOutput
+
+
+def time_per_call(fn, arg, iterations):
+    fn(arg)  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(arg)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark LUT vs float FPP color correction")
+    p.add_argument("--gamma", type=float, default=2.2)
+    p.add_argument("--order", default="RGB", help="Channel order (RGB/GRB/BGR/...)")
+    p.add_argument("--gains", default="1,1,1", help="Comma-separated per-channel gains")
+    p.add_argument("--iterations", type=int, default=2000)
+    args = p.parse_args()
+
+    gains = tuple(float(g) for g in args.gains.split(","))
+    with tempfile.TemporaryDirectory() as tmp:
+        out = FPPOutput(90, 50, mapping_file=os.path.join(tmp, "FPP-Model-Data-Bench"),
+                        color_order=args.order, gamma=args.gamma, channel_gains=gains)
+        try:
+            pixels = len(out._fast_src) if out._fast_src is not None else 4500
+            rng = np.random.default_rng(0)
+            selected = rng.integers(0, 256, size=(pixels, 3), dtype=np.uint8)
+
+            lut_result = out._apply_correction_numpy(selected).copy()
+            float_result = out._apply_correction_float(selected)
+            if not np.array_equal(lut_result, float_result):
+                diff = int(np.count_nonzero(lut_result != float_result))
+                print(f"MISMATCH: {diff} channel values differ between LUT and float paths")
+                raise SystemExit(1)
+
+            float_us = time_per_call(out._apply_correction_float, selected, args.iterations)
+            lut_us = time_per_call(out._apply_correction_numpy, selected, args.iterations)
+        finally:
+            out.close()
+
+    print(f"Color correction on {pixels} pixels (gamma={args.gamma}, order={args.order}, gains={gains})")
+    print(f"  float32 path: {float_us:8.1f} µs/frame")
+    print(f"  LUT path    : {lut_us:8.1f} µs/frame")
+    print(f"  speedup     : {float_us / max(1e-9, lut_us):.1f}x (outputs identical)")
+
+
+if __name__ == "__main__":
+    main()
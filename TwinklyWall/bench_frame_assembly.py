@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for DDP frame assembly.
+
+Feeds synthetic DDP chunks through the pre-pool FrameState (one pair of
+full-frame bytearrays per frame, Python-level coverage counting) and through
+the pooled DdpBridge.FrameState, and reports ns/packet for each.
+
+Usage: python3 bench_frame_assembly.py [--frames 2000] [--chunk 1050]
+"""
+
+import argparse
+import time
+
+from ddp_bridge import DdpBridge, FramePool
+
+
+class LegacyFrameState:
+    """FrameState as it was before pooling (kept here as the baseline)."""
+
+    def __init__(self, frame_size, sender, seq):
+        self.buf = bytearray(frame_size)
+        self.received = bytearray(frame_size)
+        self.missing = frame_size
+        self.chunks = 0
+        self.sender = sender
+        self.seq = seq
+        self.saw_eof = False
+        self.start_ts = time.time()
+        self.last_update_ts = self.start_ts
+
+    def add_chunk(self, off, payload):
+        end = off + len(payload)
+        mv_buf = memoryview(self.buf)
+        mv_buf[off:end] = payload
+        mv_recv = memoryview(self.received)
+        segment = mv_recv[off:end]
+        newly_covered = len(segment) - sum(segment)
+        segment[:] = b"\x01" * len(segment)
+        self.missing -= newly_covered
+        self.chunks += 1
+        self.last_update_ts = time.time()
+
+    def complete(self):
+        return self.missing == 0 and self.saw_eof
+
+
+def make_chunks(frame_size, chunk):
+    payload = memoryview(bytes(range(256)) * (chunk // 256 + 1))
+    chunks = []
+    off = 0
+    while off < frame_size:
+        ln = min(chunk, frame_size - off)
+        chunks.append((off, payload[:ln]))
+        off += ln
+    return chunks
+
+
+def bench_legacy(frame_size, chunks, frames):
+    start = time.perf_counter()
+    for seq in range(frames):
+        fs = LegacyFrameState(frame_size, ("127.0.0.1", 4049), seq & 0xFF)
+        for off, payload in chunks:
+            fs.add_chunk(off, payload)
+        fs.saw_eof = True
+        assert fs.complete()
+    return time.perf_counter() - start
+
+
+def bench_pooled(frame_size, chunks, frames):
+    pool = FramePool(lambda: DdpBridge.FrameState(frame_size), 16)
+    start = time.perf_counter()
+    for seq in range(frames):
+        fs = pool.acquire(("127.0.0.1", 4049), seq & 0xFF)
+        for off, payload in chunks:
+            fs.add_chunk(off, payload)
+        fs.saw_eof = True
+        assert fs.complete()
+        pool.release(fs)
+    return time.perf_counter() - start
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark DDP frame assembly (ns/packet)")
+    p.add_argument("--width", type=int, default=90)
+    p.add_argument("--height", type=int, default=50)
+    p.add_argument("--chunk", type=int, default=1050, help="Payload bytes per packet")
+    p.add_argument("--frames", type=int, default=2000)
+    args = p.parse_args()
+
+    frame_size = args.width * args.height * 3
+    chunks = make_chunks(frame_size, args.chunk)
+    packets = len(chunks) * args.frames
+
+    legacy_s = bench_legacy(frame_size, chunks, args.frames)
+    pooled_s = bench_pooled(frame_size, chunks, args.frames)
+
+    legacy_ns = legacy_s / packets * 1e9
+    pooled_ns = pooled_s / packets * 1e9
+    print(f"Frame {frame_size} bytes, {len(chunks)} chunks/frame, {args.frames} frames ({packets} packets)")
+    print(f"  legacy (alloc per frame, sum() coverage): {legacy_ns:10.0f} ns/packet")
+    print(f"  pooled (recycled buffers, bitmap count) : {pooled_ns:10.0f} ns/packet")
+    print(f"  speedup: {legacy_ns / max(1e-9, pooled_ns):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Pacing check for FrameClock.
+
+Runs a loop with a simulated render cost (random, with occasional spikes)
+twice. The first pass paces it the old way, sleeping frame_dt - elapsed after
+each frame. The second pass paces it with FrameClock. Reports the drift from
+the ideal schedule after N frames and prints FrameClock's jitter/late
+histograms.
+
+Usage: python3 bench_frame_clock.py [--fps 20] [--seconds 5] [--work-ms 8] [--spike-ms 40]
+"""
+
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from dotmatrix.frame_clock import SKIP_POLICIES, FrameClock
+
+
+def make_work(args):
+    rng = random.Random(0)
+
+    def work():
+        ms = rng.uniform(0.5, args.work_ms)
+        if rng.random() < args.spike_rate:
+            ms = args.spike_ms
+        end = time.perf_counter() + ms / 1000.0
+        while time.perf_counter() < end:
+            pass
+    return work
+
+
+def run_legacy(args, frames):
+    work = make_work(args)
+    frame_dt = 1.0 / args.fps
+    start = time.perf_counter()
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        work()
+        sleep_time = frame_dt - (time.perf_counter() - t0)
+        if sleep_time > 0:
+            time.sleep(sleep_time)
+    return time.perf_counter() - start
+
+
+def run_clock(args, frames):
+    work = make_work(args)
+    clock = FrameClock(args.fps, policy=args.policy, spin_ms=args.spin_ms)
+    start = time.perf_counter()
+    clock.start(start)
+    shown = 0
+    while clock.frame < frames:
+        clock.tick()
+        work()
+        shown += 1
+    # The loop ends after the last frame's work; the frame slot ends one period later
+    return clock.next_deadline - start, clock, shown
+
+
+def main():
+    p = argparse.ArgumentParser(description="Compare relative sleep pacing with FrameClock")
+    p.add_argument("--fps", type=float, default=20.0)
+    p.add_argument("--seconds", type=float, default=5.0)
+    p.add_argument("--work-ms", type=float, default=8.0, help="Max simulated render time per frame")
+    p.add_argument("--spike-ms", type=float, default=40.0, help="Simulated render time of a spike")
+    p.add_argument("--spike-rate", type=float, default=0.02, help="Fraction of frames that spike")
+    p.add_argument("--spin-ms", type=float, default=1.0)
+    p.add_argument("--policy", choices=SKIP_POLICIES, default="skip")
+    args = p.parse_args()
+
+    frames = int(args.fps * args.seconds)
+    ideal = frames / args.fps
+
+    legacy_s = run_legacy(args, frames)
+    clock_s, clock, shown = run_clock(args, frames)
+
+    print(f"{frames} frames at {args.fps:g} fps (ideal {ideal:.3f}s), work up to {args.work_ms:g}ms, "
+          f"{args.spike_rate * 100:g}% spikes of {args.spike_ms:g}ms")
+    print(f"  sleep(frame_dt - elapsed): {legacy_s:.3f}s, drift {(legacy_s - ideal) * 1000:+8.1f} ms")
+    print(f"  FrameClock ({args.policy:8s})  : {clock_s:.3f}s, drift {(clock_s - ideal) * 1000:+8.1f} ms, "
+          f"{shown} shown / {clock.skipped_frames} skipped")
+    print(clock.format_histograms())
+
+
+if __name__ == "__main__":
+    main()
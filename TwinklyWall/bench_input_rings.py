@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Check and time the bounded per-player input rings (players.InputRing).
+
+1. Policies: random command streams with random batch drains go through
+   an InputRing and through a plain-list reference of each policy
+   (drop-oldest, coalesce, drop-on-idle with simulated time). The drained
+   payloads and the dropped/idle/coalesced counters must match.
+2. Leak: a callback-only player (how Tetris consumes input) receives a
+   session's worth of commands through Players.handle_input. The old
+   unbounded backlog kept every one; the ring must stay within capacity,
+   and with drop-on-idle be empty once idle. Nothing the handler received
+   may be counted as dropped.
+3. Coalesced counts: FastTetris must apply a MOVE_* with count=n exactly
+   like n separate commands.
+4. Cost: draining a two-player tick one payload per lock hold (the old
+   drain_inputs) against drain_game's single batch.
+
+Usage: python3 bench_input_rings.py [--streams 300] [--session 20000]
+Exits non-zero on any MISMATCH.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from collections import deque
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from games.fast_tetris import FastTetris
+from players import COALESCE, COALESCED_COMMANDS, DROP_OLDEST, DROP_ON_IDLE, InputRing, Players
+
+COMMANDS = ("MOVE_LEFT", "MOVE_RIGHT", "MOVE_DOWN", "ROTATE_RIGHT", "ROTATE_LEFT", "HARD_DROP")
+
+
+def reference_run(policy, capacity, idle_sec, steps):
+    """The policy on a plain list. steps: ("push", (payload, handled), t) / ("drain", limit, t)."""
+    queue, out = [], []  # queue: [payload, handled]
+    counters = {"dropped": 0, "idle": 0, "coalesced": 0}
+    last_drain = 0.0
+
+    def discard(handled):
+        counters["idle" if handled else "dropped"] += 1
+
+    for kind, arg, t in steps:
+        if kind == "drain":
+            last_drain = t
+            take = len(queue) if arg is None else min(arg, len(queue))
+            out.extend(payload for payload, _ in queue[:take])
+            del queue[:take]
+            continue
+        payload, handled = arg
+        if policy == DROP_ON_IDLE and t - last_drain > idle_sec:
+            for _, was_handled in queue:
+                discard(was_handled)
+            discard(handled)
+            queue = []
+            continue
+        if (policy == COALESCE and queue and payload["cmd"] in COALESCED_COMMANDS
+                and queue[-1][0]["cmd"] == payload["cmd"]):
+            newest, newest_handled = queue[-1]
+            queue[-1] = [dict(newest, count=newest.get("count", 1) + 1), newest_handled and handled]
+            counters["coalesced"] += 1
+            continue
+        queue.append([payload, handled])
+        if len(queue) > capacity:
+            discard(queue.pop(0)[1])
+    return out + [payload for payload, _ in queue], counters
+
+
+def ring_run(policy, capacity, idle_sec, steps):
+    ring = InputRing(capacity, policy, idle_sec)
+    start = ring._last_drain  # the ring's clock: reference time 0
+    out = []
+    for kind, arg, t in steps:
+        if kind == "drain":
+            out.extend(ring.drain(arg))
+            ring._last_drain = start + t  # simulated time instead of the real drain time
+        else:
+            payload, handled = arg
+            ring.push(payload, start + t, handled)
+    out.extend(ring.drain())
+    return out, {"dropped": ring.dropped, "idle": ring.idle, "coalesced": ring.coalesced}
+
+
+def check_policies(args):
+    rng = random.Random(args.seed)
+    bad = 0
+    for stream in range(args.streams):
+        policy = (DROP_OLDEST, COALESCE, DROP_ON_IDLE)[stream % 3]
+        capacity = rng.randint(1, 16)
+        idle_sec = 0.5
+        steps, t = [], 0.0
+        for seq in range(rng.randint(1, 200)):
+            t += rng.expovariate(20) if rng.random() < 0.97 else rng.uniform(0.5, 2.0)
+            if rng.random() < 0.1:
+                steps.append(("drain", rng.choice((None, 1, 2, 4)), t))
+            else:
+                # A short command alphabet so repeats (coalescing) are common
+                payload = {"cmd": rng.choice(COMMANDS[:3] if rng.random() < 0.7 else COMMANDS), "seq": seq}
+                steps.append(("push", (payload, rng.random() < 0.5), t))
+        if ring_run(policy, capacity, idle_sec, steps) != reference_run(policy, capacity, idle_sec, steps):
+            bad += 1
+            if bad <= 5:
+                print(f"MISMATCH: {policy} stream {stream} (capacity {capacity})", file=sys.stderr)
+    return bad
+
+
+def check_leak(policy, args):
+    """(old backlog length, ring length after the session, ring length once idle, input_stats(), capacity)."""
+    registry = Players(input_policy=policy, input_idle_sec=0.05)
+    registry.register("leak", on_input=lambda player, payload: None)
+    old_backlog = deque()
+    rng = random.Random(args.seed)
+    for _ in range(args.session):
+        payload = {"cmd": rng.choice(COMMANDS)}
+        old_backlog.append(payload)  # what Player.enqueue did before
+        registry.handle_input("leak", payload)
+    played = registry.input_stats()["queued"]
+    time.sleep(0.06)
+    registry.handle_input("leak", {"cmd": "MOVE_LEFT"})
+    stats = registry.input_stats()
+    return len(old_backlog), played, stats["queued"], stats, registry.input_capacity
+
+
+def check_counts(args):
+    """True if count=n applies like n separate commands on FastTetris."""
+    canvas = pygame.Surface((90, 50))
+    rng = random.Random(args.seed)
+    with contextlib.redirect_stdout(io.StringIO()):  # Tetris prints on every lock-down tick
+        single = FastTetris(canvas, True, seed=args.seed, draw=False)
+        counted = FastTetris(canvas, True, seed=args.seed, draw=False)
+        for _ in range(500):
+            cmd = rng.choice(COMMANDS)
+            count = rng.randint(1, 4) if cmd in COALESCED_COMMANDS else 1
+            for _ in range(count):
+                single.queue_input(None, {"cmd": cmd})
+            counted.queue_input(None, {"cmd": cmd, "count": count})
+            single.tick(1.0 / 60, 20)
+            counted.tick(1.0 / 60, 20)
+    return np.array_equal(single.board, counted.board) and single.lines_cleared == counted.lines_cleared
+
+
+def time_drain(args):
+    """(per-payload us, batch us) to drain one tick of input for two players."""
+    registry = Players(input_policy=DROP_OLDEST)
+    for player_id in ("a", "b"):
+        registry.register(player_id, game="tetris")
+    payloads = [{"cmd": cmd} for cmd in COMMANDS] * 2
+    results = []
+    for batch in (False, True):
+        elapsed = 0.0
+        for _ in range(args.ticks):
+            for player_id in ("a", "b"):
+                for payload in payloads:
+                    registry._players[player_id].enqueue(payload)
+            start = time.perf_counter()
+            if batch:
+                registry.drain_game("tetris")
+            else:
+                for player_id in ("a", "b"):
+                    while registry.next_input(player_id) is not None:
+                        pass
+            elapsed += time.perf_counter() - start
+        results.append(elapsed / args.ticks * 1e6)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time bounded player input rings")
+    parser.add_argument("--streams", type=int, default=300, help="Random streams per policy check")
+    parser.add_argument("--session", type=int, default=20000, help="Commands in the leak check session")
+    parser.add_argument("--ticks", type=int, default=5000, help="Ticks to time draining")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    args = parser.parse_args()
+
+    pygame.init()
+    bad = []
+    mismatches = check_policies(args)
+    print(f"Policies: {args.streams} random streams against the list reference, {mismatches} mismatches")
+    if mismatches:
+        bad.append(f"{mismatches} streams differ from the reference")
+
+    for policy in (DROP_OLDEST, DROP_ON_IDLE):
+        old, played, idle, stats, capacity = check_leak(policy, args)
+        print(f"Callback-only session of {args.session} commands, {policy}: old backlog held {old}, ring held "
+              f"{played} after the session and {idle} once idle ({stats['dropped']} dropped, "
+              f"{stats['idle']} handled but not kept)")
+        if played > capacity or (policy == DROP_ON_IDLE and idle):
+            bad.append(f"{policy}: callback-only ring grew past its capacity or kept payloads once idle")
+        if stats["dropped"]:
+            bad.append(f"{policy}: payloads the handler received were counted as dropped")
+
+    counts_ok = check_counts(args)
+    print(f"Coalesced counts on FastTetris: {'same board' if counts_ok else 'different board'} as separate commands")
+    if not counts_ok:
+        bad.append("count=n did not apply like n commands")
+
+    single, batch = time_drain(args)
+    print(f"Drain one tick (2 players x 12 payloads): per payload {single:.2f}us, batch {batch:.2f}us "
+          f"({single / batch:.1f}x)")
+    for reason in bad:
+        print(f"MISMATCH: {reason}")
+    if bad:
+        sys.exit(1)
+    print("OK: rings bounded, policies match the reference")
+
+
+if __name__ == "__main__":
+    main()
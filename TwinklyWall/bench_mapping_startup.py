@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Startup timing for the Light Wall routing map.
+
+Times building the src/dest routing arrays by parsing "Light Wall Mapping.csv"
+and walking every cell in Python, against loading the compiled .npy cache
+with mmap. Both results are compared element for element.
+
+Usage: python3 bench_mapping_startup.py [--runs 20]
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from dotmatrix.light_wall_mapping import (
+    DEFAULT_MAPPING_CSV,
+    build_routing_indices,
+    load_light_wall_mapping,
+    load_routing_arrays,
+)
+
+
+def parse_csv(width, height, csv_file):
+    src, dest = build_routing_indices(load_light_wall_mapping(csv_file), width, height)
+    return np.array(src, dtype=np.int32), np.array(dest, dtype=np.int32)
+
+
+def best_ms(fn, runs):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    p = argparse.ArgumentParser(description="Time CSV routing build vs compiled routing cache")
+    p.add_argument("--width", type=int, default=90)
+    p.add_argument("--height", type=int, default=50)
+    p.add_argument("--csv", default=DEFAULT_MAPPING_CSV)
+    p.add_argument("--runs", type=int, default=20)
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        def compile_map():
+            return load_routing_arrays(args.width, args.height, args.csv, cache_dir=cache_dir, rebuild=True)
+
+        def load_cached():
+            return load_routing_arrays(args.width, args.height, args.csv, cache_dir=cache_dir)
+
+        csv_ms = best_ms(lambda: parse_csv(args.width, args.height, args.csv), args.runs)
+        compile_ms = best_ms(compile_map, args.runs)
+        cached_ms = best_ms(load_cached, args.runs)
+
+        ref_src, ref_dest = parse_csv(args.width, args.height, args.csv)
+        src, dest = load_cached()
+        if not (np.array_equal(ref_src, src) and np.array_equal(ref_dest, dest)):
+            print("MISMATCH: compiled routing map differs from CSV routing")
+            raise SystemExit(1)
+
+    print(f"Routing map for {args.width}x{args.height} ({len(dest)} entries, best of {args.runs})")
+    print(f"  parse CSV + build in Python : {csv_ms:8.2f} ms")
+    print(f"  first start (compile + save): {compile_ms:8.2f} ms")
+    print(f"  cached start (mmap .npy)    : {cached_ms:8.2f} ms")
+    print(f"  speedup vs CSV              : {csv_ms / max(1e-9, cached_ms):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
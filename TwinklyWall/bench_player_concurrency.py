@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress for GamePlayerManager's copy-on-write player snapshots.
+
+Writer threads hammer join / heartbeat / leave on a game with a player
+limit and on one without. Each writer owns its own player ids, so after
+every call it can check its own effect: a successful join must be visible
+in the very next snapshot, and a leave must be gone from it. Reader threads
+meanwhile read snapshots lock-free the way the Tetris monitor and request
+handlers do and check every one is consistent:
+
+- no game holds more players than its limit, and nobody appears twice
+- every member has an entry naming that game
+- snapshot versions never go backwards for a reader
+
+At the end everyone has left and the manager must be empty. Prints
+writer operations/s and reader snapshots/s.
+
+Usage: python3 bench_player_concurrency.py [--writers 8] [--readers 4] [--seconds 3] [--switch-us 100]
+Exits non-zero on any MISMATCH.
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+
+import game_players
+from game_players import GamePlayerManager
+
+LIMITED = "concurrency-bench-limited"
+OPEN = "concurrency-bench-open"
+LIMIT = 4
+
+
+def writer(manager, index, args, done, problems, counts):
+    rng = random.Random(index)
+    mine = [f"w{index}-p{n}" for n in range(args.players)]
+    joined = {}
+    ops = 0
+    while not done.is_set():
+        player_id = rng.choice(mine)
+        action = rng.random()
+        if player_id not in joined and action < 0.4:
+            game = LIMITED if rng.random() < 0.5 else OPEN
+            if manager.join(player_id, phone_id=player_id, game=game):
+                joined[player_id] = game
+                members = manager.snapshot().games.get(game, ())
+                if all(member.player_id != player_id for member in members):
+                    problems.append(f"{player_id} joined {game} but is not in the next snapshot")
+        elif player_id in joined and action < 0.7:
+            manager.leave(player_id)
+            game = joined.pop(player_id)
+            snapshot = manager.snapshot()
+            if player_id in snapshot.entries or any(m.player_id == player_id for m in snapshot.games.get(game, ())):
+                problems.append(f"{player_id} left {game} but is still in the next snapshot")
+        elif player_id in joined:
+            manager.heartbeat(player_id)
+        ops += 1
+    for player_id in joined:
+        manager.leave(player_id)
+    counts[index] = ops
+
+
+def reader(manager, index, done, problems, counts):
+    reads = 0
+    last_version = -1
+    while not done.is_set():
+        snapshot = manager.snapshot()
+        if snapshot.version < last_version:
+            problems.append(f"reader {index} saw version {snapshot.version} after {last_version}")
+        last_version = snapshot.version
+        for game, members in snapshot.games.items():
+            if game == LIMITED and len(members) > LIMIT:
+                problems.append(f"{game} has {len(members)} players, limit {LIMIT}")
+            ids = [member.player_id for member in members]
+            if len(set(ids)) != len(ids):
+                problems.append(f"{game} lists a player twice")
+            for player_id in ids:
+                entry = snapshot.entries.get(player_id)
+                if entry is None or entry.game != game:
+                    problems.append(f"{player_id} is in {game} without a matching entry")
+        # The public helpers read the same way
+        manager.get_active_players_for_game(LIMITED)
+        manager.player_count_for_game(OPEN)
+        reads += 1
+    counts[index] = reads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress join/leave/heartbeat from many threads")
+    parser.add_argument("--writers", type=int, default=8, help="Threads joining, leaving and heartbeating")
+    parser.add_argument("--readers", type=int, default=4, help="Threads reading snapshots")
+    parser.add_argument("--players", type=int, default=50, help="Player ids per writer")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Length of the run")
+    parser.add_argument("--switch-us", type=float, default=100, help="Interpreter thread switch interval")
+    args = parser.parse_args()
+
+    sys.setswitchinterval(args.switch_us / 1e6)  # switch threads often so races get a chance to show
+    game_players.GAME_LIMITS[LIMITED] = LIMIT
+    manager = GamePlayerManager(timeout_sec=60)
+    done = threading.Event()
+    problems = []
+    write_ops = [0] * args.writers
+    reads = [0] * args.readers
+    threads = [threading.Thread(target=writer, args=(manager, i, args, done, problems, write_ops))
+               for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(manager, i, done, problems, reads))
+                for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    done.set()
+    for thread in threads:
+        thread.join()
+
+    snapshot = manager.snapshot()
+    if any(snapshot.games.values()) or snapshot.entries or manager._last_heartbeat:
+        problems.append("players left in the manager after everyone left")
+
+    print(f"Writers: {args.writers} threads, {sum(write_ops) / args.seconds:,.0f} join/leave/heartbeat per second")
+    print(f"Readers: {args.readers} threads, {sum(reads) / args.seconds:,.0f} consistent snapshots per second, "
+          f"{snapshot.version} snapshots published")
+    for problem in problems[:10]:
+        print(f"MISMATCH: {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK: every snapshot consistent, every writer saw its own change")
+
+
+if __name__ == "__main__":
+    main()
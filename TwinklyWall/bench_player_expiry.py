@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Stress check for idle-player expiry (game_players.GamePlayerManager).
+
+Thousands of simulated players join a game with no player limit from
+several threads, then each follows one of three plans while the expiry
+thread runs:
+
+- stay:  heartbeat every timeout/3 until the end, then leave
+- idle:  heartbeat for a while, then go silent (must time out)
+- leave: heartbeat for a while, then leave explicitly
+
+Every idle player must be expired exactly once, no earlier than its last
+heartbeat + timeout and at most --max-late seconds after it; stay and leave
+players must never be expired. Afterwards the manager must hold nothing.
+A heartbeat or rejoin that lands between expiry picking a player and
+removing them must keep the player, with a live deadline.
+Also times one expiry check with N players tracked: the deadline heap
+against the full heartbeat scan the old 5 s cleanup loop did.
+
+Usage: python3 bench_player_expiry.py [--players 3000] [--threads 8] [--timeout 1.0] [--seconds 4]
+Exits non-zero on any MISMATCH.
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import threading
+import time
+
+from game_players import GamePlayerManager
+from players import get_registry
+
+GAME = "expiry-bench"
+
+
+class WatchedManager(GamePlayerManager):
+    """Records every removal done by the expiry thread."""
+
+    def __init__(self, timeout_sec):
+        super().__init__(timeout_sec)
+        self.expired = {}  # player_id -> [time.monotonic() of each expiry]
+        self._expired_lock = threading.Lock()
+
+    def _remove_locked(self, player_id):
+        if threading.current_thread().name == "idle-expiry":
+            with self._expired_lock:
+                self.expired.setdefault(player_id, []).append(time.monotonic())
+        super()._remove_locked(player_id)
+
+
+def check_late_heartbeat(timeout):
+    """A heartbeat or rejoin landing after expiry picked a player, before it removed them, must keep them.
+
+    Returns the reasons it did not.
+    """
+    bad = []
+    for late in ("heartbeat", "rejoin"):
+        manager = GamePlayerManager(timeout)
+        manager.join("late", game=GAME)
+        time.sleep(timeout * 1.5)
+        with manager._cond:
+            expired = manager._pop_expired(time.monotonic())
+        if late == "heartbeat":
+            manager.heartbeat("late")
+        else:
+            manager.join("late", game=GAME)
+        removed = manager._expire(expired)
+        if not expired:
+            bad.append(f"{late}: the player was not picked for expiry")
+        elif removed:
+            bad.append(f"{late}: the player was counted as removed")
+        elif manager.get_game_for_player("late") != GAME:
+            bad.append(f"{late}: the player was removed anyway")
+        elif not any(entry[1] == "late" and manager._is_current(entry) for entry in manager._deadlines):
+            bad.append(f"{late}: the player no longer has a deadline")
+        manager.leave("late")
+    return bad
+
+
+def worker(manager, plans, args, start, last_heartbeat, rng):
+    """Play plans: [(player_id, kind, join_at, stop_at)], times relative to start."""
+    interval = args.timeout / 3
+    events = []  # (at, seq, action, player_id)
+    for seq, (player_id, kind, join_at, stop_at) in enumerate(plans):
+        events.append((join_at, seq, "join", player_id))
+        at = join_at + interval
+        while at < stop_at:
+            events.append((at, seq, "heartbeat", player_id))
+            at += interval * rng.uniform(0.8, 1.2)
+        if kind != "idle":
+            events.append((stop_at, seq, "leave", player_id))
+    events.sort()
+    for at, _, action, player_id in events:
+        delay = start + at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        if action == "join":
+            last_heartbeat[player_id] = time.monotonic()
+            manager.join(player_id, phone_id=player_id, game=GAME)
+        elif action == "heartbeat":
+            last_heartbeat[player_id] = time.monotonic()
+            manager.heartbeat(player_id)
+        else:
+            manager.leave(player_id)
+
+
+def time_checks(count, timeout, repeat=200):
+    """(heap check us, full scan us) for one expiry check with count players, none due."""
+    manager = GamePlayerManager(timeout)
+    for index in range(count):
+        manager.join(f"check-{index}", game=GAME)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        manager.cleanup_idle()
+    heap_us = (time.perf_counter() - start) / repeat * 1e6
+    start = time.perf_counter()
+    for _ in range(repeat):
+        manager.get_idle_players()
+    scan_us = (time.perf_counter() - start) / repeat * 1e6
+    for index in range(count):
+        manager.leave(f"check-{index}")
+    return heap_us, scan_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress idle-player expiry")
+    parser.add_argument("--players", type=int, default=3000, help="Simulated players")
+    parser.add_argument("--threads", type=int, default=8, help="Client threads")
+    parser.add_argument("--timeout", type=float, default=1.0, help="Heartbeat timeout in seconds")
+    parser.add_argument("--seconds", type=float, default=4.0, help="Length of the run")
+    parser.add_argument("--max-late", type=float, default=0.5, help="Allowed expiry lateness in seconds")
+    parser.add_argument("--seed", type=int, default=1, help="Plan seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    manager = WatchedManager(args.timeout)
+    plans = [[] for _ in range(args.threads)]
+    kinds = {}
+    for index in range(args.players):
+        player_id = f"expiry-{index}"
+        kind = rng.choice(("stay", "idle", "leave"))
+        join_at = rng.uniform(0, args.seconds / 2)
+        stop_at = args.seconds if kind == "stay" else rng.uniform(join_at, args.seconds)
+        kinds[player_id] = kind
+        plans[index % args.threads].append((player_id, kind, join_at, stop_at))
+
+    last_heartbeat = {}
+    expiry = manager.start_expiry()
+    start = time.monotonic() + 0.1
+    threads = [threading.Thread(target=worker, args=(manager, plan, args, start, last_heartbeat, random.Random(i)))
+               for i, plan in enumerate(plans)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    time.sleep(args.timeout + args.max_late)  # let the last idle players time out
+    manager.stop_expiry()
+    expiry.join(timeout=2)
+
+    bad = check_late_heartbeat(0.02)
+    late = []
+    for player_id, kind in kinds.items():
+        stamps = manager.expired.get(player_id, [])
+        if kind != "idle":
+            if stamps:
+                bad.append(f"{kind} player {player_id} was expired")
+            continue
+        if len(stamps) != 1:
+            bad.append(f"idle player {player_id} expired {len(stamps)} times")
+            continue
+        lateness = stamps[0] - (last_heartbeat[player_id] + args.timeout)
+        late.append(lateness)
+        if lateness < 0:
+            bad.append(f"idle player {player_id} expired {-lateness * 1000:.1f}ms early")
+        elif lateness > args.max_late:
+            bad.append(f"idle player {player_id} expired {lateness * 1000:.1f}ms late")
+    snapshot = manager.snapshot()
+    leftovers = (sum(len(players) for players in snapshot.games.values()) + len(snapshot.entries)
+                 + len(manager._last_heartbeat))
+    if leftovers:
+        bad.append(f"{leftovers} entries left in the manager")
+    registered = [p.player_id for p in get_registry().active_players() if p.player_id in kinds]
+    if registered:
+        bad.append(f"{len(registered)} players left in the registry")
+    if expiry.is_alive():
+        bad.append("expiry thread did not stop")
+
+    counts = {kind: sum(1 for k in kinds.values() if k == kind) for kind in ("stay", "idle", "leave")}
+    print(f"Players: {args.players} on {args.threads} threads ({counts['stay']} stay, {counts['idle']} idle, "
+          f"{counts['leave']} leave), timeout {args.timeout}s")
+    if late:
+        late_ms = sorted(x * 1000 for x in late)
+        print(f"Expiry lateness: p50 {statistics.median(late_ms):.1f}ms, "
+              f"p99 {late_ms[int(len(late_ms) * 0.99)]:.1f}ms, max {late_ms[-1]:.1f}ms")
+    heap_us, scan_us = time_checks(args.players, args.timeout)
+    print(f"One expiry check with {args.players} players tracked: deadline heap {heap_us:.2f}us, "
+          f"full scan {scan_us:.1f}us")
+    for reason in bad[:10]:
+        print(f"MISMATCH: {reason}")
+    if bad:
+        sys.exit(1)
+    print("OK: idle players expired on time, nobody else was")
+
+
+if __name__ == "__main__":
+    main()
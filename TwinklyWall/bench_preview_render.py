@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Regression check and timing for the windowed DotMatrix preview.
+
+Draws random frames with the mask-composite renderer (DotMatrix._composite_dots)
+and with the per-dot pygame.draw.circle loop, checks that the window pixels
+match exactly, and reports ms per frame for each. Runs on the SDL dummy
+video driver, so no display is needed.
+
+Usage: python3 bench_preview_render.py [--frames 20] [--dot-size 6] [--spacing 15]
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+import pygame.surfarray as surfarray
+
+from dotmatrix import DotMatrix
+
+
+def draw_per_dot(matrix):
+    """The pygame.draw.circle loop _visualize used before compositing."""
+    matrix.screen.fill(matrix.bg_color)
+    stagger = (matrix.dot_size / 2 + matrix.spacing / 2) if matrix.should_stagger else 0
+    for row in range(matrix.height):
+        for col in range(matrix.width):
+            x = matrix.spacing + col * (matrix.dot_size + matrix.spacing)
+            y = matrix.spacing + row * (matrix.dot_size + matrix.spacing) + (stagger * (col % 2))
+            pygame.draw.circle(matrix.screen, tuple(matrix.dot_colors[row, col]), (x, y), matrix.dot_size)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Verify and time the DotMatrix preview renderer")
+    p.add_argument("--frames", type=int, default=20)
+    p.add_argument("--dot-size", type=int, default=6)
+    p.add_argument("--spacing", type=int, default=15)
+    p.add_argument("--no-stagger", action="store_true")
+    args = p.parse_args()
+
+    matrix = DotMatrix(headless=False, fpp_output=False, enable_performance_monitor=False,
+                       dot_size=args.dot_size, spacing=args.spacing,
+                       should_stagger=not args.no_stagger, max_fps=0)
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, size=(matrix.height, matrix.width, 3), dtype=np.uint8)
+              for _ in range(args.frames)]
+
+    if not matrix._build_dot_sprites():
+        print("Composite renderer not applicable for these settings (per-dot path is used)")
+        return
+
+    loop_s = composite_s = 0.0
+    for i, colors in enumerate(frames):
+        matrix.dot_colors = colors
+        t0 = time.perf_counter()
+        draw_per_dot(matrix)
+        loop_s += time.perf_counter() - t0
+        expected = surfarray.array3d(matrix.screen)
+
+        matrix.screen.fill((255, 0, 255))  # make sure the composite overwrites everything
+        t0 = time.perf_counter()
+        matrix._composite_dots()
+        composite_s += time.perf_counter() - t0
+        actual = surfarray.array3d(matrix.screen)
+        if not np.array_equal(actual, expected):
+            bad = int(np.count_nonzero(np.any(actual != expected, axis=2)))
+            print(f"MISMATCH: frame {i}, {bad} window pixels differ")
+            raise SystemExit(1)
+
+    w, h = matrix.screen.get_size()
+    print(f"Preview {matrix.width}x{matrix.height} dots in a {w}x{h} window: outputs identical")
+    print(f"  pygame.draw.circle loop: {loop_s / args.frames * 1000:8.2f} ms/frame")
+    print(f"  mask composite + copy  : {composite_s / args.frames * 1000:8.2f} ms/frame")
+    print(f"  speedup                : {loop_s / max(1e-9, composite_s):.1f}x")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
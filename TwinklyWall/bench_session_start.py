@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Join -> first frame latency for Tetris sessions, cold vs pooled.
+
+Each session joins a player through game_players, waits for the change the
+way the API-mode Tetris monitor does, gets a DotMatrix and runs Tetris until
+its first frame has been handed to the output, then leaves. The cold path
+builds a new DotMatrix per session (the old behaviour). The pooled path
+acquires one long-lived matrix from a MatrixPool and only blanks it on
+release.
+
+Usage: python3 bench_session_start.py [--sessions 10]
+"""
+
+import argparse
+import os
+import statistics
+import threading
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import main as app_main
+from dotmatrix import MatrixPool
+from game_players import first_joined_at, join_game, leave_game, wait_for_player_change
+
+
+def run_session(get_matrix, put_matrix, index):
+    """One join -> first frame -> leave cycle. Returns (acquire_ms, total_ms)."""
+    first_frame = threading.Event()
+    stop_event = threading.Event()
+    wait_for_player_change(0)  # drop any stale change flag
+    join_game(f"bench-{index}", phone_id=f"bench-{index}", game="tetris")
+    wait_for_player_change(1.0)
+
+    start = time.perf_counter()
+    matrix = get_matrix()
+    acquire_ms = (time.perf_counter() - start) * 1000
+    thread = threading.Thread(
+        target=app_main.run_tetris,
+        args=(matrix, stop_event),
+        kwargs={"owns_matrix": False, "on_first_frame": first_frame.set},
+        daemon=True,
+    )
+    thread.start()
+    first_frame.wait(5.0)
+    total_ms = (time.time() - first_joined_at("tetris")) * 1000
+
+    stop_event.set()
+    thread.join(timeout=2)
+    leave_game(f"bench-{index}")
+    put_matrix(matrix)
+    return acquire_ms, total_ms
+
+
+def report(label, samples):
+    acquire = [a for a, _ in samples]
+    total = [t for _, t in samples]
+    print(f"{label:>7s}: acquire median {statistics.median(acquire):7.2f}ms | "
+          f"join->first frame median {statistics.median(total):7.2f}ms max {max(total):7.2f}ms")
+    return statistics.median(total)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Join -> first frame latency, cold vs pooled DotMatrix")
+    parser.add_argument("--sessions", type=int, default=10, help="Sessions per mode")
+    args = parser.parse_args()
+
+    cold = [run_session(lambda: app_main.build_matrix(show_preview=False), lambda m: m.shutdown(), i)
+            for i in range(args.sessions)]
+
+    pool = MatrixPool()
+    pool.register("tetris", lambda: app_main.build_matrix(show_preview=False))
+    pool.get("tetris")  # the API monitor pre-builds at startup
+    pooled = [run_session(lambda: pool.acquire("tetris", owner="bench"), lambda m: pool.release("tetris"), i)
+              for i in range(args.sessions)]
+    pool.close()
+
+    print()
+    cold_ms = report("cold", cold)
+    pooled_ms = report("pooled", pooled)
+    print(f"pool builds={pool.builds} reuses={pool.reuses} | speedup {cold_ms / max(pooled_ms, 1e-6):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Regression check and timing for staggered-canvas sampling.
+
+Renders random 90x100 staggered canvases and checks that
+DotMatrix._sample_no_blend_numpy (strided gather) and
+_sample_no_blend_fallback match the previous per-column loop pixel for
+pixel, then reports the time per frame of each.
+
+Usage: python3 bench_stagger_sampling.py [--frames 200]
+Exits non-zero on any mismatch, so it can run as a pre-deploy check.
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+import pygame.surfarray as surfarray
+
+from dotmatrix import DotMatrix
+
+
+def reference_sample(matrix, surface):
+    """The per-column loop _sample_no_blend_numpy used before vectorization."""
+    pixel_view = surfarray.pixels3d(surface)
+    h = pixel_view.shape[1]
+    result = np.zeros((matrix.height, matrix.width, 3), dtype=np.uint8)
+    for col in range(matrix.width):
+        if col % 2 == 0:
+            src_rows = np.arange(0, h, 2, dtype=np.int32)
+        else:
+            src_rows = np.arange(1, h, 2, dtype=np.int32)
+        for dst_row, src_row in enumerate(src_rows):
+            if src_row < h:
+                result[dst_row, col] = pixel_view[col, src_row]
+    del pixel_view
+    return result
+
+
+def random_canvas(rng, width, height):
+    surface = pygame.Surface((width, height * 2))
+    pixels = surfarray.pixels3d(surface)
+    pixels[:] = rng.integers(0, 256, size=pixels.shape, dtype=np.uint8)
+    del pixels
+    return surface
+
+
+def main():
+    p = argparse.ArgumentParser(description="Verify and time staggered-canvas sampling")
+    p.add_argument("--frames", type=int, default=200)
+    args = p.parse_args()
+
+    matrix = DotMatrix(headless=True, fpp_output=False, enable_performance_monitor=False,
+                       disable_blending=True, supersample=1, max_fps=0)
+    rng = np.random.default_rng(0)
+    canvases = [random_canvas(rng, matrix.width, matrix.height) for _ in range(args.frames)]
+
+    ref_s = new_s = 0.0
+    for i, canvas in enumerate(canvases):
+        t0 = time.perf_counter()
+        expected = reference_sample(matrix, canvas)
+        t1 = time.perf_counter()
+        matrix._sample_no_blend_numpy(canvas)
+        t2 = time.perf_counter()
+        ref_s += t1 - t0
+        new_s += t2 - t1
+        if not np.array_equal(matrix.dot_colors, expected):
+            bad = int(np.count_nonzero(np.any(matrix.dot_colors != expected, axis=2)))
+            print(f"MISMATCH (numpy path): frame {i}, {bad} dots differ")
+            raise SystemExit(1)
+
+    # Fallback path works on nested lists of tuples
+    fallback_s = 0.0
+    for i, canvas in enumerate(canvases[:10]):
+        expected = reference_sample(matrix, canvas)
+        matrix.dot_colors = [[(0, 0, 0)] * matrix.width for _ in range(matrix.height)]
+        t0 = time.perf_counter()
+        matrix._sample_no_blend_fallback(canvas)
+        fallback_s += time.perf_counter() - t0
+        if not np.array_equal(np.array(matrix.dot_colors, dtype=np.uint8), expected):
+            print(f"MISMATCH (fallback path): frame {i}")
+            raise SystemExit(1)
+
+    print(f"Staggered sampling {matrix.width}x{matrix.height * 2} -> {matrix.width}x{matrix.height}: outputs identical")
+    print(f"  per-column loop : {ref_s / args.frames * 1000:8.3f} ms/frame")
+    print(f"  strided gather  : {new_s / args.frames * 1000:8.3f} ms/frame")
+    print(f"  get_at fallback : {fallback_s / min(10, args.frames) * 1000:8.3f} ms/frame")
+    print(f"  speedup         : {ref_s / max(1e-9, new_s):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
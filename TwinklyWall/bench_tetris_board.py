@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Regression check and timing for the numpy Tetris board (games/fast_tetris.py).
+
+Plays the original list-of-lists Tetris and FastTetris side by side. Both
+start from the same random seed and get the same random inputs (moves and
+soft drops) between ticks. Rotations are left out because FastTetris
+rotates by SRS (see bench_tetris_srs.py). After every tick the two canvases
+must match pixel for pixel and the boards must hold the same cells. It also
+reports the per-tick cost of each and microbenchmarks the hot paths.
+
+The original raises IndexError when a piece is tested against the right
+wall or the ceiling. When that happens the pair is restarted from the next
+seed and the event is counted, not treated as a mismatch.
+
+Usage: python3 bench_tetris_board.py [--ticks 3000] [--seed 1]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from games.fast_tetris import FastTetris
+from games.tetris import Tetris
+
+CANVAS = (90, 50)
+# No rotations: FastTetris turns pieces by SRS, which bench_tetris_srs.py checks
+ACTIONS = ("move_piece_left", "move_piece_right", "drop_piece")
+TICK_DT = 1.0 / 60
+
+
+def new_pair(seed):
+    games = []
+    for cls in (Tetris, FastTetris):
+        random.seed(seed)
+        canvas = pygame.Surface(CANVAS)
+        game = cls(canvas, True)
+        game.rng_state = random.getstate()
+        games.append(game)
+    return games
+
+
+def call(game, name, *args):
+    """Run a game method with that game's own copy of the global random state
+    (Random_Bag draws from the random module, which both games share)."""
+    random.setstate(game.rng_state)
+    try:
+        return getattr(game, name)(*args)
+    finally:
+        game.rng_state = random.getstate()
+
+
+def boards_equal(orig, fast):
+    return np.array_equal(np.array(orig.dead_grid, dtype=np.int8), fast.board)
+
+
+def run_lockstep(args):
+    rng = random.Random(args.seed)
+    seed = args.seed
+    orig, fast = new_pair(seed)
+    restarts = 0
+    mismatches = 0
+    orig_ms = fast_ms = 0.0
+    for tick in range(args.ticks):
+        if rng.random() < args.input_rate:
+            action = rng.choice(ACTIONS)
+            try:
+                call(orig, action)
+            except IndexError:
+                seed += 1
+                restarts += 1
+                orig, fast = new_pair(seed)
+                continue
+            call(fast, action)
+
+        start = time.perf_counter()
+        try:
+            call(orig, "tick", TICK_DT, 20)
+        except IndexError:
+            seed += 1
+            restarts += 1
+            orig, fast = new_pair(seed)
+            continue
+        orig_ms += time.perf_counter() - start
+        start = time.perf_counter()
+        call(fast, "tick", TICK_DT, 20)
+        fast_ms += time.perf_counter() - start
+
+        same_pixels = np.array_equal(pygame.surfarray.array3d(orig.screen), pygame.surfarray.array3d(fast.screen))
+        if not same_pixels or not boards_equal(orig, fast):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"MISMATCH at tick {tick} (seed {seed}): pixels={'ok' if same_pixels else 'differ'} "
+                      f"board={'ok' if boards_equal(orig, fast) else 'differs'}", file=sys.stderr)
+            seed += 1
+            orig, fast = new_pair(seed)
+    return mismatches, restarts, orig_ms * 1000 / args.ticks, fast_ms * 1000 / args.ticks
+
+
+def time_op(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1e6 / repeat
+
+
+def microbench(repeat):
+    orig, fast = new_pair(0)
+    # A half-full board with holes so clears and collisions have real work
+    rng = random.Random(0)
+    for y in range(7):
+        for x in range(10):
+            value = rng.randint(1, 7) if rng.random() < 0.8 else 0
+            orig.dead_grid[y][x] = value
+            fast.board[y, x] = value
+    rows = []
+    rows.append(("collision test", time_op(orig.check_move_validity, repeat), time_op(fast.check_move_validity, repeat)))
+    # FastTetris.draw_grid only snapshots the board (see bench_tetris_dirty.py); time a full draw
+    rows.append(("draw board", time_op(orig.draw_grid, repeat), time_op(lambda: fast.renderer._draw_cells(fast.board), repeat)))
+    saved_orig = [row[:] for row in orig.dead_grid]
+    saved_fast = fast.board.copy()
+
+    def clear_orig():
+        orig.dead_grid[:] = [row[:] for row in saved_orig]
+        orig.dead_grid[3] = [1] * 10
+        orig.clear_lines()
+
+    def clear_fast():
+        fast.board[...] = saved_fast
+        fast.board[3] = 1
+        fast.clear_lines(rows=(0, fast.blocks_height))  # a full scan, not just the last lock's rows
+    rows.append(("line check/tick", time_op(orig.clear_lines, repeat), time_op(fast.clear_lines, repeat)))
+    rows.append(("line clear", time_op(clear_orig, repeat), time_op(clear_fast, repeat)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare list-based Tetris with the numpy board")
+    parser.add_argument("--ticks", type=int, default=3000, help="Lockstep ticks to compare")
+    parser.add_argument("--seed", type=int, default=1, help="First game seed")
+    parser.add_argument("--input-rate", type=float, default=0.3, help="Chance of an input before each tick")
+    parser.add_argument("--repeat", type=int, default=2000, help="Iterations per microbenchmark")
+    args = parser.parse_args()
+
+    pygame.init()
+    with contextlib.redirect_stdout(io.StringIO()):
+        mismatches, restarts, orig_tick, fast_tick = run_lockstep(args)
+        rows = microbench(args.repeat)
+
+    print(f"Lockstep: {args.ticks} ticks, {mismatches} mismatches, {restarts} restarts (original IndexError)")
+    print(f"{'':16s} {'list':>10s} {'numpy':>10s} {'speedup':>8s}")
+    print(f"{'tick':16s} {orig_tick * 1000:9.1f}us {fast_tick * 1000:9.1f}us {orig_tick / fast_tick:7.1f}x")
+    for name, orig_us, fast_us in rows:
+        print(f"{name:16s} {orig_us:9.1f}us {fast_us:9.1f}us {orig_us / fast_us:7.1f}x")
+    if mismatches:
+        print("MISMATCH")
+        sys.exit(1)
+    print("OK: pixel-identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Regression check and timing for dirty-rectangle Tetris rendering.
+
+1. Lockstep: the original Tetris and FastTetris (which only redraws what
+   changed) play the same seeded game with the same random inputs (see
+   bench_tetris_board.py). After every tick the canvases must match pixel
+   for pixel. Every third tick, like run_tetris, the FastTetris canvas is
+   rendered into a DotMatrix with take_dirty() and the original's canvas
+   into a second DotMatrix in full. Both write FPP output (direct mmap,
+   gamma 2.2, as on the Pi) to temp files. Dots and FPP bytes must match.
+2. Staggered canvas: random rects of a 90x100 canvas are repainted and
+   rendered with dirty rects against a full render.
+3. Timing of a tick and of a render, full against dirty.
+
+Exits non-zero on any MISMATCH.
+
+Usage: python3 bench_tetris_dirty.py [--ticks 3000] [--seed 1]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from bench_tetris_board import ACTIONS, TICK_DT, call, new_pair
+from dotmatrix import DotMatrix
+
+TICKS_PER_RENDER = 3
+
+
+def make_matrix(path, height=50):
+    return DotMatrix(
+        height=height, headless=True, fpp_output=True, disable_blending=True, supersample=1,
+        fpp_gamma=2.2, fpp_memory_buffer_file=path, fpp_direct_mmap=True,
+        enable_performance_monitor=False, max_fps=None,
+    )
+
+
+def outputs_equal(a, b):
+    return np.array_equal(a.dot_colors, b.dot_colors) and a.fpp.memory_map[:] == b.fpp.memory_map[:]
+
+
+def run_lockstep(args, tmp):
+    rng = random.Random(args.seed)
+    seed = args.seed
+    dirty_matrix = make_matrix(os.path.join(tmp, "dirty"))
+    full_matrix = make_matrix(os.path.join(tmp, "full"))
+    orig, fast = new_pair(seed)
+    canvas_bad = output_bad = restarts = 0
+    for tick in range(args.ticks):
+        try:
+            if rng.random() < args.input_rate:
+                action = rng.choice(ACTIONS)
+                call(orig, action)
+                call(fast, action)
+            call(orig, "tick", TICK_DT, 20)
+        except IndexError:
+            # The original raises at the right wall / ceiling; start a new pair
+            seed += 1
+            restarts += 1
+            orig, fast = new_pair(seed)
+            continue
+        call(fast, "tick", TICK_DT, 20)
+
+        if not np.array_equal(pygame.surfarray.array3d(orig.screen), pygame.surfarray.array3d(fast.screen)):
+            canvas_bad += 1
+            if canvas_bad <= 5:
+                print(f"MISMATCH canvas at tick {tick} (seed {seed})", file=sys.stderr)
+            seed += 1
+            orig, fast = new_pair(seed)
+            continue
+        if tick % TICKS_PER_RENDER == 0:
+            dirty_matrix.render_frame(fast.screen, pace=False, dirty=fast.take_dirty())
+            full_matrix.render_frame(orig.screen, pace=False)
+            if not outputs_equal(dirty_matrix, full_matrix):
+                output_bad += 1
+                if output_bad <= 5:
+                    print(f"MISMATCH dots/FPP at tick {tick} (seed {seed})", file=sys.stderr)
+    partial = dirty_matrix.partial_frames
+    dirty_matrix.shutdown()
+    full_matrix.shutdown()
+    return canvas_bad, output_bad, restarts, partial
+
+
+def run_stagger(args, tmp):
+    rng = random.Random(args.seed)
+    canvas = pygame.Surface((90, 100))
+    canvas.fill((0, 0, 0))
+    dirty_matrix = make_matrix(os.path.join(tmp, "stagger_dirty"))
+    full_matrix = make_matrix(os.path.join(tmp, "stagger_full"))
+    dirty_matrix.render_frame(canvas, pace=False)
+    bad = 0
+    for frame in range(args.frames):
+        rects = []
+        for _ in range(rng.randint(0, 3)):
+            rect = (rng.randrange(90), rng.randrange(100), rng.randint(1, 12), rng.randint(1, 12))
+            canvas.fill((rng.randrange(256), rng.randrange(256), rng.randrange(256)), rect)
+            rects.append(rect)
+        dirty_matrix.render_frame(canvas, pace=False, dirty=rects)
+        full_matrix.render_frame(canvas, pace=False)
+        if not outputs_equal(dirty_matrix, full_matrix):
+            bad += 1
+            if bad <= 5:
+                print(f"MISMATCH staggered frame {frame}", file=sys.stderr)
+    dirty_matrix.shutdown()
+    full_matrix.shutdown()
+    return bad
+
+
+def run_timing(args, tmp):
+    """Per-tick and per-render cost of a bot-driven FastTetris game, full against dirty."""
+    results = {}
+    for mode in ("full", "dirty"):
+        matrix = make_matrix(os.path.join(tmp, f"time_{mode}"))
+        _, game = new_pair(args.seed)
+        rng = random.Random(args.seed)
+        tick_s = render_s = 0.0
+        renders = 0
+        for tick in range(args.ticks):
+            if rng.random() < args.input_rate:
+                call(game, rng.choice(ACTIONS))
+            if mode == "full":
+                game.invalidate()
+            start = time.perf_counter()
+            call(game, "tick", TICK_DT, 20)
+            tick_s += time.perf_counter() - start
+            if tick % TICKS_PER_RENDER == 0:
+                start = time.perf_counter()
+                dirty = game.take_dirty()
+                matrix.render_frame(game.screen, pace=False, dirty=dirty if mode == "dirty" else None)
+                render_s += time.perf_counter() - start
+                renders += 1
+        matrix.shutdown()
+        results[mode] = (tick_s * 1e6 / args.ticks, render_s * 1e6 / renders)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check dirty-rect Tetris rendering against full redraws")
+    parser.add_argument("--ticks", type=int, default=3000, help="Lockstep ticks to compare")
+    parser.add_argument("--frames", type=int, default=2000, help="Staggered canvas frames to compare")
+    parser.add_argument("--seed", type=int, default=1, help="First game seed")
+    parser.add_argument("--input-rate", type=float, default=0.3, help="Chance of an input before each tick")
+    args = parser.parse_args()
+
+    pygame.init()
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        canvas_bad, output_bad, restarts, partial = run_lockstep(args, tmp)
+        stagger_bad = run_stagger(args, tmp)
+        timing = run_timing(args, tmp)
+
+    renders = args.ticks // TICKS_PER_RENDER
+    print(f"Lockstep: {args.ticks} ticks, {canvas_bad} canvas mismatches, {output_bad} dots/FPP mismatches, "
+          f"{restarts} restarts (original IndexError), ~{partial}/{renders} renders partial")
+    print(f"Staggered canvas: {args.frames} frames, {stagger_bad} mismatches")
+    (full_tick, full_render), (dirty_tick, dirty_render) = timing["full"], timing["dirty"]
+    print(f"{'':8s} {'full':>10s} {'dirty':>10s} {'speedup':>8s}")
+    print(f"{'tick':8s} {full_tick:9.1f}us {dirty_tick:9.1f}us {full_tick / dirty_tick:7.1f}x")
+    print(f"{'render':8s} {full_render:9.1f}us {dirty_render:9.1f}us {full_render / dirty_render:7.1f}x")
+    if canvas_bad or output_bad or stagger_bad:
+        print("MISMATCH")
+        sys.exit(1)
+    print("OK: identical canvas, dots and FPP bytes")
+
+
+if __name__ == "__main__":
+    main()
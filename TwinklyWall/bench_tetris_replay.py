@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Record a live Tetris session and replay it (tetris_replay.py).
+
+Two players join through game_players and threads send them random
+commands through players.handle_input while main.run_tetris plays on its
+simulation thread, recording to a temporary directory. The recording is
+then re-simulated headless at full speed: the final state hash must match
+the one the live game wrote (MISMATCH otherwise). The same recording with
+its header reset, as a crash would leave it, must still load and replay.
+
+Prints the recording size and how much faster than real time the game
+loop re-simulates.
+
+Usage: python3 bench_tetris_replay.py [--seconds 3] [--rate 15] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+RECORDINGS = tempfile.mkdtemp(prefix="twinklywall-replays-")
+os.environ["TWINKLYWALL_TETRIS_RECORDINGS"] = RECORDINGS
+
+import main as app_main
+from game_players import join_game, leave_game
+from players import handle_input
+from tetris_replay import COMMANDS, HEADER, TetrisReplay, load_recording
+
+PLAYERS = ("replay-bench-1", "replay-bench-2")
+
+
+def play_session(args):
+    """Play one recorded session with random commands. Returns the recording's path."""
+    for player_id in PLAYERS:
+        join_game(player_id, phone_id=player_id, game="tetris")
+    matrix = app_main.build_matrix(show_preview=False)
+    stop_event = threading.Event()
+    game = threading.Thread(target=app_main.run_tetris, args=(matrix, stop_event), daemon=True)
+    done = threading.Event()
+
+    def sender(player_id, seed):
+        rng = random.Random(seed)
+        while not done.is_set():
+            handle_input(player_id, {"player_id": player_id, "cmd": rng.choice(COMMANDS)})
+            time.sleep(rng.expovariate(args.rate))
+
+    senders = [threading.Thread(target=sender, args=(player_id, index), daemon=True)
+               for index, player_id in enumerate(PLAYERS)]
+    game.start()
+    time.sleep(0.2)  # bind_input runs as the game starts
+    for thread in senders:
+        thread.start()
+    time.sleep(args.seconds)
+    done.set()
+    for thread in senders:
+        thread.join()
+    stop_event.set()
+    game.join(timeout=5)
+    for player_id in PLAYERS:
+        leave_game(player_id)
+    recordings = sorted(os.listdir(RECORDINGS))
+    return os.path.join(RECORDINGS, recordings[-1]) if recordings else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record a live Tetris session and check its replay")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Length of the live session")
+    parser.add_argument("--rate", type=float, default=15.0, help="Commands per second per player")
+    parser.add_argument("--repeat", type=int, default=5, help="Re-simulations to time")
+    args = parser.parse_args()
+
+    try:
+        path = play_session(args)
+        if path is None:
+            print("MISMATCH: no recording was written")
+            sys.exit(1)
+        recording = load_recording(path)
+        size = os.path.getsize(path)
+        slots = sorted({event[2] for event in recording.events})
+        print(f"Recorded: {recording.ticks} ticks ({recording.duration_s:.1f}s), {len(recording.events)} commands "
+              f"from slots {slots}, {size} bytes")
+
+        stats = TetrisReplay(recording).run(repeat=args.repeat)
+        tick = stats["tick"]
+        print(f"Replay: {stats['ticks_per_s']} ticks/s ({stats['realtime_x']}x real time), tick p50 "
+              f"{tick['p50_ms']}ms p99 {tick['p99_ms']}ms")
+        print(f"State hash: {stats['state_hash']} (recorded {stats['expected_hash']})")
+
+        # A session cut off by a crash: the header was never completed
+        crashed = os.path.join(RECORDINGS, "crashed.twtr")
+        shutil.copy(path, crashed)
+        with open(crashed, "r+b") as f:
+            header = bytearray(f.read(HEADER.size))
+            fields = list(HEADER.unpack(bytes(header)))
+            fields[8] = fields[9] = 0         # ticks, commands
+            fields[11] = bytes(8)             # state hash
+            f.seek(0)
+            f.write(HEADER.pack(*fields))
+            f.truncate(size - 3)              # and a half-written last event
+        partial = load_recording(crashed)
+        partial_stats = TetrisReplay(partial).run()
+        print(f"Unfinished recording: {len(partial.events)} commands, replayed {partial_stats['ticks']} ticks")
+    finally:
+        shutil.rmtree(RECORDINGS, ignore_errors=True)
+
+    bad = []
+    if not stats["matches"]:
+        bad.append("replayed state differs from the recorded one")
+    if len(recording.events) < 2 or slots != [0, 1]:
+        bad.append("commands from both players were not recorded")
+    if partial.complete or len(partial.events) != len(recording.events) - 1:
+        bad.append("unfinished recording did not load up to its last complete command")
+    for reason in bad:
+        print(f"MISMATCH: {reason}")
+    if bad:
+        sys.exit(1)
+    print("OK: replay reproduces the live session")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tetris soak benchmark on the headless harness (tetris_harness.py).
+
+Bots (one or two players) send commands through
+players.handle_input while FastTetris runs thousands of ticks as fast as
+possible, rendering every third tick through DotMatrix to a temporary FPP
+file. Reports ticks/s, tick and render cost, and allocation counters.
+
+The run is then replayed from its own input log in a fresh harness; the
+final state hashes must match (MISMATCH otherwise).
+
+For CI:  --min-ticks-per-s N fails the run below N ticks/s; --json prints
+         the stats as one JSON object.
+For bug reports:  --record run.jsonl saves the seed and input log;
+         --replay run.jsonl plays it back and checks the recorded state hash.
+
+Usage: python3 bench_tetris_soak.py [--ticks 10000] [--players 2] [--bot stack] [--rate 8] [--seed 0]
+                                    [--alloc] [--record FILE | --replay FILE]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from tetris_harness import TetrisHarness, load_log, temp_fpp_file
+
+
+def play(ticks, fpp_file, trace_alloc=False, **kwargs):
+    harness = TetrisHarness(fpp_file=fpp_file, **kwargs)
+    try:
+        stats = harness.run(ticks, trace_alloc=trace_alloc)
+        return harness, stats, harness.state_hash()
+    finally:
+        harness.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak-test headless Tetris with bot players")
+    parser.add_argument("--ticks", type=int, default=10000, help="Game ticks to run")
+    parser.add_argument("--players", type=int, default=2, choices=(1, 2), help="Bot players")
+    parser.add_argument("--bot", default="stack", choices=("stack", "random"), help="Bot strategy")
+    parser.add_argument("--rate", type=float, default=8.0, help="Commands per second per bot (game time)")
+    parser.add_argument("--seed", type=int, default=0, help="Piece sequence and bot seed")
+    parser.add_argument("--no-fpp", action="store_true", help="Render without writing FPP output")
+    parser.add_argument("--alloc", action="store_true", help="Also trace allocations (tracemalloc, slower)")
+    parser.add_argument("--record", metavar="FILE", help="Save the seed and input log of the run")
+    parser.add_argument("--replay", metavar="FILE", help="Play back a recorded input log")
+    parser.add_argument("--min-ticks-per-s", type=float, default=None, help="Fail below this throughput")
+    parser.add_argument("--json", action="store_true", help="Print the stats as JSON")
+    args = parser.parse_args()
+
+    pygame.init()
+    fpp_file = None if args.no_fpp else temp_fpp_file()
+    try:
+        if args.replay:
+            header, entries = load_log(args.replay)
+            _, stats, state = play(header["ticks"], fpp_file, seed=header["seed"], players=header["players"],
+                                   script=entries)
+            expected = header["state_hash"]
+            stats.update(mode="replay", state_hash=state, expected_hash=expected)
+        else:
+            harness, stats, state = play(args.ticks, fpp_file, seed=args.seed, players=args.players, bot=args.bot,
+                                          rate=args.rate)
+            if args.record:
+                harness.save_log(args.record)
+            # Determinism check: the same seed and input log must end in the same state
+            _, _, expected = play(args.ticks, fpp_file, seed=args.seed, players=args.players, script=harness.log)
+            stats.update(mode="bots", bot=args.bot, players=args.players, rate=args.rate, seed=args.seed,
+                         state_hash=state, replay_hash=expected)
+        if args.alloc:
+            _, alloc, _ = play(min(args.ticks, 2000), fpp_file, trace_alloc=True, seed=args.seed,
+                               players=args.players, bot=args.bot, rate=args.rate)
+            stats["alloc"] = {key: alloc[key] for key in ("ticks", "alloc_blocks_growth", "traced_kib", "traced_peak_kib")}
+    finally:
+        if fpp_file:
+            os.unlink(fpp_file)
+
+    failed = state != expected
+    slow = args.min_ticks_per_s is not None and stats["ticks_per_s"] < args.min_ticks_per_s
+    if args.json:
+        print(json.dumps(stats))
+    else:
+        print(f"Ticks: {stats['ticks']} in {stats['elapsed_s']}s = {stats['ticks_per_s']} ticks/s "
+              f"({stats['inputs']} inputs, {stats['lines_cleared']} lines, {stats['topouts']} top-outs)")
+        print(f"Tick: {stats['tick_us']}us | render: {stats['render_ms']}ms over {stats['frames']} frames "
+              f"({stats['partial_frames']} dirty-rect)")
+        print(f"Allocations: {stats['alloc_blocks_growth']:+d} live blocks, {stats['gc_collections']} gc collections")
+        if "alloc" in stats:
+            alloc = stats["alloc"]
+            print(f"Traced ({alloc['ticks']} ticks): {alloc['alloc_blocks_growth']:+d} live blocks, "
+                  f"{alloc['traced_kib']} KiB held, peak {alloc['traced_peak_kib']} KiB")
+        print(f"State hash: {state} (expected {expected})")
+    if failed:
+        print("MISMATCH: replay did not reproduce the state")
+    if slow:
+        print(f"FAIL: {stats['ticks_per_s']} ticks/s is below {args.min_ticks_per_s}")
+    if failed or slow:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+SRS rotation check for FastTetris (games/fast_tetris.py).
+
+1. The kick tables must equal the SRS reference tables below. Those are
+   written in the usual "0->R" notation with +y up, independently of the
+   module's layout.
+2. Kick outcomes: on random boards, for random pieces, rotation states and
+   positions, FastTetris.rotate_tetromino must end in the same shape and
+   position as a plain reference. The reference turns the shape as a list,
+   tries the reference offsets in order and tests each cell in Python.
+3. Timing of one rotation against the original Tetris.rotate_tetromino.
+
+Exits non-zero on any MISMATCH.
+
+Usage: python3 bench_tetris_srs.py [--cases 20000] [--seed 0]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from games.fast_tetris import KICKS, SHAPE_STATES, FastTetris
+from games.tetris import Tetris, Tetromino
+
+STATE_NAMES = ("0", "R", "2", "L")
+
+# SRS reference (Tetris Guideline), +y up
+REFERENCE_JLSTZ = {
+    "0->R": [(0, 0), (-1, 0), (-1, +1), (0, -2), (-1, -2)],
+    "R->0": [(0, 0), (+1, 0), (+1, -1), (0, +2), (+1, +2)],
+    "R->2": [(0, 0), (+1, 0), (+1, -1), (0, +2), (+1, +2)],
+    "2->R": [(0, 0), (-1, 0), (-1, +1), (0, -2), (-1, -2)],
+    "2->L": [(0, 0), (+1, 0), (+1, +1), (0, -2), (+1, -2)],
+    "L->2": [(0, 0), (-1, 0), (-1, -1), (0, +2), (-1, +2)],
+    "L->0": [(0, 0), (-1, 0), (-1, -1), (0, +2), (-1, +2)],
+    "0->L": [(0, 0), (+1, 0), (+1, +1), (0, -2), (+1, -2)],
+}
+REFERENCE_I = {
+    "0->R": [(0, 0), (-2, 0), (+1, 0), (-2, -1), (+1, +2)],
+    "R->0": [(0, 0), (+2, 0), (-1, 0), (+2, +1), (-1, -2)],
+    "R->2": [(0, 0), (-1, 0), (+2, 0), (-1, +2), (+2, -1)],
+    "2->R": [(0, 0), (+1, 0), (-2, 0), (+1, -2), (-2, +1)],
+    "2->L": [(0, 0), (+2, 0), (-1, 0), (+2, +1), (-1, -2)],
+    "L->2": [(0, 0), (-2, 0), (+1, 0), (-2, -1), (+1, +2)],
+    "L->0": [(0, 0), (+1, 0), (-2, 0), (+1, -2), (-2, +1)],
+    "0->L": [(0, 0), (-1, 0), (+2, 0), (-1, +2), (+2, -1)],
+}
+# SRS spawn states, top row first
+REFERENCE_SPAWN = {
+    1: ["....", "IIII", "....", "...."],
+    2: ["J..", "JJJ", "..."],
+    3: ["..L", "LLL", "..."],
+    5: [".SS", "SS.", "..."],
+    6: ["ZZ.", ".ZZ", "..."],
+    7: [".T.", "TTT", "..."],
+}
+
+
+def reference_table(type_index):
+    return REFERENCE_I if type_index == 1 else REFERENCE_JLSTZ
+
+
+def turn_clockwise(cells):
+    size = len(cells)
+    return [[cells[size - 1 - c][r] for c in range(size)] for r in range(size)]
+
+
+def reference_states(type_index):
+    cells = [[1 if ch != "." else 0 for ch in row] for row in REFERENCE_SPAWN[type_index]]
+    states = [cells]
+    for _ in range(3):
+        states.append(turn_clockwise(states[-1]))
+    return states
+
+
+def filled(shape):
+    return [[1 if v else 0 for v in row] for row in shape]
+
+
+def fits(board, shape, position):
+    size = len(shape)
+    for local_y in range(size):
+        for local_x in range(size):
+            if shape[size - 1 - local_y][local_x]:
+                gx, gy = position[0] + local_x, position[1] + local_y
+                if gx < 0 or gy < 0 or gx >= len(board[0]) or gy >= len(board) or board[gy][gx]:
+                    return False
+    return True
+
+
+def check_tables():
+    bad = 0
+    for type_index in (1, 2, 3, 5, 6, 7):
+        reference = reference_table(type_index)
+        for state in range(4):
+            for direction, step in ((0, 1), (1, 3)):
+                key = f"{STATE_NAMES[state]}->{STATE_NAMES[(state + step) % 4]}"
+                if [tuple(k) for k in KICKS[type_index][state][direction]] != reference[key]:
+                    bad += 1
+                    print(f"MISMATCH kick table piece {type_index} {key}", file=sys.stderr)
+        # Every module state must be the reference state of the same SRS index
+        for state, shape in enumerate(SHAPE_STATES[type_index]):
+            if filled(shape) != reference_states(type_index)[state]:
+                bad += 1
+                print(f"MISMATCH rotation state piece {type_index} state {STATE_NAMES[state]}", file=sys.stderr)
+    return bad
+
+
+def check_outcomes(game, cases, rng):
+    bad = 0
+    kicked = 0
+    for case in range(cases):
+        board = [[0] * game.blocks_width for _ in range(game.blocks_height)]
+        density = rng.uniform(0.1, 0.6)
+        top = rng.randint(2, game.blocks_height)
+        for y in range(top):
+            for x in range(game.blocks_width):
+                if rng.random() < density:
+                    board[y][x] = rng.randint(1, 7)
+        type_index = rng.choice((1, 2, 3, 5, 6, 7))
+        state = rng.randrange(4)
+        states = reference_states(type_index)
+        spots = [(x, y) for x in range(-2, game.blocks_width) for y in range(-2, game.blocks_height)
+                 if fits(board, states[state], (x, y))]
+        if not spots:
+            continue
+        position = rng.choice(spots)
+        clockwise = rng.random() < 0.5
+
+        # Reference outcome
+        target = (state + (1 if clockwise else 3)) % 4
+        key = f"{STATE_NAMES[state]}->{STATE_NAMES[target]}"
+        expected = (states[state], position)
+        for dx, dy in reference_table(type_index)[key]:
+            moved = (position[0] + dx, position[1] + dy)
+            if fits(board, states[target], moved):
+                expected = (states[target], moved)
+                kicked += (dx, dy) != (0, 0)
+                break
+
+        # FastTetris outcome
+        game.board[...] = board
+        piece = Tetromino(type_index, grid_position=position)
+        piece.shape = SHAPE_STATES[type_index][state]
+        game.live_tetromino = piece
+        game.rotate_tetromino(clockwise=clockwise)
+        got = (filled(piece.shape), piece.grid_position)
+        if got != expected:
+            bad += 1
+            if bad <= 5:
+                print(f"MISMATCH case {case}: piece {type_index} {key} at {position}: "
+                      f"expected {expected[1]}, got {got[1]}", file=sys.stderr)
+    return bad, kicked
+
+
+def time_rotation(cls, repeat):
+    random.seed(0)
+    game = cls(pygame.Surface((90, 50)), True)
+    game.live_tetromino = Tetromino(7, grid_position=(4, 5))
+    start = time.perf_counter()
+    for i in range(repeat):
+        game.rotate_tetromino(clockwise=bool(i & 1))
+    return (time.perf_counter() - start) * 1e6 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check FastTetris SRS rotation against reference tables")
+    parser.add_argument("--cases", type=int, default=20000, help="Random rotation cases")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--repeat", type=int, default=20000, help="Rotations to time")
+    args = parser.parse_args()
+
+    pygame.init()
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = FastTetris(pygame.Surface((90, 50)), True)
+        table_bad = check_tables()
+        outcome_bad, kicked = check_outcomes(game, args.cases, random.Random(args.seed))
+        orig_us = time_rotation(Tetris, args.repeat)
+        fast_us = time_rotation(FastTetris, args.repeat)
+
+    print(f"Kick tables: {'OK' if not table_bad else f'{table_bad} mismatches'}")
+    print(f"Kick outcomes: {args.cases} cases ({kicked} kicked), {outcome_bad} mismatches")
+    print(f"Rotation: original {orig_us:.1f}us, SRS tables {fast_us:.1f}us ({orig_us / fast_us:.1f}x)")
+    if table_bad or outcome_bad:
+        print("MISMATCH")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
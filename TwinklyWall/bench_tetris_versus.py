@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Check split-screen versus Tetris (games/versus_tetris.py).
+
+1. Rendering: a two-board game plays random commands; after every tick
+   the VersusRenderer canvas (dirty cells only) must equal a reference
+   drawn from scratch with one pygame.draw.rect per cell, and every
+   changed pixel must lie inside the reported dirty rects.
+2. Garbage: clearing two lines on board 0 must raise one garbage row,
+   with one gap, at the bottom of board 1 in the same tick (board 1
+   ticks after board 0).
+3. Cost: per-frame render time for one and two boards. Every frame is
+   one composite pass whatever the board count, so the time grows only
+   with the cells that changed (two live pieces instead of one).
+
+Exits non-zero on any MISMATCH.
+
+Usage: python3 bench_tetris_versus.py [--ticks 2000] [--seed 1]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from games.fast_tetris import INPUT_ACTIONS
+from games.versus_tetris import GARBAGE, PREVIEW_BACKGROUND, PREVIEW_CELLS, PREVIEW_MARGIN, PREVIEW_STATE, VersusTetris
+
+COMMANDS = tuple(INPUT_ACTIONS)
+TICK_DT = 1.0 / 60
+GRAVITY_FPS = 20
+
+
+def reference(game, snapshot):
+    """The frame drawn from scratch, one rect per cell."""
+    renderer = game.renderer
+    canvas = pygame.Surface(game.screen.get_size())
+    canvas.fill((0, 0, 0))
+    renderer_screen, renderer.screen = renderer.screen, canvas
+    renderer._draw_frames()
+    renderer.screen = renderer_screen
+    size = renderer.block_size
+    palette = [tuple(color) for color in renderer.palette]
+    for (board_x, board_y, preview_x, preview_y), board in zip(game.layout, snapshot.boards):
+        for y in range(renderer.blocks_height):
+            for x in range(renderer.blocks_width):
+                rect = (board_x + x * size, board_y + (renderer.blocks_height - 1 - y) * size, size, size)
+                pygame.draw.rect(canvas, palette[board.cells[y, x]], rect)
+        preview = PREVIEW_STATE[board.next_piece].reshape(PREVIEW_CELLS, PREVIEW_CELLS)
+        for row in range(PREVIEW_CELLS):
+            for col in range(PREVIEW_CELLS):
+                value = preview[row, col] or PREVIEW_BACKGROUND
+                rect = (preview_x + PREVIEW_MARGIN + col * size, preview_y + PREVIEW_MARGIN + row * size, size, size)
+                pygame.draw.rect(canvas, palette[value], rect)
+    return pygame.surfarray.array3d(canvas)
+
+
+def check_rendering(args):
+    canvas = pygame.Surface((90, 50))
+    game = VersusTetris(canvas, True, players=2, seed=args.seed)
+    rng = random.Random(args.seed)
+    bad = 0
+    before = pygame.surfarray.array3d(canvas)
+    for tick in range(args.ticks):
+        for slot in range(2):
+            if rng.random() < 0.3:
+                game.queue_input(None, {"cmd": rng.choice(COMMANDS)}, slot)
+        game.tick(TICK_DT, GRAVITY_FPS)
+        dirty = game.take_dirty()
+        after = pygame.surfarray.array3d(canvas)
+        if not np.array_equal(after, reference(game, game.snapshot)):
+            bad += 1
+            if bad <= 5:
+                print(f"MISMATCH canvas at tick {tick}", file=sys.stderr)
+        if dirty is not None:
+            changed = np.any(after != before, axis=2)
+            for x, y, w, h in dirty:
+                changed[x:x + w, y:y + h] = False
+            if changed.any():
+                bad += 1
+                if bad <= 5:
+                    print(f"MISMATCH pixels outside the dirty rects at tick {tick}", file=sys.stderr)
+        before = after
+    return bad
+
+
+def check_garbage(args):
+    game = VersusTetris(pygame.Surface((90, 50)), True, players=2, seed=args.seed)
+    game.renderer = None
+    sender, receiver = game.boards
+    # Two full bottom rows, as if the last lock had filled them
+    sender.board[:2] = 1
+    sender._lock_rows = (0, 2)
+    # Board 0 clears both rows and sends one garbage row; board 1 ticks next and takes it
+    game.tick(TICK_DT, GRAVITY_FPS)
+    bottom = receiver.board[0]
+    ok = (game.garbage_sent[0] == 1 and sender.lines_cleared == 2 and game.pending_garbage[1] == 0
+          and np.count_nonzero(bottom == GARBAGE) == receiver.blocks_width - 1
+          and np.count_nonzero(bottom) == receiver.blocks_width - 1 and not receiver.board[1].any())
+    summary = (f"Garbage: board 0 cleared {sender.lines_cleared} lines, sent {game.garbage_sent[0]} row(s); "
+               f"board 1 bottom row {bottom.tolist()}")
+    return ok, summary
+
+
+def time_render(players, args):
+    canvas = pygame.Surface((90, 50))
+    game = VersusTetris(canvas, True, players=players, seed=args.seed)
+    renderer = game.renderer
+    game.renderer = None
+    rng = random.Random(args.seed)
+    elapsed = 0.0
+    frames = 0
+    for tick in range(args.ticks):
+        for slot in range(players):
+            if rng.random() < 0.3:
+                game.queue_input(None, {"cmd": rng.choice(COMMANDS)}, slot)
+        game.tick(TICK_DT, GRAVITY_FPS)
+        if tick % 3 == 0:  # run_tetris renders every third tick
+            start = time.perf_counter()
+            renderer.draw(game.snapshot)
+            renderer.take_dirty()
+            elapsed += time.perf_counter() - start
+            frames += 1
+    return elapsed / frames * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check split-screen versus Tetris")
+    parser.add_argument("--ticks", type=int, default=2000, help="Ticks per check")
+    parser.add_argument("--seed", type=int, default=1, help="Game and input seed")
+    args = parser.parse_args()
+
+    pygame.init()
+    with contextlib.redirect_stdout(io.StringIO()):  # Tetris prints on every lock-down tick
+        bad = check_rendering(args)
+        garbage_ok, garbage = check_garbage(args)
+        one = time_render(1, args)
+        two = time_render(2, args)
+    print(f"Rendering: {args.ticks} ticks against a from-scratch reference, {bad} mismatches")
+    print(garbage)
+    print(f"Render per frame: 1 board {one:.1f}us, 2 boards {two:.1f}us")
+    if not garbage_ok:
+        print("MISMATCH: garbage did not reach board 1 as expected")
+    if bad or not garbage_ok:
+        sys.exit(1)
+    print("OK: composite matches the reference, garbage exchanged")
+
+
+if __name__ == "__main__":
+    main()
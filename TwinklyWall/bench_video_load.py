@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Startup timing for rendered-video playback.
+
+Writes a synthetic clip as a compressed .npz (the old render format) and
+converts it to a memory-mapped .twv with rendered_video.convert_npz. Times
+VideoPlayer.load() plus the first frame for each format, checks that every
+frame matches, and reports the peak memory each load allocates.
+
+Usage: python3 bench_video_load.py [--frames 2000]
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from rendered_video import convert_npz
+from video_player import VideoPlayer
+
+
+def time_first_frame(player, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    clip = player.load(path)
+    first = np.array(clip["frames"][0])
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return clip, first, elapsed * 1000, peak / (1024 * 1024)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Time .npz vs .twv render startup")
+    p.add_argument("--frames", type=int, default=2000)
+    p.add_argument("--width", type=int, default=90)
+    p.add_argument("--height", type=int, default=50)
+    args = p.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Smooth-ish content so compression behaves like real footage
+    base = rng.integers(0, 256, size=(args.height, args.width, 3), dtype=np.uint8)
+    frames = np.stack([np.roll(base, i, axis=1) for i in range(args.frames)])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        npz_path = Path(tmp) / "clip.npz"
+        np.savez_compressed(npz_path, frames=frames, fps=20.0, width=args.width, height=args.height)
+        player = VideoPlayer(matrix=None, base_dir=tmp)
+        # Time the .npz before converting: once a .twv sibling exists, load() prefers it
+        npz_clip, npz_first, npz_ms, npz_mb = time_first_frame(player, npz_path)
+        twv_path = convert_npz(npz_path)
+        twv_path_resolved = player._resolve_path(npz_path)
+        twv_clip, twv_first, twv_ms, twv_mb = time_first_frame(player, twv_path)
+
+        if twv_path_resolved != twv_path:
+            print(f"MISMATCH: .npz name resolved to {twv_path_resolved}, expected the converted {twv_path}")
+            raise SystemExit(1)
+        if twv_clip["fps"] != npz_clip["fps"] or not np.array_equal(np.asarray(twv_clip["frames"]), frames):
+            print("MISMATCH: .twv frames/fps differ from the .npz render")
+            raise SystemExit(1)
+        npz_size = npz_path.stat().st_size / (1024 * 1024)
+        twv_size = twv_path.stat().st_size / (1024 * 1024)
+        del twv_clip, npz_clip
+
+    print(f"{args.frames} frames of {args.width}x{args.height}: contents identical")
+    print(f"  .npz load + first frame: {npz_ms:9.2f} ms, peak alloc {npz_mb:7.1f} MB, file {npz_size:6.1f} MB")
+    print(f"  .twv load + first frame: {twv_ms:9.2f} ms, peak alloc {twv_mb:7.1f} MB, file {twv_size:6.1f} MB")
+    print(f"  speedup: {npz_ms / max(1e-9, twv_ms):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 import argparse
+import heapq
 import os
+import selectors
 import socket
 import struct
 import sys
@@ -15,6 +17,9 @@ except Exception:
 
 # Local module to write to FPP Pixel Overlay mmap
 from dotmatrix.fpp_output import FPPOutput
+from ddp_receiver import BACKENDS as RECV_BACKENDS, make_receiver
+
+LOOP_MODES = ("poll", "event")
 
 
 def parse_args():
@@ -28,6 +33,9 @@ def parse_args():
     p.add_argument("--max-fps", type=float, default=float(os.environ.get("DDP_MAX_FPS", 20)), help="Maximum write FPS to FPP (0 disables pacing)")
     p.add_argument("--frame-timeout-ms", type=float, default=float(os.environ.get("DDP_FRAME_TIMEOUT_MS", 100.0)), help="Timeout for assembling a frame before discarding (ms)")
     p.add_argument("--batch-limit", type=int, default=int(os.environ.get("DDP_BATCH_LIMIT", 200)), help="Max packets to process per loop iteration")
+    p.add_argument("--loop", choices=LOOP_MODES, default=os.environ.get("DDP_LOOP", "poll"), help="Main loop: 'poll' (non-blocking + short sleeps) or 'event' (selector + deadline timers)")
+    p.add_argument("--output-ring", default=os.environ.get("DDP_OUTPUT_RING") or None, help="Publish frames to this shared-memory ring for output_service.py instead of writing the FPP mmap")
+    p.add_argument("--recv-backend", choices=RECV_BACKENDS, default=os.environ.get("DDP_RECV_BACKEND", "auto"), help="UDP receive backend (auto picks recvmmsg when available, else ring)")
     # Default duration disabled (0) so debug runs don't auto-exit unless explicitly set
     p.add_argument("--duration-sec", type=float, default=float(os.environ.get("DDP_DURATION_SEC", 0)), help="Run duration in seconds (auto-exit and print summary; 0 disables)")
     p.add_argument("--compact", action="store_true", help="Compact logs: print only per-second stats and final summary")
@@ -35,14 +43,95 @@ def parse_args():
     return p.parse_args()
 
 
+class _DeadlineQueue:
+    """Named one-shot deadlines kept on a single heap.
+
+    Rescheduling a name replaces its previous deadline; stale heap entries are
+    skipped lazily when peeking.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._deadlines = {}
+
+    def schedule(self, name, deadline):
+        self._deadlines[name] = deadline
+        heapq.heappush(self._heap, (deadline, name))
+
+    def schedule_earliest(self, name, deadline):
+        """Schedule name unless it is already due at or before deadline."""
+        current = self._deadlines.get(name)
+        if current is None or deadline < current:
+            self.schedule(name, deadline)
+
+    def is_scheduled(self, name):
+        return name in self._deadlines
+
+    def next_deadline(self):
+        heap = self._heap
+        while heap and self._deadlines.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now):
+        due = []
+        while True:
+            deadline = self.next_deadline()
+            if deadline is None or deadline > now:
+                return due
+            _, name = heapq.heappop(self._heap)
+            del self._deadlines[name]
+            due.append(name)
+
+
+class FramePool:
+    """Fixed-size free list of frame assembly states.
+
+    Buffers are recycled across (sender, seq) keys instead of allocating two
+    full-frame arrays per frame. When the free list is empty a fresh state is
+    created; released states beyond ``capacity`` are left to the GC.
+    """
+
+    def __init__(self, factory, capacity):
+        self._factory = factory
+        self.capacity = int(capacity)
+        self._free = [factory() for _ in range(self.capacity)]
+        for fs in self._free:
+            fs.pooled = True
+        self.allocated = self.capacity
+        self.reused = 0
+
+    def acquire(self, sender, seq):
+        if self._free:
+            fs = self._free.pop()
+            fs.reset(sender, seq)
+            self.reused += 1
+        else:
+            fs = self._factory()
+            fs.reset(sender, seq)
+            self.allocated += 1
+        fs.pooled = False
+        return fs
+
+    def release(self, fs):
+        if fs.pooled:
+            return
+        fs.pooled = True
+        if len(self._free) < self.capacity:
+            self._free.append(fs)
+
+
 class DdpBridge:
-    def __init__(self, host, port, width, height, model_name, max_fps=30.0, frame_timeout_ms=50.0, batch_limit=200, duration_sec=None, compact=False, verbose=False):
+    def __init__(self, host, port, width, height, model_name, max_fps=30.0, frame_timeout_ms=50.0, batch_limit=200, duration_sec=None, compact=False, verbose=False, recv_backend="auto", loop_mode="poll", output_ring=None):
         self.addr = (host, port)
         self.width = width
         self.height = height
         self.frame_size = width * height * 3
         self.verbose = verbose
         self.max_fps = float(max(0.0, max_fps or 0.0))
+        if loop_mode not in LOOP_MODES:
+            raise ValueError(f"Unknown loop mode '{loop_mode}' (choose from {', '.join(LOOP_MODES)})")
+        self.loop_mode = loop_mode
         # Use perf_counter for scheduling precision
         self._clock = time.perf_counter
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -56,14 +145,22 @@ class DdpBridge:
         self.sock.bind(self.addr)
         # Make non-blocking to batch-process packets
         self.sock.setblocking(False)
-        # Use FPPOutput to target overlay mmap
+        # Receive into a preallocated packet ring (batched via recvmmsg when available)
+        self.receiver = make_receiver(self.sock, recv_backend, slots=min(max(1, int(batch_limit)), 64))
+        self._syscalls_mark = 0
+        # Use FPPOutput to target overlay mmap, or hand frames to the output service through a ring
         mmap_path = f"/dev/shm/FPP-Model-Data-{model_name.replace(' ', '_')}"
-        self.out = FPPOutput(width, height, mapping_file=mmap_path)
+        if output_ring:
+            from dotmatrix.frame_ring import FrameRingWriter
+            self.out = FrameRingWriter(output_ring, width, height)
+        else:
+            self.out = FPPOutput(width, height, mapping_file=mmap_path)
 
         # Multi-sequence frame assembly
         self.frames_map = {}  # key: (sender, seq) -> FrameState
         self.completed_frames = deque(maxlen=50)  # queue of completed frames ready to write
         self.max_active_frames = 12
+        self.frame_pool = FramePool(lambda: self.FrameState(self.frame_size), self.max_active_frames + 4)
         self.frames_written = 0
         self.frames_dropped = 0
         self.frame_timeout_ms = float(frame_timeout_ms)
@@ -111,10 +208,33 @@ class DdpBridge:
         self._tot_loop_time = 0.0
 
     class FrameState:
-        def __init__(self, frame_size, sender, seq):
+        def __init__(self, frame_size, sender=None, seq=None):
+            self.frame_size = frame_size
             self.buf = bytearray(frame_size)
-            self.received = bytearray(frame_size)  # 0/1 per byte
+            self._buf_mv = memoryview(self.buf)
+            # Coverage bitmap: one flag per byte, counted in C per chunk
+            if HAS_NUMPY:
+                self.received = np.zeros(frame_size, dtype=np.bool_)
+            else:
+                self.received = bytearray(frame_size)  # 0/1 per byte
+                self._recv_mv = memoryview(self.received)
+                self._ones = memoryview(b"\x01" * frame_size)
             self.missing = frame_size
+            self.pooled = False
+            self.reset(sender, seq)
+
+        def reset(self, sender, seq):
+            """Reuse this state for a new (sender, seq) key.
+
+            Payload bytes are not cleared: a frame only completes once every
+            byte has been overwritten by a chunk.
+            """
+            if self.missing != self.frame_size:
+                if HAS_NUMPY:
+                    self.received.fill(False)
+                else:
+                    self._recv_mv[:] = bytes(self.frame_size)
+            self.missing = self.frame_size
             self.chunks = 0
             self.sender = sender
             self.seq = seq
@@ -125,13 +245,15 @@ class DdpBridge:
         def add_chunk(self, off, payload):
             end = off + len(payload)
             # Copy payload into buffer
-            mv_buf = memoryview(self.buf)
-            mv_buf[off:end] = payload
+            self._buf_mv[off:end] = payload
             # Mark newly received bytes and update missing count
-            mv_recv = memoryview(self.received)
-            segment = mv_recv[off:end]
-            newly_covered = len(segment) - sum(segment)  # count zeros
-            segment[:] = b"\x01" * len(segment)
+            if HAS_NUMPY:
+                segment = self.received[off:end]
+                newly_covered = (end - off) - int(np.count_nonzero(segment))
+                segment[:] = True
+            else:
+                newly_covered = self.received.count(0, off, end)
+                self._recv_mv[off:end] = self._ones[:end - off]
             self.missing -= newly_covered
             self.chunks += 1
             self.last_update_ts = time.time()
@@ -152,186 +274,30 @@ class DdpBridge:
         run_start = time.time()
         pacing = f"pacing at <= {self.max_fps:.1f} FPS" if self.max_fps > 0.0 else "no pacing"
         self._log(f"DDP bridge listening on {self.addr[0]}:{self.addr[1]} for {self.width}x{self.height} ({pacing})")
+        self._log(f"Receive backend: {self.receiver.name} ({self.receiver.slots} slot ring), loop: {self.loop_mode}")
+        if self.out.write_mode == "ring":
+            self._log(f"Output: frame ring {self.out.path} (written to FPP by output_service.py)")
         self._log(f"Enhanced logging enabled - tracking packet recv, parsing, assembly, pacing, conversion, and mmap writes")
-        current_sender = None
-        
+
+        if self.loop_mode == "event":
+            self._run_event()
+        else:
+            self._run_poll(run_start)
+        self._print_summary(run_start)
+
+    def _run_poll(self, run_start):
+        """Non-blocking polling loop: drain, sweep, sleep until the write slot, write."""
         while True:
             loop_start = time.perf_counter()
-            
+
             # Batch-process all available packets
-            packets_this_loop = 0
-            while packets_this_loop < self.batch_limit:  # Tunable packet batch size
-                try:
-                    recv_start = time.perf_counter()
-                    data, sender = self.sock.recvfrom(1500)
-                    recv_elapsed = time.perf_counter() - recv_start
-                    self._packet_recv_time_acc += recv_elapsed
-                    
-                    packets_this_loop += 1
-                    self._sec_packets += 1
-                    self._bytes_received += len(data)
-                    self._packet_sizes.append(len(data))
-                except BlockingIOError:
-                    # No more packets available right now
-                    break
-                except Exception as e:
-                    self._log(f"Socket error: {e}")
-                    continue
-                
-                parse_start = time.perf_counter()
-                if not data or data[0] != 0x41:
-                    continue
-
-                parse_start = time.perf_counter()
-                if not data or data[0] != 0x41:
-                    continue
-
-                # DDP v1 header (10 bytes): 'A' flags seq off24 len16 dataId16
-                if len(data) < 10:
-                    continue
-                flags = data[1]
-                seq = data[2]
-                off = (data[3] << 16) | (data[4] << 8) | data[5]
-                ln = (data[6] << 8) | data[7]
-                # dataId = data[8:10] (unused)
-                payload = data[10:10+ln]
-
-                if len(payload) != ln:
-                    continue
-                
-                parse_elapsed = time.perf_counter() - parse_start
-                self._packet_parse_time_acc += parse_elapsed
-                
-                assembly_start = time.perf_counter()
-
-                # Multi-frame assembly by (sender, seq)
-                key = (sender, seq)
-                if key not in self.frames_map:
-                    # Limit number of active frames to avoid memory growth
-                    if len(self.frames_map) >= self.max_active_frames:
-                        # Drop the oldest incomplete frame
-                        oldest_key = min(self.frames_map.items(), key=lambda kv: kv[1].start_ts)[0]
-                        of = self.frames_map.pop(oldest_key)
-                        self._log(f"[FRAME RESET] Dropped oldest incomplete frame seq={of.seq} from {of.sender}")
-                        self._sec_incomplete += 1
-                    self.frames_map[key] = self.FrameState(self.frame_size, sender, seq)
-                    if off == 0:
-                        self._log(f"[FRAME START] New frame from {sender}, seq={seq}")
-
-                frame = self.frames_map[key]
-
-                # Bounds check
-                end = off + ln
-                if end > self.frame_size:
-                    self._log(f"[ERROR] Packet overflow: offset={off} len={ln} end={end} > frame_size={self.frame_size}")
-                    continue
-
-                frame.add_chunk(off, payload)
-                end_of_frame = (flags & 0x01) != 0
-                if end_of_frame:
-                    frame.saw_eof = True
-                
-                assembly_elapsed = time.perf_counter() - assembly_start
-                self._frame_assembly_time_acc += assembly_elapsed
-                
-                self._log(f"[CHUNK] off={off} len={ln} bytes_so_far={self.frame_size - frame.missing}/{self.frame_size} chunks={frame.chunks} eof={end_of_frame}")
-
-                # If complete, enqueue for writing and remove from active map
-                if frame.complete():
-                    self._log(f"[FRAME COMPLETE] Ready to write: {self.frame_size} bytes in {frame.chunks} chunks")
-                    self._frame_chunk_counts.append(frame.chunks)
-                    self.completed_frames.append(frame)
-                    self.frames_map.pop(key, None)
-                    self._sec_frames_in += 1
-                    sec_elapsed = time.time() - self._sec_start
-                    if sec_elapsed >= 1.0:
-                        avg_write_ms = (self.write_ms_acc / max(1, self._sec_frames_out))
-                        
-                        # Calculate detailed timing breakdown
-                        avg_recv_ms = (self._packet_recv_time_acc / max(1, self._sec_packets)) * 1000.0
-                        avg_parse_ms = (self._packet_parse_time_acc / max(1, self._sec_packets)) * 1000.0
-                        avg_assembly_ms = (self._frame_assembly_time_acc / max(1, self._sec_packets)) * 1000.0
-                        avg_pacing_ms = (self._pacing_sleep_time_acc / max(1, self._sec_frames_out)) * 1000.0
-                        avg_numpy_ms = (self._numpy_convert_time_acc / max(1, self._sec_frames_out)) * 1000.0
-                        avg_mmap_ms = (self._mmap_write_time_acc / max(1, self._sec_frames_out)) * 1000.0
-                        avg_loop_ms = (self._total_loop_time_acc / max(1, self._timing_samples)) * 1000.0
-                        
-                        # Bandwidth calculation
-                        bandwidth_mbps = (self._bytes_received * 8 / (1024 * 1024)) / sec_elapsed
-                        self._bytes_per_sec = int(self._bytes_received / sec_elapsed)
-                        
-                        # Packet and chunk statistics
-                        avg_packet_size = sum(self._packet_sizes) / max(1, len(self._packet_sizes))
-                        avg_chunks_per_frame = sum(self._frame_chunk_counts) / max(1, len(self._frame_chunk_counts))
-                        
-                        # Min/max write times
-                        min_write = min(self._write_times) if self._write_times else 0
-                        max_write = max(self._write_times) if self._write_times else 0
-                        
-                        self._log(
-                            f"[1s STATS] in={self._sec_frames_in} fps | out={self._sec_frames_out} fps | "
-                            f"drop={self._sec_dropped} | incomplete={self._sec_incomplete} | pkts={self._sec_packets}"
-                        )
-                        self._log(
-                            f"[TIMING] recv={avg_recv_ms:.3f}ms parse={avg_parse_ms:.3f}ms assembly={avg_assembly_ms:.3f}ms | "
-                            f"pacing={avg_pacing_ms:.2f}ms numpy={avg_numpy_ms:.2f}ms mmap={avg_mmap_ms:.2f}ms | "
-                            f"write_avg={avg_write_ms:.2f}ms write_min={min_write:.2f}ms write_max={max_write:.2f}ms"
-                        )
-                        self._log(
-                            f"[NETWORK] bandwidth={bandwidth_mbps:.2f} Mbps | bytes/sec={self._bytes_per_sec:,} | "
-                            f"avg_pkt_size={avg_packet_size:.1f} | avg_chunks/frame={avg_chunks_per_frame:.1f}"
-                        )
-                        self._log("="*100)
-
-                        # Accumulate totals for final summary
-                        self._tot_frames_in += self._sec_frames_in
-                        self._tot_frames_out += self._sec_frames_out
-                        self._tot_dropped += self._sec_dropped
-                        self._tot_incomplete += self._sec_incomplete
-                        self._tot_packets += self._sec_packets
-                        self._tot_bytes_received += self._bytes_received
-                        self._tot_write_ms += self.write_ms_acc
-                        self._tot_packet_recv_time += self._packet_recv_time_acc
-                        self._tot_packet_parse_time += self._packet_parse_time_acc
-                        self._tot_frame_assembly_time += self._frame_assembly_time_acc
-                        self._tot_pacing_sleep_time += self._pacing_sleep_time_acc
-                        self._tot_numpy_convert_time += self._numpy_convert_time_acc
-                        self._tot_mmap_write_time += self._mmap_write_time_acc
-                        self._tot_loop_time += self._total_loop_time_acc
-                        
-                        # Reset counters
-                        self._sec_start = time.time()
-                        self._sec_frames_in = 0
-                        self._sec_frames_out = 0
-                        self._sec_dropped = 0
-                        self._sec_incomplete = 0
-                        self._sec_packets = 0
-                        self.write_ms_acc = 0.0
-                        self._packet_recv_time_acc = 0.0
-                        self._packet_parse_time_acc = 0.0
-                        self._frame_assembly_time_acc = 0.0
-                        self._pacing_sleep_time_acc = 0.0
-                        self._numpy_convert_time_acc = 0.0
-                        self._mmap_write_time_acc = 0.0
-                        self._total_loop_time_acc = 0.0
-                        self._timing_samples = 0
-                        self._bytes_received = 0
-            
+            packets_this_loop = self._drain_socket()
+
             # Drop timed-out incomplete frames
-            now = time.time()
-            to_remove = []
-            for k, fr in self.frames_map.items():
-                age_ms = (now - fr.start_ts) * 1000.0
-                if age_ms > self.frame_timeout_ms:
-                    self._log(f"[TIMEOUT] Frame timeout seq={fr.seq} after {age_ms:.1f}ms with {self.frame_size - fr.missing}/{self.frame_size} bytes, {fr.chunks} chunks")
-                    to_remove.append(k)
-                    self._sec_incomplete += 1
-            for k in to_remove:
-                self.frames_map.pop(k, None)
+            self._expire_frames()
 
             # Pacing and write latest completed frame at target FPS
             pacing_start = time.perf_counter()
-            wrote = False
             if self.max_fps > 0.0:
                 min_interval_s = 1.0 / self.max_fps
                 now_perf = self._clock()
@@ -344,67 +310,14 @@ class DdpBridge:
                         self._log(f"[PACING] Sleeping {remaining_s*1000:.2f}ms (since_last={since_last_s*1000:.2f}ms, min_interval={min_interval_s*1000:.2f}ms)")
                         time.sleep(remaining_s)
 
-            if self.completed_frames:
-                # Prefer the latest frame to minimize latency
-                latest = self.completed_frames.pop()
-                # Drop older queued frames silently
-                if self.completed_frames:
-                    self.frames_dropped += len(self.completed_frames)
-                    self._sec_dropped += len(self.completed_frames)
-                    self.completed_frames.clear()
-
-                try:
-                    numpy_start = time.perf_counter()
-                    if HAS_NUMPY:
-                        arr = np.frombuffer(latest.buf, dtype=np.uint8).reshape(self.height, self.width, 3)
-                        numpy_elapsed = time.perf_counter() - numpy_start
-                        self._numpy_convert_time_acc += numpy_elapsed
-
-                        mmap_start = time.perf_counter()
-                        ms = self.out.write(arr)
-                        mmap_elapsed = time.perf_counter() - mmap_start
-                        self._mmap_write_time_acc += mmap_elapsed
-
-                        self._log(f"[WRITE NUMPY] numpy_convert={numpy_elapsed*1000:.2f}ms mmap_write={mmap_elapsed*1000:.2f}ms total={ms:.2f}ms")
-                    else:
-                        rows = self.height
-                        cols = self.width
-                        view = [
-                            [
-                                (latest.buf[(r*cols + c)*3 + 0],
-                                 latest.buf[(r*cols + c)*3 + 1],
-                                 latest.buf[(r*cols + c)*3 + 2])
-                                for c in range(cols)
-                            ]
-                            for r in range(rows)
-                        ]
-                        numpy_elapsed = time.perf_counter() - numpy_start
-                        self._numpy_convert_time_acc += numpy_elapsed
-
-                        mmap_start = time.perf_counter()
-                        ms = self.out.write(view)
-                        mmap_elapsed = time.perf_counter() - mmap_start
-                        self._mmap_write_time_acc += mmap_elapsed
-
-                        self._log(f"[WRITE FALLBACK] list_convert={numpy_elapsed*1000:.2f}ms mmap_write={mmap_elapsed*1000:.2f}ms total={ms:.2f}ms")
-
-                    write_elapsed = (time.perf_counter() - numpy_start)
-                    self.write_ms_acc += write_elapsed * 1000.0
-                    self._write_times.append(write_elapsed * 1000.0)
-                    self._timing_samples += 1
-                    self.frames_written += 1
-                    self._sec_frames_out += 1
-                    self.last_write_ts = self._clock()
-                    wrote = True
-                except Exception as e:
-                    self._log(f"[WRITE ERROR] {e}")
+            wrote = self._write_latest()
 
             pacing_elapsed = time.perf_counter() - pacing_start
             self._pacing_sleep_time_acc += pacing_elapsed
 
             loop_elapsed = time.perf_counter() - loop_start
             self._total_loop_time_acc += loop_elapsed
-            
+
             # Sleep briefly when no packets to avoid CPU spinning
             if packets_this_loop == 0 and not wrote:
                 time.sleep(0.0001)  # 0.1ms
@@ -413,6 +326,317 @@ class DdpBridge:
             if self.duration_sec and (time.time() - run_start) >= self.duration_sec:
                 break
 
+    def _run_event(self):
+        """Selector-driven loop.
+
+        Socket readiness wakes the loop; the frame-timeout sweep, the paced
+        write slot and the run duration are deadlines on one queue, so the
+        bridge blocks in select() when idle and keeps draining packets while it
+        waits for the next write slot.
+        """
+        clock = self._clock
+        timers = _DeadlineQueue()
+        min_interval_s = 1.0 / self.max_fps if self.max_fps > 0.0 else 0.0
+        frame_timeout_s = self.frame_timeout_ms / 1000.0
+        write_pending_since = None
+        if self.duration_sec:
+            timers.schedule("stop", clock() + self.duration_sec)
+
+        sel = selectors.DefaultSelector()
+        sel.register(self.sock, selectors.EVENT_READ)
+        try:
+            while True:
+                now = clock()
+                deadline = timers.next_deadline()
+                timeout = None if deadline is None else max(0.0, deadline - now)
+                ready = sel.select(timeout)
+
+                loop_start = clock()
+                if ready:
+                    self._drain_socket()
+                    if self.frames_map and not timers.is_scheduled("sweep"):
+                        oldest = min(fr.start_ts for fr in self.frames_map.values())
+                        wait_s = max(0.0, oldest + frame_timeout_s - time.time())
+                        timers.schedule("sweep", loop_start + wait_s)
+                    if self.completed_frames and not timers.is_scheduled("write"):
+                        write_pending_since = loop_start
+                        timers.schedule("write", max(loop_start, self.last_write_ts + min_interval_s))
+
+                for name in timers.pop_due(clock()):
+                    if name == "stop":
+                        return
+                    if name == "sweep":
+                        self._expire_frames()
+                        if self.frames_map:
+                            oldest = min(fr.start_ts for fr in self.frames_map.values())
+                            wait_s = max(0.0, oldest + frame_timeout_s - time.time())
+                            timers.schedule("sweep", clock() + wait_s)
+                    elif name == "write":
+                        if write_pending_since is not None:
+                            self._pacing_sleep_time_acc += clock() - write_pending_since
+                            write_pending_since = None
+                        self._write_latest()
+
+                self._total_loop_time_acc += clock() - loop_start
+        finally:
+            sel.unregister(self.sock)
+            sel.close()
+
+    def _drain_socket(self):
+        """Receive and assemble up to batch_limit packets. Returns the packet count."""
+        receiver = self.receiver
+        packets_this_loop = 0
+        while packets_this_loop < self.batch_limit:
+            recv_start = time.perf_counter()
+            try:
+                count = receiver.recv_batch(self.batch_limit - packets_this_loop)
+            except Exception as e:
+                self._log(f"Socket error: {e}")
+                break
+            self._packet_recv_time_acc += time.perf_counter() - recv_start
+            if count == 0:
+                # No more packets available right now
+                break
+
+            packets = receiver.packets
+            lengths = receiver.lengths
+            senders = receiver.senders
+            for i in range(count):
+                n = lengths[i]
+                self._sec_packets += 1
+                self._bytes_received += n
+                self._packet_sizes.append(n)
+                self._handle_packet(packets[i], n, senders[i])
+            packets_this_loop += count
+        return packets_this_loop
+
+    def _handle_packet(self, data, n, sender):
+        """Parse one DDP datagram in place and feed it into frame assembly.
+
+        ``data`` may be a memoryview slot of the receive ring; only the first
+        ``n`` bytes are valid and the payload must be consumed before the next
+        receive call.
+        """
+        parse_start = time.perf_counter()
+        # DDP v1 header (10 bytes): 'A' flags seq off24 len16 dataId16
+        if n < 10 or data[0] != 0x41:
+            return
+        flags = data[1]
+        seq = data[2]
+        off = (data[3] << 16) | (data[4] << 8) | data[5]
+        ln = (data[6] << 8) | data[7]
+        # dataId = data[8:10] (unused)
+        if 10 + ln > n:
+            return
+        payload = data[10:10+ln]
+
+        parse_elapsed = time.perf_counter() - parse_start
+        self._packet_parse_time_acc += parse_elapsed
+
+        assembly_start = time.perf_counter()
+
+        # Multi-frame assembly by (sender, seq)
+        key = (sender, seq)
+        frame = self.frames_map.get(key)
+        if frame is None:
+            # Limit number of active frames to avoid memory growth
+            if len(self.frames_map) >= self.max_active_frames:
+                # Drop the oldest incomplete frame
+                oldest_key = min(self.frames_map.items(), key=lambda kv: kv[1].start_ts)[0]
+                of = self.frames_map.pop(oldest_key)
+                self._log(f"[FRAME RESET] Dropped oldest incomplete frame seq={of.seq} from {of.sender}")
+                self._sec_incomplete += 1
+                self.frame_pool.release(of)
+            frame = self.frame_pool.acquire(sender, seq)
+            self.frames_map[key] = frame
+            if off == 0:
+                self._log(f"[FRAME START] New frame from {sender}, seq={seq}")
+
+        # Bounds check
+        end = off + ln
+        if end > self.frame_size:
+            self._log(f"[ERROR] Packet overflow: offset={off} len={ln} end={end} > frame_size={self.frame_size}")
+            return
+
+        frame.add_chunk(off, payload)
+        end_of_frame = (flags & 0x01) != 0
+        if end_of_frame:
+            frame.saw_eof = True
+
+        assembly_elapsed = time.perf_counter() - assembly_start
+        self._frame_assembly_time_acc += assembly_elapsed
+
+        if self.verbose and not self.compact:
+            self._log(f"[CHUNK] off={off} len={ln} bytes_so_far={self.frame_size - frame.missing}/{self.frame_size} chunks={frame.chunks} eof={end_of_frame}")
+
+        # If complete, enqueue for writing and remove from active map
+        if frame.complete():
+            self._log(f"[FRAME COMPLETE] Ready to write: {self.frame_size} bytes in {frame.chunks} chunks")
+            self._frame_chunk_counts.append(frame.chunks)
+            if len(self.completed_frames) == self.completed_frames.maxlen:
+                self.frame_pool.release(self.completed_frames.popleft())
+            self.completed_frames.append(frame)
+            self.frames_map.pop(key, None)
+            self._sec_frames_in += 1
+            if time.time() - self._sec_start >= 1.0:
+                self._report_stats()
+
+    def _expire_frames(self):
+        """Drop incomplete frames older than frame_timeout_ms."""
+        now = time.time()
+        to_remove = []
+        for k, fr in self.frames_map.items():
+            age_ms = (now - fr.start_ts) * 1000.0
+            if age_ms > self.frame_timeout_ms:
+                self._log(f"[TIMEOUT] Frame timeout seq={fr.seq} after {age_ms:.1f}ms with {self.frame_size - fr.missing}/{self.frame_size} bytes, {fr.chunks} chunks")
+                to_remove.append(k)
+                self._sec_incomplete += 1
+        for k in to_remove:
+            self.frame_pool.release(self.frames_map.pop(k))
+
+    def _write_latest(self):
+        """Write the newest completed frame to FPP, dropping older ones. Returns True if written."""
+        if not self.completed_frames:
+            return False
+        # Prefer the latest frame to minimize latency
+        latest = self.completed_frames.pop()
+        # Drop older queued frames silently
+        if self.completed_frames:
+            self.frames_dropped += len(self.completed_frames)
+            self._sec_dropped += len(self.completed_frames)
+            for fr in self.completed_frames:
+                self.frame_pool.release(fr)
+            self.completed_frames.clear()
+
+        try:
+            numpy_start = time.perf_counter()
+            if HAS_NUMPY:
+                arr = np.frombuffer(latest.buf, dtype=np.uint8).reshape(self.height, self.width, 3)
+                numpy_elapsed = time.perf_counter() - numpy_start
+                self._numpy_convert_time_acc += numpy_elapsed
+
+                mmap_start = time.perf_counter()
+                ms = self.out.write(arr)
+                mmap_elapsed = time.perf_counter() - mmap_start
+                self._mmap_write_time_acc += mmap_elapsed
+
+                self._log(f"[WRITE NUMPY] numpy_convert={numpy_elapsed*1000:.2f}ms mmap_write={mmap_elapsed*1000:.2f}ms total={ms:.2f}ms")
+            else:
+                rows = self.height
+                cols = self.width
+                view = [
+                    [
+                        (latest.buf[(r*cols + c)*3 + 0],
+                         latest.buf[(r*cols + c)*3 + 1],
+                         latest.buf[(r*cols + c)*3 + 2])
+                        for c in range(cols)
+                    ]
+                    for r in range(rows)
+                ]
+                numpy_elapsed = time.perf_counter() - numpy_start
+                self._numpy_convert_time_acc += numpy_elapsed
+
+                mmap_start = time.perf_counter()
+                ms = self.out.write(view)
+                mmap_elapsed = time.perf_counter() - mmap_start
+                self._mmap_write_time_acc += mmap_elapsed
+
+                self._log(f"[WRITE FALLBACK] list_convert={numpy_elapsed*1000:.2f}ms mmap_write={mmap_elapsed*1000:.2f}ms total={ms:.2f}ms")
+
+            write_elapsed = (time.perf_counter() - numpy_start)
+            self.write_ms_acc += write_elapsed * 1000.0
+            self._write_times.append(write_elapsed * 1000.0)
+            self._timing_samples += 1
+            self.frames_written += 1
+            self._sec_frames_out += 1
+            self.last_write_ts = self._clock()
+            return True
+        except Exception as e:
+            self._log(f"[WRITE ERROR] {e}")
+            return False
+        finally:
+            # out.write() has already copied the pixels out of the frame buffer
+            self.frame_pool.release(latest)
+
+    def _report_stats(self):
+        """Log the per-second stats block and roll counters into run totals."""
+        sec_elapsed = time.time() - self._sec_start
+        avg_write_ms = (self.write_ms_acc / max(1, self._sec_frames_out))
+
+        # Calculate detailed timing breakdown
+        avg_recv_ms = (self._packet_recv_time_acc / max(1, self._sec_packets)) * 1000.0
+        avg_parse_ms = (self._packet_parse_time_acc / max(1, self._sec_packets)) * 1000.0
+        avg_assembly_ms = (self._frame_assembly_time_acc / max(1, self._sec_packets)) * 1000.0
+        avg_pacing_ms = (self._pacing_sleep_time_acc / max(1, self._sec_frames_out)) * 1000.0
+        avg_numpy_ms = (self._numpy_convert_time_acc / max(1, self._sec_frames_out)) * 1000.0
+        avg_mmap_ms = (self._mmap_write_time_acc / max(1, self._sec_frames_out)) * 1000.0
+
+        # Bandwidth calculation
+        bandwidth_mbps = (self._bytes_received * 8 / (1024 * 1024)) / sec_elapsed
+        self._bytes_per_sec = int(self._bytes_received / sec_elapsed)
+
+        # Packet and chunk statistics
+        avg_packet_size = sum(self._packet_sizes) / max(1, len(self._packet_sizes))
+        avg_chunks_per_frame = sum(self._frame_chunk_counts) / max(1, len(self._frame_chunk_counts))
+        sec_syscalls = self.receiver.syscalls - self._syscalls_mark
+        pkts_per_syscall = self._sec_packets / max(1, sec_syscalls)
+
+        # Min/max write times
+        min_write = min(self._write_times) if self._write_times else 0
+        max_write = max(self._write_times) if self._write_times else 0
+
+        self._log(
+            f"[1s STATS] in={self._sec_frames_in} fps | out={self._sec_frames_out} fps | "
+            f"drop={self._sec_dropped} | incomplete={self._sec_incomplete} | pkts={self._sec_packets}"
+        )
+        self._log(
+            f"[TIMING] recv={avg_recv_ms:.3f}ms parse={avg_parse_ms:.3f}ms assembly={avg_assembly_ms:.3f}ms | "
+            f"pacing={avg_pacing_ms:.2f}ms numpy={avg_numpy_ms:.2f}ms mmap={avg_mmap_ms:.2f}ms | "
+            f"write_avg={avg_write_ms:.2f}ms write_min={min_write:.2f}ms write_max={max_write:.2f}ms"
+        )
+        self._log(
+            f"[NETWORK] bandwidth={bandwidth_mbps:.2f} Mbps | bytes/sec={self._bytes_per_sec:,} | "
+            f"avg_pkt_size={avg_packet_size:.1f} | avg_chunks/frame={avg_chunks_per_frame:.1f} | "
+            f"backend={self.receiver.name} pkts/syscall={pkts_per_syscall:.2f}"
+        )
+        self._log("="*100)
+
+        # Accumulate totals for final summary
+        self._tot_frames_in += self._sec_frames_in
+        self._tot_frames_out += self._sec_frames_out
+        self._tot_dropped += self._sec_dropped
+        self._tot_incomplete += self._sec_incomplete
+        self._tot_packets += self._sec_packets
+        self._tot_bytes_received += self._bytes_received
+        self._tot_write_ms += self.write_ms_acc
+        self._tot_packet_recv_time += self._packet_recv_time_acc
+        self._tot_packet_parse_time += self._packet_parse_time_acc
+        self._tot_frame_assembly_time += self._frame_assembly_time_acc
+        self._tot_pacing_sleep_time += self._pacing_sleep_time_acc
+        self._tot_numpy_convert_time += self._numpy_convert_time_acc
+        self._tot_mmap_write_time += self._mmap_write_time_acc
+        self._tot_loop_time += self._total_loop_time_acc
+
+        # Reset counters
+        self._sec_start = time.time()
+        self._sec_frames_in = 0
+        self._sec_frames_out = 0
+        self._sec_dropped = 0
+        self._sec_incomplete = 0
+        self._sec_packets = 0
+        self._syscalls_mark = self.receiver.syscalls
+        self.write_ms_acc = 0.0
+        self._packet_recv_time_acc = 0.0
+        self._packet_parse_time_acc = 0.0
+        self._frame_assembly_time_acc = 0.0
+        self._pacing_sleep_time_acc = 0.0
+        self._numpy_convert_time_acc = 0.0
+        self._mmap_write_time_acc = 0.0
+        self._total_loop_time_acc = 0.0
+        self._timing_samples = 0
+        self._bytes_received = 0
+
+    def _print_summary(self, run_start):
         # Final summary
         total_secs = max(1.0, time.time() - run_start)
         avg_in_fps = self._tot_frames_in / total_secs
@@ -425,11 +649,12 @@ class DdpBridge:
         avg_mmap_ms = (self._tot_mmap_write_time / max(1, self._tot_frames_out)) * 1000.0
         avg_write_ms = (self._tot_write_ms / max(1, self._tot_frames_out))
         bandwidth_mbps = (self._tot_bytes_received * 8 / (1024 * 1024)) / total_secs
+        pkts_per_syscall = self._tot_packets / max(1, self._syscalls_mark)
 
         print("==================== 10s SUMMARY ====================", flush=True)
         print(f"avg_in_fps={avg_in_fps:.1f} avg_out_fps={avg_out_fps:.1f} drop={self._tot_dropped} incomplete={self._tot_incomplete} packets={self._tot_packets}", flush=True)
         print(f"timing recv={avg_recv_ms:.3f}ms parse={avg_parse_ms:.3f}ms assembly={avg_assembly_ms:.3f}ms | pacing={avg_pacing_ms:.2f}ms numpy={avg_numpy_ms:.2f}ms mmap={avg_mmap_ms:.2f}ms | write_avg={avg_write_ms:.2f}ms", flush=True)
-        print(f"network bandwidth={bandwidth_mbps:.2f} Mbps bytes={self._tot_bytes_received} duration={total_secs:.2f}s", flush=True)
+        print(f"network bandwidth={bandwidth_mbps:.2f} Mbps bytes={self._tot_bytes_received} duration={total_secs:.2f}s backend={self.receiver.name} pkts/syscall={pkts_per_syscall:.2f}", flush=True)
         if self._tot_packets == 0:
             print("hint: No DDP traffic detected on the socket. Verify sender IP/port, or try local loopback (send_ddp_test.py).", flush=True)
         print("=====================================================", flush=True)
@@ -450,6 +675,9 @@ def main():
             duration_sec=args.duration_sec,
             compact=args.compact,
             verbose=args.verbose,
+            recv_backend=args.recv_backend,
+            loop_mode=args.loop,
+            output_ring=args.output_ring,
         )
         bridge.run()
     except KeyboardInterrupt:
@@ -0,0 +1,207 @@
+"""Batched UDP receive backends for the DDP bridge.
+
+Every backend exposes the same ``recv_batch(limit)`` call, which returns how
+many datagrams are ready and leaves them in ``packets``/``lengths``/``senders``.
+The ring backends receive into one preallocated buffer and hand out memoryview
+slots over it, so the bridge can parse DDP headers in place without allocating
+a bytes object per packet. Slots are only valid until the next ``recv_batch``.
+
+Backends:
+- recvfrom: legacy path, one ``sock.recvfrom`` (and one bytes object) per packet
+- ring:     ``sock.recvfrom_into`` into the preallocated ring (one syscall per packet)
+- recvmmsg: Linux ``recvmmsg(2)`` via ctypes, many datagrams per syscall
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import socket
+import sys
+
+MAX_DATAGRAM = 1500
+DEFAULT_RING_SLOTS = 64
+BACKENDS = ("auto", "recvmmsg", "ring", "recvfrom")
+
+_MSG_DONTWAIT = getattr(socket, "MSG_DONTWAIT", 0x40)
+
+
+class RecvfromReceiver:
+    """Legacy receiver: one syscall and one bytes allocation per packet."""
+
+    name = "recvfrom"
+
+    def __init__(self, sock, slots=DEFAULT_RING_SLOTS, slot_size=MAX_DATAGRAM):
+        self.sock = sock
+        self.slots = max(1, int(slots))
+        self.slot_size = slot_size
+        self.packets = [b""] * self.slots
+        self.lengths = [0] * self.slots
+        self.senders = [None] * self.slots
+        self.syscalls = 0
+
+    def recv_batch(self, limit):
+        limit = min(limit, self.slots)
+        count = 0
+        while count < limit:
+            self.syscalls += 1
+            try:
+                data, sender = self.sock.recvfrom(self.slot_size)
+            except BlockingIOError:
+                break
+            self.packets[count] = data
+            self.lengths[count] = len(data)
+            self.senders[count] = sender
+            count += 1
+        return count
+
+
+class RingReceiver(RecvfromReceiver):
+    """recvfrom_into a preallocated packet ring (no per-packet payload copies)."""
+
+    name = "ring"
+
+    def __init__(self, sock, slots=DEFAULT_RING_SLOTS, slot_size=MAX_DATAGRAM):
+        super().__init__(sock, slots, slot_size)
+        self.buffer = bytearray(self.slots * slot_size)
+        mv = memoryview(self.buffer)
+        self.packets = [mv[i * slot_size:(i + 1) * slot_size] for i in range(self.slots)]
+
+    def recv_batch(self, limit):
+        limit = min(limit, self.slots)
+        count = 0
+        while count < limit:
+            self.syscalls += 1
+            try:
+                n, sender = self.sock.recvfrom_into(self.packets[count])
+            except BlockingIOError:
+                break
+            self.lengths[count] = n
+            self.senders[count] = sender
+            count += 1
+        return count
+
+
+class _IoVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_IoVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+class _SockAddrIn(ctypes.Structure):
+    _fields_ = [
+        ("sin_family", ctypes.c_ushort),
+        ("sin_port", ctypes.c_uint16),
+        ("sin_addr", ctypes.c_uint32),
+        ("sin_zero", ctypes.c_ubyte * 8),
+    ]
+
+
+def _load_recvmmsg():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        fn = libc.recvmmsg
+    except (OSError, AttributeError):
+        return None
+    fn.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+    fn.restype = ctypes.c_int
+    return fn
+
+
+_recvmmsg = _load_recvmmsg()
+
+
+def has_recvmmsg():
+    return _recvmmsg is not None
+
+
+class RecvmmsgReceiver(RingReceiver):
+    """Pull up to ``slots`` datagrams per syscall with Linux recvmmsg(2)."""
+
+    name = "recvmmsg"
+
+    def __init__(self, sock, slots=DEFAULT_RING_SLOTS, slot_size=MAX_DATAGRAM):
+        if _recvmmsg is None:
+            raise OSError("recvmmsg is not available on this platform")
+        if sock.family != socket.AF_INET:
+            raise OSError("recvmmsg backend supports IPv4 sockets only")
+        super().__init__(sock, slots, slot_size)
+        self._fd = sock.fileno()
+        # Pin the ring buffer and point one iovec per slot into it
+        base = ctypes.addressof((ctypes.c_char * len(self.buffer)).from_buffer(self.buffer))
+        self._iovecs = (_IoVec * self.slots)()
+        self._addrs = (_SockAddrIn * self.slots)()
+        self._msgs = (_MMsgHdr * self.slots)()
+        addr_size = ctypes.sizeof(_SockAddrIn)
+        for i in range(self.slots):
+            self._iovecs[i].iov_base = base + i * slot_size
+            self._iovecs[i].iov_len = slot_size
+            hdr = self._msgs[i].msg_hdr
+            hdr.msg_name = ctypes.addressof(self._addrs[i])
+            hdr.msg_namelen = addr_size
+            hdr.msg_iov = ctypes.pointer(self._iovecs[i])
+            hdr.msg_iovlen = 1
+        self._addr_size = addr_size
+        self._sender_cache = {}
+
+    def _sender(self, addr):
+        key = (addr.sin_addr << 16) | addr.sin_port
+        sender = self._sender_cache.get(key)
+        if sender is None:
+            ip = socket.inet_ntoa(addr.sin_addr.to_bytes(4, sys.byteorder))
+            sender = (ip, socket.ntohs(addr.sin_port))
+            if len(self._sender_cache) > 256:
+                self._sender_cache.clear()
+            self._sender_cache[key] = sender
+        return sender
+
+    def recv_batch(self, limit):
+        limit = min(limit, self.slots)
+        if limit <= 0:
+            return 0
+        msgs = self._msgs
+        for i in range(limit):
+            msgs[i].msg_hdr.msg_namelen = self._addr_size
+        self.syscalls += 1
+        count = _recvmmsg(self._fd, msgs, limit, _MSG_DONTWAIT, None)
+        if count < 0:
+            err = ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return 0
+            raise OSError(err, f"recvmmsg failed: {errno.errorcode.get(err, err)}")
+        for i in range(count):
+            self.lengths[i] = msgs[i].msg_len
+            self.senders[i] = self._sender(self._addrs[i])
+        return count
+
+
+def make_receiver(sock, backend="auto", slots=DEFAULT_RING_SLOTS):
+    """Build the requested receive backend, falling back to the ring when
+    recvmmsg is unavailable."""
+    backend = (backend or "auto").lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown receive backend '{backend}' (choose from {', '.join(BACKENDS)})")
+    if backend == "recvfrom":
+        return RecvfromReceiver(sock, slots)
+    if backend in ("auto", "recvmmsg"):
+        try:
+            return RecvmmsgReceiver(sock, slots)
+        except OSError as e:
+            if backend == "recvmmsg":
+                print(f"recvmmsg backend unavailable ({e}); falling back to ring", flush=True)
+    return RingReceiver(sock, slots)
@@ -9,7 +9,8 @@ HERE = os.path.dirname(os.path.abspath(__file__))
 if HERE not in sys.path:
     sys.path.insert(0, HERE)
 
-from ddp_bridge import DdpBridge  # noqa: E402
+from ddp_bridge import DdpBridge, LOOP_MODES  # noqa: E402
+from ddp_receiver import BACKENDS as RECV_BACKENDS  # noqa: E402
 
 
 def parse_args():
@@ -26,6 +27,8 @@ def parse_args():
     p.add_argument("--max-fps", type=float, default=float(os.environ.get("DDP_MAX_FPS", 20)), help="Maximum write FPS to FPP (0 disables pacing)")
     p.add_argument("--frame-timeout-ms", type=float, default=float(os.environ.get("DDP_FRAME_TIMEOUT_MS", 100.0)), help="Timeout for assembling a frame before discarding (ms)")
     p.add_argument("--batch-limit", type=int, default=int(os.environ.get("DDP_BATCH_LIMIT", 200)), help="Max packets to process per loop iteration")
+    p.add_argument("--loop", choices=LOOP_MODES, default=os.environ.get("DDP_LOOP", "poll"), help="Main loop: 'poll' (non-blocking + short sleeps) or 'event' (selector + deadline timers)")
+    p.add_argument("--recv-backend", choices=RECV_BACKENDS, default=os.environ.get("DDP_RECV_BACKEND", "auto"), help="UDP receive backend (auto picks recvmmsg when available, else ring)")
     # Default duration disabled (0) so interactive debug sessions don't auto-exit unless requested
     p.add_argument("--duration-sec", type=float, default=float(os.environ.get("DDP_DURATION_SEC", 0)), help="Run duration in seconds (auto-exit and print summary; 0 disables)")
     p.add_argument("--compact", action="store_true", help="Compact logs: print only per-second stats and final summary")
@@ -59,6 +62,8 @@ def main():
             duration_sec=args.duration_sec,
             compact=args.compact,
             verbose=args.verbose or True,
+            recv_backend=args.recv_backend,
+            loop_mode=args.loop,
         )
         bridge.run()
     except KeyboardInterrupt:
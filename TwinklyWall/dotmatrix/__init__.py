@@ -2,5 +2,7 @@ from .dot_matrix import DotMatrix
 from .performance import PerformanceMonitor
 from .fpp_output import FPPOutput
 from .source_preview import SourcePreview
+from .frame_clock import FrameClock
+from .matrix_pool import MatrixPool
 
-__all__ = ['DotMatrix', 'PerformanceMonitor', 'FPPOutput', 'SourcePreview']
+__all__ = ['DotMatrix', 'PerformanceMonitor', 'FPPOutput', 'SourcePreview', 'FrameClock', 'MatrixPool']
@@ -0,0 +1,200 @@
+"""Priority compositor: ranked input layers with timeouts and crossfades."""
+
+import math
+import time
+
+import numpy as np
+
+# Blend weights are 0..BLEND_ONE so (b - a) * w fits in int16
+BLEND_SHIFT = 7
+BLEND_ONE = 1 << BLEND_SHIFT
+
+
+class Layer:
+    """One input to the Compositor.
+
+    A layer either receives frames through submit() and counts as active for
+    timeout_s after the last one, or has a source callable (t -> H x W x 3
+    uint8) and is always active (idle patterns).
+    """
+
+    def __init__(self, name, priority, width, height, timeout_s=0.5, opacity=255, source=None):
+        self.name = name
+        self.priority = priority
+        self.timeout_s = timeout_s
+        self.opacity = max(0, min(255, int(opacity)))
+        self.source = source
+        self.frame = np.zeros((height, width, 3), dtype=np.uint8)
+        self.updated = -math.inf
+
+    def is_active(self, now):
+        return self.source is not None or now - self.updated <= self.timeout_s
+
+    def submit(self, frame, now=None):
+        """Replace the layer's frame (copied) and mark it live."""
+        np.copyto(self.frame, frame)
+        self.touch(now)
+
+    def touch(self, now=None):
+        """Mark the layer live after writing into self.frame in place."""
+        self.updated = time.perf_counter() if now is None else now
+
+    def release(self):
+        """Deactivate now instead of waiting for the timeout."""
+        self.updated = -math.inf
+
+
+def blend_into(out, a, b, weight, scratch):
+    """out = a + (b - a) * weight / BLEND_ONE, all uint8, weight in 0..BLEND_ONE.
+
+    Vectorized in int16 with preallocated scratch (same shape as the frames).
+    out may alias a or b.
+    """
+    if weight <= 0:
+        np.copyto(out, a)
+        return out
+    if weight >= BLEND_ONE:
+        np.copyto(out, b)
+        return out
+    np.subtract(b, a, out=scratch, dtype=np.int16)
+    np.multiply(scratch, weight, out=scratch)
+    np.right_shift(scratch, BLEND_SHIFT, out=scratch)
+    np.add(a, scratch, out=scratch)
+    np.copyto(out, scratch, casting="unsafe")
+    return out
+
+
+class Compositor:
+    """Blends ranked layers into one output frame.
+
+    The highest-priority active layer is shown. If its opacity is below 255 it
+    is alpha-blended over the active layers beneath it. When the top layer
+    changes (a source starts, stops or times out) the output crossfades from
+    the last shown frame to the new one over fade_ms, so a handoff never
+    needs a black clear. With no active layers the output fades to black.
+    """
+
+    def __init__(self, width, height, fade_ms=250.0):
+        self.width = width
+        self.height = height
+        self.fade_s = max(0.0, fade_ms) / 1000.0
+        self.layers = []
+        self.output = np.zeros((height, width, 3), dtype=np.uint8)
+        self.top = None            # name of the layer on top after the last compose()
+        self.transitions = 0
+        self._black = np.zeros_like(self.output)
+        self._stack = np.zeros_like(self.output)
+        self._fade_from = np.zeros_like(self.output)
+        self._scratch = np.zeros((height, width, 3), dtype=np.int16)
+        self._fade_start = None
+        self._dirty = True
+
+    def add_layer(self, name, priority, timeout_ms=500.0, opacity=255, source=None):
+        """Register a layer. Higher priority wins."""
+        layer = Layer(name, priority, self.width, self.height, timeout_ms / 1000.0, opacity, source)
+        self.layers.append(layer)
+        self.layers.sort(key=lambda l: l.priority, reverse=True)
+        self._dirty = True
+        return layer
+
+    def layer(self, name):
+        for layer in self.layers:
+            if layer.name == name:
+                return layer
+        raise KeyError(name)
+
+    def submit(self, name, frame, now=None):
+        self.layer(name).submit(frame, now)
+        self._dirty = True
+
+    def touch(self, name, now=None):
+        """Mark a layer updated after writing into layer(name).frame in place."""
+        self.layer(name).touch(now)
+        self._dirty = True
+
+    def release(self, name):
+        self.layer(name).release()
+        self._dirty = True
+
+    def active_layers(self, now):
+        return [layer for layer in self.layers if layer.is_active(now)]
+
+    @property
+    def fading(self):
+        return self._fade_start is not None
+
+    def compose(self, now=None):
+        """Build the output frame for time now.
+
+        Returns True if the output changed since the previous call (new layer
+        data, a transition in progress, or an animated layer on top).
+        """
+        now = time.perf_counter() if now is None else now
+        active = self.active_layers(now)
+        top = active[0].name if active else None
+        if top != self.top:
+            # Fade from whatever is on screen now (including a half-finished fade)
+            np.copyto(self._fade_from, self.output)
+            self._fade_start = now if self.fade_s > 0 else None
+            self.top = top
+            self.transitions += 1
+            self._dirty = True
+
+        animated = False
+        for layer in active:
+            if layer.source is not None:
+                layer.frame[...] = layer.source(now)
+                animated = True
+            if layer.opacity == 255:
+                break
+        if not (self._dirty or animated or self.fading):
+            return False
+
+        target = self._build_stack(active)
+        if self._fade_start is not None:
+            progress = (now - self._fade_start) / self.fade_s
+            if progress >= 1.0:
+                self._fade_start = None
+                np.copyto(self.output, target)
+            else:
+                blend_into(self.output, self._fade_from, target, int(progress * BLEND_ONE), self._scratch)
+        else:
+            np.copyto(self.output, target)
+        self._dirty = False
+        return True
+
+    def _build_stack(self, active):
+        """Top layer alpha-blended over the layers below it (down to the first opaque one)."""
+        if not active:
+            return self._black
+        depth = next((i for i, layer in enumerate(active) if layer.opacity == 255), None)
+        if depth == 0:
+            return active[0].frame
+        if depth is None:
+            np.copyto(self._stack, self._black)
+            depth = len(active)
+        else:
+            np.copyto(self._stack, active[depth].frame)
+        for layer in reversed(active[:depth]):
+            weight = (layer.opacity * BLEND_ONE + 127) // 255
+            blend_into(self._stack, self._stack, layer.frame, weight, self._scratch)
+        return self._stack
+
+
+def breathing_pattern(width, height, color=(0, 40, 90), period_s=6.0):
+    """Idle layer source: a dim diagonal gradient that slowly breathes."""
+    ramp = (np.add.outer(np.arange(height), np.arange(width)) / float(width + height - 2))
+    base = (0.35 + 0.65 * ramp)[:, :, np.newaxis] * np.asarray(color, dtype=np.float32)
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+
+    def source(t):
+        level = 0.55 + 0.45 * math.sin(2 * math.pi * t / period_s)
+        np.multiply(base, level, out=frame, casting="unsafe")
+        return frame
+    return source
+
+
+IDLE_PATTERNS = {
+    "none": None,
+    "breathe": breathing_pattern,
+}
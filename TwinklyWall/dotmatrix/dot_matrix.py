@@ -17,6 +17,7 @@ except ImportError:
 from .source_preview import SourcePreview
 from .performance import PerformanceMonitor
 from .fpp_output import FPPOutput
+from .frame_clock import FrameClock
 
 
 class DotMatrix:
@@ -26,6 +27,10 @@ class DotMatrix:
     Converts pygame surfaces to a grid of colored dots, with optional
     visualization window and FPP hardware output.
     """
+
+    # Dirty-rect frames in a row before one full re-render, so nothing written
+    # to the output by someone else can stick around
+    FULL_REFRESH_FRAMES = 100
     
     def __init__(
         self,
@@ -44,6 +49,9 @@ class DotMatrix:
         fpp_color_order="RGB",
         fpp_gamma=None,
         fpp_channel_gains=(1.0, 1.0, 1.0),
+        fpp_direct_mmap=False,
+        fpp_double_buffer=False,
+        output_ring=None,
         enable_performance_monitor=True,
         max_fps=20
     ):
@@ -65,7 +73,12 @@ class DotMatrix:
             fpp_color_order: One of RGB/GRB/BGR/BRG/RBG/GBR for hardware wiring
             fpp_gamma: Optional gamma correction applied only to FPP output
             fpp_channel_gains: Per-channel gain tuple applied only to FPP output
+            fpp_direct_mmap: Scatter FPP output straight into the mmap (no full-buffer flush)
+            fpp_double_buffer: With fpp_direct_mmap, publish each frame with one tear-free copy
+            output_ring: Publish frames to this shared-memory ring for output_service.py
+                instead of writing FPP directly (takes the place of fpp_output)
             enable_performance_monitor: Track and log performance
+            max_fps: Frame cap applied by render_frame/render_colors through frame_clock (None/0 = uncapped)
         """
         self.width = width
         self.height = height
@@ -92,13 +105,27 @@ class DotMatrix:
         
         # Optional components
         self.monitor = PerformanceMonitor(enabled=enable_performance_monitor, target_fps=self.max_fps)
-        # FPP output: pass through color correction and channel order
-        self.fpp = FPPOutput(
-            width, height, fpp_memory_buffer_file,
-            color_order=fpp_color_order,
-            gamma=fpp_gamma,
-            channel_gains=fpp_channel_gains,
-        ) if fpp_output else None
+        # Frame cap for callers that do not pace themselves (absolute deadlines, no drift)
+        self.frame_clock = FrameClock(self.max_fps) if self.max_fps else None
+        # perf_counter (frame start, output write start, output write end) of the last frame, for input tracing
+        self.last_frame_times = (0.0, 0.0, 0.0)
+        self.monitor.frame_clock = self.frame_clock
+        # FPP output: pass through color correction and channel order. With an output
+        # ring the output service owns FPP and this matrix only publishes frames.
+        if output_ring:
+            from .frame_ring import FrameRingWriter
+            self.fpp = FrameRingWriter(output_ring, width, height)
+        else:
+            self.fpp = FPPOutput(
+                width, height, fpp_memory_buffer_file,
+                color_order=fpp_color_order,
+                gamma=fpp_gamma,
+                channel_gains=fpp_channel_gains,
+                direct_mmap=fpp_direct_mmap,
+                double_buffer=fpp_double_buffer,
+            ) if fpp_output else None
+        if self.fpp:
+            self.monitor.label('fpp_write', f"{self.fpp.write_mode} mode")
         # Scale preview window 6x for better visibility
         preview_scale = 6
         self.preview = SourcePreview(
@@ -108,6 +135,19 @@ class DotMatrix:
             min_preview_color=(15, 15, 15)
         )
         
+        # Window preview: dot masks/frame buffer built on first draw (see _build_dot_sprites)
+        self._dot_sprites = None
+
+        # Staggered-canvas sampling: reused output array (numpy) / coordinate list (fallback)
+        self._stagger_out = None
+        self._stagger_coords = None
+
+        # Dirty-rect rendering: (dot_colors array, source size) of the last full
+        # sharp sample, which a partial frame updates in place
+        self._sampled = (None, None)
+        self._partial_run = 0
+        self.partial_frames = 0
+
         # Cache for numpy optimization
         if HAS_NUMPY:
             self._off_color_cache = np.array(self.off_color, dtype=np.uint32)
@@ -115,21 +155,24 @@ class DotMatrix:
         
         # Pygame setup
         self.screen = None
-        self.clock = None
         if not headless:
             pygame.init()
             window_width = width * (dot_size + spacing) + spacing
             window_height = height * (dot_size + spacing) + spacing
             self.screen = pygame.display.set_mode((window_width, window_height))
             pygame.display.set_caption("Dot Matrix Display")
-            self.clock = pygame.time.Clock()
     
-    def render_frame(self, source_surface):
+    def render_frame(self, source_surface, pace=True, dirty=None):
         """
         Main rendering pipeline: converts source surface to dot matrix.
         
         Args:
             source_surface: pygame.Surface to render
+            pace: Wait on frame_clock after the frame (pass False when the caller paces)
+            dirty: Source rects (x, y, w, h) changed since the previous frame, or
+                None if unknown. With sharp sampling of an unscaled canvas only
+                the dots under these rects are resampled and routed to FPP; an
+                empty list skips both. Otherwise the frame is rendered in full.
         
         Returns:
             Total frame time in milliseconds
@@ -146,15 +189,26 @@ class DotMatrix:
             self.preview.update(source_surface)
         preview_time = (time.perf_counter() - t1) * 1000
         
-        # Scale to target resolution
-        t2 = time.perf_counter()
-        scaled = self._scale_surface(source_surface)
-        self.monitor.record('scaling', (time.perf_counter() - t2) * 1000)
-        
-        # Sample and blend colors
-        t3 = time.perf_counter()
-        self._sample_and_blend(scaled)
-        self.monitor.record('sampling_blend', (time.perf_counter() - t3) * 1000)
+        regions = self._dirty_regions(source_surface, dirty)
+        if regions is None:
+            # Scale to target resolution
+            t2 = time.perf_counter()
+            scaled = self._scale_surface(source_surface)
+            self.monitor.record('scaling', (time.perf_counter() - t2) * 1000)
+
+            # Sample and blend colors
+            t3 = time.perf_counter()
+            self._sample_and_blend(scaled)
+            self.monitor.record('sampling_blend', (time.perf_counter() - t3) * 1000)
+            self._partial_run = 0
+        else:
+            # Dirty rects only: resample them into the previous frame
+            self.monitor.record('scaling', 0.0)
+            t3 = time.perf_counter()
+            self._sample_regions(source_surface, regions)
+            self.monitor.record('sampling_blend', (time.perf_counter() - t3) * 1000)
+            self._partial_run += 1
+            self.partial_frames += 1
         
         # Visualize if not headless
         t4 = time.perf_counter()
@@ -165,32 +219,33 @@ class DotMatrix:
         t5 = time.perf_counter()
         if self.fpp:
             # Pass numpy array directly - no conversion needed!
-            fpp_time = self.fpp.write(self.dot_colors)
+            if regions is None or self.fpp.write_mode == "ring":
+                fpp_time = self.fpp.write(self.dot_colors)  # ring slots always take whole frames
+            elif regions:
+                fpp_time = self.fpp.write(self.dot_colors, regions=regions)
+            else:
+                fpp_time = 0.0
             self.monitor.record('fpp_write', fpp_time)
+            self.monitor.record_detail('fpp_write', 'mmap flush', self.fpp.last_flush_ms)
+        self.last_frame_times = (frame_start, t5, time.perf_counter())
         
         # Complete frame
         total_time = (time.perf_counter() - frame_start) * 1000
         self.monitor.record('total', total_time)
         self.monitor.frame_complete()
 
-        # Frame cap: use pygame clock when available; otherwise sleep
-        if self.max_fps:
-            if self.clock:
-                self.clock.tick(self.max_fps)
-            else:
-                # Headless: simple sleep based on target frame time
-                target_ms = 1000.0 / self.max_fps
-                remaining_ms = target_ms - total_time
-                if remaining_ms > 0:
-                    time.sleep(remaining_ms / 1000.0)
-        
+        # Frame cap: only when the caller is not pacing with its own FrameClock
+        if pace and self.frame_clock:
+            self.frame_clock.tick()
+
         return total_time
 
-    def render_colors(self, dot_colors):
+    def render_colors(self, dot_colors, pace=True):
         """Render precomputed color data (height x width x 3) directly.
 
         dot_colors can be a numpy uint8 array or a nested list/tuple structure.
-        Performance stages are still recorded for visibility.
+        Performance stages are still recorded for visibility. Pass pace=False
+        when the caller drives its own FrameClock.
         """
         frame_start = time.perf_counter()
 
@@ -213,24 +268,21 @@ class DotMatrix:
         self.monitor.record('visualization', (time.perf_counter() - t_vis) * 1000)
 
         # Write to FPP if enabled
+        t_write = time.perf_counter()
         if self.fpp:
             fpp_time = self.fpp.write(self.dot_colors)
             self.monitor.record('fpp_write', fpp_time)
+            self.monitor.record_detail('fpp_write', 'mmap flush', self.fpp.last_flush_ms)
+        self.last_frame_times = (frame_start, t_write, time.perf_counter())
 
         # Complete frame
         total_time = (time.perf_counter() - frame_start) * 1000
         self.monitor.record('total', total_time)
         self.monitor.frame_complete()
 
-        # Frame cap
-        if self.max_fps:
-            if self.clock:
-                self.clock.tick(self.max_fps)
-            else:
-                target_ms = 1000.0 / self.max_fps
-                remaining_ms = target_ms - total_time
-                if remaining_ms > 0:
-                    time.sleep(remaining_ms / 1000.0)
+        # Frame cap: only when the caller is not pacing with its own FrameClock
+        if pace and self.frame_clock:
+            self.frame_clock.tick()
 
         return total_time
     
@@ -294,26 +346,63 @@ class DotMatrix:
         w, h = pixel_view.shape[0], pixel_view.shape[1]
         
         # Check if this is a staggered canvas (height = width * 2)
-        if self.should_stagger and h == self.height * 2:
-            # Staggered canvas: sample with column-dependent row offsets
-            # Even columns sample from rows [0,2,4,...], Odd columns from [1,3,5,...]
-            result = np.zeros((self.height, self.width, 3), dtype=np.uint8)
-            for col in range(self.width):
-                if col % 2 == 0:
-                    # Even column: sample every other row starting at 0
-                    src_rows = np.arange(0, h, 2, dtype=np.int32)
-                else:
-                    # Odd column: sample every other row starting at 1
-                    src_rows = np.arange(1, h, 2, dtype=np.int32)
-                
-                # Copy sampled rows for this column
-                for dst_row, src_row in enumerate(src_rows):
-                    if src_row < h:
-                        result[dst_row, col] = pixel_view[col, src_row]
+        if self.should_stagger and h == self.height * 2 and w >= self.width:
+            # Staggered canvas: even columns sample rows [0,2,4,...], odd columns [1,3,5,...].
+            # Two strided views copied into a reused output array, no per-pixel loop.
+            result = self._stagger_out
+            if result is None:
+                result = self._stagger_out = np.empty((self.height, self.width, 3), dtype=np.uint8)
+            result[:, 0::2] = pixel_view[0:self.width:2, 0::2].transpose(1, 0, 2)
+            result[:, 1::2] = pixel_view[1:self.width:2, 1::2].transpose(1, 0, 2)
             self.dot_colors = result
         else:
             # Regular canvas: standard transpose
             self.dot_colors = np.transpose(pixel_view, (1, 0, 2)).copy(order='C')
+        self._sampled = (self.dot_colors, (w, h))
+        del pixel_view
+
+    def _dirty_regions(self, surface, dirty):
+        """Dot (row0, row1, col0, col1) boxes under the dirty source rects.
+
+        None means render the whole frame: no rects given, blending or
+        scaling in use, dot_colors not the last sharp sample (cleared,
+        render_colors, first frame) or a periodic full refresh is due.
+        """
+        if dirty is None or not HAS_NUMPY or not self.disable_blending:
+            return None
+        sampled, size = self._sampled
+        if sampled is None or sampled is not self.dot_colors or surface.get_size() != size:
+            return None
+        if self._partial_run >= self.FULL_REFRESH_FRAMES:
+            return None
+        w, h = size
+        if self.should_stagger and h == self.height * 2 and w >= self.width:
+            step = 2
+        elif size == (self.width, self.height):
+            step = 1
+        else:
+            return None
+        regions = []
+        for x, y, rect_w, rect_h in dirty:
+            row0, row1 = max(0, y // step), min(self.height, -(-(y + rect_h) // step))
+            col0, col1 = max(0, x), min(self.width, x + rect_w)
+            if row0 < row1 and col0 < col1:
+                regions.append((row0, row1, col0, col1))
+        return regions
+
+    def _sample_regions(self, surface, regions):
+        """Resample only the given dot boxes into dot_colors (see _sample_no_blend_numpy)."""
+        pixel_view = surfarray.pixels3d(surface)
+        frame = self.dot_colors
+        staggered = pixel_view.shape[1] == self.height * 2
+        for row0, row1, col0, col1 in regions:
+            if staggered:
+                even = col0 + (col0 & 1)
+                odd = col0 + 1 - (col0 & 1)
+                frame[row0:row1, even:col1:2] = pixel_view[even:col1:2, 2 * row0:2 * row1:2].transpose(1, 0, 2)
+                frame[row0:row1, odd:col1:2] = pixel_view[odd:col1:2, 2 * row0 + 1:2 * row1:2].transpose(1, 0, 2)
+            else:
+                frame[row0:row1, col0:col1] = pixel_view[col0:col1, row0:row1].transpose(1, 0, 2)
         del pixel_view
 
     def _sample_no_blend_fallback(self, surface):
@@ -325,17 +414,17 @@ class DotMatrix:
         
         if self.should_stagger and h == self.height * 2:
             # Staggered canvas: sample with column-dependent row offsets
-            for col in range(self.width):
-                if col % 2 == 0:
-                    # Even column: sample every other row starting at 0
-                    src_rows = list(range(0, h, 2))
-                else:
-                    # Odd column: sample every other row starting at 1
-                    src_rows = list(range(1, h, 2))
-                
-                for dst_row, src_row in enumerate(src_rows):
-                    if src_row < h:
-                        self.dot_colors[dst_row][col] = surface.get_at((col, src_row))[:3]
+            # (even columns from rows [0,2,4,...], odd columns from [1,3,5,...])
+            if self._stagger_coords is None:
+                self._stagger_coords = [
+                    (dst_row, col, (col, dst_row * 2 + (col % 2)))
+                    for col in range(min(w, self.width))
+                    for dst_row in range(self.height)
+                ]
+            get_at = surface.get_at
+            dot_colors = self.dot_colors
+            for dst_row, col, src in self._stagger_coords:
+                dot_colors[dst_row][col] = get_at(src)[:3]
         else:
             # Regular canvas: direct sampling
             for row in range(self.height):
@@ -465,12 +554,16 @@ class DotMatrix:
                 import sys
                 sys.exit(0)
         
+        if HAS_NUMPY and isinstance(self.dot_colors, np.ndarray) and self._composite_dots():
+            pygame.display.flip()
+            return
+
         self.screen.fill(self.bg_color)
         stagger = (self.dot_size / 2 + self.spacing / 2) if self.should_stagger else 0
         
         # Handle both numpy arrays and legacy lists
-        if isinstance(self.dot_colors, np.ndarray):
-            # Fast path: numpy array access
+        if HAS_NUMPY and isinstance(self.dot_colors, np.ndarray):
+            # Per-dot path: numpy array access
             for row in range(self.height):
                 for col in range(self.width):
                     x = self.spacing + col * (self.dot_size + self.spacing)
@@ -488,6 +581,91 @@ class DotMatrix:
         
         pygame.display.flip()
     
+    def _build_dot_sprites(self):
+        """Precompute the dot masks and frame buffer for _composite_dots().
+
+        Each dot owns a pitch x pitch tile (pitch = dot_size + spacing) centred
+        on its circle. The circle mask is rasterized once per column parity with
+        pygame.draw.circle at the same sub-pixel stagger offset the per-dot path
+        uses, so the composite matches it pixel for pixel. Colors are packed to
+        the window's 32-bit pixel format and the frame is kept in the window's
+        row-major layout so it can be copied straight into pixels2d().
+
+        Returns False (per-dot path is used) when dots would overlap
+        neighbouring tiles, the background is not black, or the window is not
+        a 32-bit surface without per-pixel alpha.
+        """
+        self._dot_sprites = False
+        pitch = self.dot_size + self.spacing
+        half = pitch // 2
+        if self.bg_color != (0, 0, 0) or half - self.dot_size < 0 or half + self.dot_size + 1 >= pitch:
+            return False
+        if self.screen.get_bytesize() != 4 or self.screen.get_masks()[3] != 0:
+            return False
+
+        stagger = (self.dot_size / 2 + self.spacing / 2) if self.should_stagger else 0
+        masks = []
+        offsets = []
+        for parity in (0, 1):
+            shift = stagger * parity
+            shift_px = int(shift)
+            tile = pygame.Surface((pitch, pitch))
+            pygame.draw.circle(tile, (255, 255, 255), (half, half + (shift - shift_px)), self.dot_size)
+            masks.append((surfarray.array2d(tile) != 0).astype(np.uint32))
+            offsets.append(shift_px)
+
+        win_w, win_h = self.screen.get_size()
+        # Pad by one tile (plus the stagger) on every side so edge dots never need clipping.
+        # Stored as (y, x) like the window surface; ".T" gives the (x, y) view surfarray uses.
+        pad = pitch + max(offsets)
+        frame = np.zeros((win_h + 2 * pad, win_w + 2 * pad), dtype=np.uint32)
+        frame_xy = frame.T
+        x0 = pad + self.spacing - half
+        y0 = pad + self.spacing - half
+        if x0 + self.width * pitch > frame_xy.shape[0] or y0 + max(offsets) + self.height * pitch > frame_xy.shape[1]:
+            return False
+
+        # View the tile grid as (col, x-in-tile, row, y-in-tile) for each parity
+        columns = frame_xy[x0:x0 + self.width * pitch].reshape(self.width, pitch, frame_xy.shape[1])
+        targets = []
+        for parity in (0, 1):
+            ys = y0 + offsets[parity]
+            block = columns[parity::2, :, ys:ys + self.height * pitch]
+            view = block.reshape(block.shape[0], pitch, self.height, pitch)
+            if not np.shares_memory(view, frame):
+                return False
+            targets.append(view)
+
+        shifts = self.screen.get_shifts()
+        losses = self.screen.get_losses()
+        self._dot_pack = [(shifts[i], losses[i]) for i in range(3)]
+        self._dot_packed = np.empty((self.height, self.width), dtype=np.uint32)
+        self._dot_window = frame_xy[pad:pad + win_w, pad:pad + win_h]
+        self._dot_targets = targets
+        self._dot_masks = [m[np.newaxis, :, np.newaxis, :] for m in masks]
+        self._dot_sprites = True
+        return True
+
+    def _composite_dots(self):
+        """Draw every dot at once: packed color x tiled circle mask, then one copy into the window."""
+        if self._dot_sprites is None:
+            self._build_dot_sprites()
+        if not self._dot_sprites or self.dot_colors.shape != (self.height, self.width, 3):
+            return False
+
+        packed = self._dot_packed
+        packed.fill(0)
+        for channel, (shift, loss) in enumerate(self._dot_pack):
+            packed |= (self.dot_colors[:, :, channel].astype(np.uint32) >> loss) << shift
+        for parity in (0, 1):
+            colors = packed[:, parity::2].T  # (cols, rows)
+            np.multiply(colors[:, np.newaxis, :, np.newaxis], self._dot_masks[parity], out=self._dot_targets[parity])
+
+        window = surfarray.pixels2d(self.screen)
+        window[...] = self._dot_window
+        del window
+        return True
+
     def clear(self):
         """Set all dots to off color."""
         if HAS_NUMPY:
@@ -497,11 +675,23 @@ class DotMatrix:
             # Legacy format
             self.dot_colors = [[self.off_color for _ in range(self.width)] for _ in range(self.height)]
     
+    def blank(self):
+        """Turn the lights off but keep the output open (end of a pooled session).
+
+        With an output ring the lights are not blanked: the layer is released
+        and the output service crossfades to whatever source is next.
+        """
+        self.clear()
+        if self.fpp:
+            if self.fpp.write_mode == "ring":
+                self.fpp.release()
+            else:
+                self.fpp.write(self.dot_colors)
+
     def shutdown(self):
         """Clean shutdown: turn off lights and release resources."""
-        self.clear()
+        self.blank()
         if self.fpp:
-            self.fpp.write(self.dot_colors)
             self.fpp.close()
         if self.screen:
             pygame.quit()
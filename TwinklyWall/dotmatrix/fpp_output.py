@@ -10,34 +10,102 @@ try:
 except ImportError:
     HAS_NUMPY = False
 
-from .light_wall_mapping import load_light_wall_mapping
+from .light_wall_mapping import DEFAULT_MAPPING_CSV, build_routing_indices, load_light_wall_mapping, load_routing_arrays
 
 
 class FPPOutput:
-    """Handles FPP memory-mapped output with optional numpy fast path."""
+    """Handles FPP memory-mapped output with optional numpy fast path.
 
-    def __init__(self, width, height, mapping_file="/dev/shm/FPP-Model-Data-Light_Wall", color_order="RGB", gamma=None, channel_gains=(1.0, 1.0, 1.0)):
+    Write modes (numpy only):
+    - default: scatter into ``self.buffer`` then copy the whole buffer into the mmap
+    - ``direct_mmap``: scatter straight into a numpy view over the mmap (one write per frame)
+    - ``direct_mmap`` + ``double_buffer``: scatter into a back buffer and publish it to the
+      mmap with a single ``commit()`` copy, for consumers that need tear-free frames
+    """
+
+    def __init__(self, width, height, mapping_file="/dev/shm/FPP-Model-Data-Light_Wall", color_order="RGB", gamma=None, channel_gains=(1.0, 1.0, 1.0), direct_mmap=False, double_buffer=False, mapping_csv=DEFAULT_MAPPING_CSV):
         self.width = width
         self.height = height
         self.buffer_size = width * height * 3
         self.buffer = bytearray(self.buffer_size)
         self.memory_map = None
         self.file_handle = None
-        self.routing_table = {}
+        self.mapping_csv = mapping_csv
+        self._routing_table = None  # built lazily, see routing_table
         self._fast_dest = None  # numpy-optimized destination indices
         self._fast_src = None   # numpy-optimized source indices (flattened)
-        self._buffer_view = None  # numpy view over self.buffer for vectorized writes
-        # Output color correction and channel order
-        self.color_order = (color_order or "RGB").upper()
-        self.gamma = float(gamma) if (gamma is not None) else None
-        self.channel_gains = channel_gains if channel_gains else (1.0, 1.0, 1.0)
+        self._buffer_view = None  # numpy view that the routed scatter writes into
+        self._mmap_view = None  # numpy view over the mmap itself (direct mode)
+        self._row_routes = None  # routing sorted by source pixel, for region writes (see _region_routes)
+        self.direct_mmap = bool(direct_mmap and HAS_NUMPY)
+        self.double_buffer = bool(double_buffer and self.direct_mmap)
+        self.last_flush_ms = 0.0
+        # Output color correction and channel order (setters rebuild the LUTs)
+        self._luts = None       # per-output-channel 256-entry uint8 tables (None = identity)
+        self._lut_src = (0, 1, 2)  # input channel feeding each output channel
+        self._corrected = None  # preallocated N x 3 output for the LUT pass
+        self._color_order = (color_order or "RGB").upper()
+        self._gamma = float(gamma) if (gamma is not None) else None
+        self._channel_gains = tuple(channel_gains) if channel_gains else (1.0, 1.0, 1.0)
         # Precompute channel order indices
-        self._channel_idx = self._make_channel_indices(self.color_order)
+        self._channel_idx = self._make_channel_indices(self._color_order)
+        self._rebuild_luts()
 
         # Load mapping and initialize
-        self.mapping = load_light_wall_mapping()
         self._initialize_memory_map(mapping_file)
         self._build_routing_table()
+        self._bind_buffer_view()
+
+    @property
+    def write_mode(self):
+        if not self.direct_mmap or self._mmap_view is None:
+            return "copy"
+        return "double" if self.double_buffer else "direct"
+
+    @property
+    def gamma(self):
+        return self._gamma
+
+    @gamma.setter
+    def gamma(self, value):
+        self._gamma = float(value) if (value is not None) else None
+        self._rebuild_luts()
+
+    @property
+    def channel_gains(self):
+        return self._channel_gains
+
+    @channel_gains.setter
+    def channel_gains(self, value):
+        self._channel_gains = tuple(value) if value else (1.0, 1.0, 1.0)
+        self._rebuild_luts()
+
+    @property
+    def color_order(self):
+        return self._color_order
+
+    @color_order.setter
+    def color_order(self, value):
+        self._color_order = (value or "RGB").upper()
+        self._channel_idx = self._make_channel_indices(self._color_order)
+        self._rebuild_luts()
+
+    def _rebuild_luts(self):
+        """Fuse gain, gamma and channel order into one uint8 table per output channel.
+
+        Output channel j reads input channel ``_channel_idx[j]`` through
+        ``_luts[j]``. Tables are computed with the same float32 math as
+        ``_apply_correction_float`` so both paths produce identical bytes.
+        """
+        if not HAS_NUMPY:
+            return
+        if self._gamma is None and self._channel_gains == (1.0, 1.0, 1.0) and self._channel_idx == (0, 1, 2):
+            self._luts = None
+            return
+        levels = np.tile(np.arange(256, dtype=np.uint8)[:, np.newaxis], (1, 3))
+        per_input = self._apply_correction_float(levels, reorder=False)  # 256 x 3, one column per input channel
+        self._lut_src = self._channel_idx
+        self._luts = np.ascontiguousarray(per_input[:, list(self._channel_idx)].T)
 
     def _make_channel_indices(self, order):
         lookup = {
@@ -51,7 +119,22 @@ class FPPOutput:
         return lookup.get(order, (0, 1, 2))
 
     def _apply_correction_numpy(self, arr_uint8):
-        # arr_uint8: N x 3 uint8
+        # arr_uint8: N x 3 uint8; one table lookup per output channel
+        luts = self._luts
+        if luts is None:
+            return arr_uint8
+        # One buffer sized for a full frame; region writes use a prefix of it
+        n = arr_uint8.shape[0]
+        if self._corrected is None or self._corrected.shape[0] < n:
+            full = len(self._fast_src) if self._fast_src is not None else 0
+            self._corrected = np.empty((max(n, full), 3), dtype=np.uint8)
+        out = self._corrected[:n]
+        for j, src in enumerate(self._lut_src):
+            np.take(luts[j], arr_uint8[:, src], out=out[:, j], mode='clip')  # 'clip' skips buffering of out
+        return out
+
+    def _apply_correction_float(self, arr_uint8, reorder=True):
+        # Reference float path (gain -> gamma -> clip -> cast -> reorder); used to build the LUTs
         if self.gamma is None and self.channel_gains == (1.0, 1.0, 1.0) and self._channel_idx == (0, 1, 2):
             return arr_uint8
         arr = arr_uint8.astype(np.float32, copy=False)
@@ -63,7 +146,7 @@ class FPPOutput:
         arr = np.clip(arr, 0, 255)
         arr = arr.astype(np.uint8)
         i0, i1, i2 = self._channel_idx
-        if (i0, i1, i2) != (0, 1, 2):
+        if reorder and (i0, i1, i2) != (0, 1, 2):
             arr = arr[:, [i0, i1, i2]]
         return arr
 
@@ -103,65 +186,113 @@ class FPPOutput:
     def _build_routing_table(self):
         """Pre-compute routing from visual grid to FPP buffer positions.
         
-        Maps visual canvas (50×90) to physical LED wall (99×90 with staggering).
-        
-        Stagger pattern (hexagonal):
-        - Even columns (0,2,4...): physical_row = visual_row * 2
-        - Odd columns (1,3,5...): physical_row = visual_row * 2 + 1
-        
-        This creates the staggered visual layout where odd columns are offset by 0.5 units.
-        With 50 visual rows, this produces rows 0-98 (99 total) in the physical layout.
-        The last visual row (49) for odd columns (row 99) wraps to row 97 to fit within bounds.
+        Maps visual canvas (50×90) to physical LED wall (99×90 with staggering);
+        see light_wall_mapping.build_routing_indices for the stagger rule.
+
+        With numpy the src/dest index arrays come from the compiled routing
+        cache (mmap-loaded, rebuilt only when the CSV changes). The per-pixel
+        routing_table dict used by the non-numpy paths is built lazily.
         """
-        if not self.mapping:
+        if HAS_NUMPY:
+            src, dest = load_routing_arrays(self.width, self.height, csv_file=self.mapping_csv)
+            if len(dest):
+                self._fast_dest = dest
+                self._fast_src = src
+                try:
+                    print(f"FPPOutput mapping entries: {len(self._fast_dest)}")
+                except Exception:
+                    pass
+            else:
+                # Fallback to linear mapping when CSV mapping yields no entries
+                total = self.width * self.height
+                self._fast_dest = np.arange(total, dtype=np.int32)
+                self._fast_src = np.arange(total, dtype=np.int32)
+                try:
+                    print("FPPOutput mapping empty; using linear fallback mapping")
+                except Exception:
+                    pass
             return
 
-        dest_indices = []
-        src_indices = []
-        for visual_row in range(self.height):
-            for visual_col in range(self.width):
-                # Determine physical row based on column stagger
-                if visual_col % 2 == 0:
-                    # Even column (0, 2, 4...): maps to even physical rows
-                    physical_row = visual_row * 2
-                else:
-                    # Odd column (1, 3, 5...): maps to odd physical rows (staggered)
-                    physical_row = visual_row * 2 + 1
-                
-                # Clamp to valid range: last visual row for odd cols (row 99) → row 97
-                if physical_row > 98:
-                    physical_row = 97  # Last odd row
-                
-                physical_col = visual_col
-                
-                if (physical_row, physical_col) in self.mapping:
-                    pixel_idx = self.mapping[(physical_row, physical_col)]
-                    if 0 <= pixel_idx < 4500:
-                        dest_indices.append(pixel_idx)
-                        src_indices.append(visual_row * self.width + visual_col)
-                        self.routing_table[(visual_row, visual_col)] = [pixel_idx * 3]
-
-        if HAS_NUMPY and dest_indices:
-            self._fast_dest = np.array(dest_indices, dtype=np.int32)
-            self._fast_src = np.array(src_indices, dtype=np.int32)
-            self._buffer_view = np.frombuffer(self.buffer, dtype=np.uint8).reshape(-1, 3)
-            try:
-                print(f"FPPOutput mapping entries: {len(self._fast_dest)}")
-            except Exception:
-                pass
-        elif HAS_NUMPY:
-            # Fallback to linear mapping when CSV mapping yields no entries
-            total = self.width * self.height
-            self._fast_dest = np.arange(total, dtype=np.int32)
-            self._fast_src = np.arange(total, dtype=np.int32)
-            self._buffer_view = np.frombuffer(self.buffer, dtype=np.uint8).reshape(-1, 3)
-            try:
-                print("FPPOutput mapping empty; using linear fallback mapping")
-            except Exception:
-                pass
-
-    def write(self, dot_colors):
-        """Write color data to FPP buffer and flush to memory map."""
+        src, dest = build_routing_indices(load_light_wall_mapping(self.mapping_csv), self.width, self.height)
+        self._routing_table = self._make_routing_table(src, dest)
+
+    def _make_routing_table(self, src, dest):
+        return {(int(s) // self.width, int(s) % self.width): [int(d) * 3] for s, d in zip(src, dest)}
+
+    @property
+    def routing_table(self):
+        """(visual_row, visual_col) -> [byte offset] for the per-pixel write paths."""
+        if self._routing_table is None:
+            if self._fast_src is not None:
+                self._routing_table = self._make_routing_table(self._fast_src, self._fast_dest)
+            else:
+                self._routing_table = {}
+        return self._routing_table
+
+    def _bind_buffer_view(self):
+        """Point the scatter target at self.buffer or directly at the mmap."""
+        if not HAS_NUMPY or self._fast_dest is None:
+            return
+        if self.direct_mmap and self.memory_map:
+            self._mmap_view = np.frombuffer(self.memory_map, dtype=np.uint8).reshape(-1, 3)
+            if not self.double_buffer:
+                self._buffer_view = self._mmap_view
+                return
+        self._buffer_view = np.frombuffer(self.buffer, dtype=np.uint8).reshape(-1, 3)
+
+    def commit(self):
+        """Publish the back buffer to the mmap in one copy.
+
+        Only needed in double-buffer mode when frames were written with
+        ``commit=False``; in direct mode the scatter already landed in the mmap.
+        """
+        if not self.memory_map:
+            return 0.0
+        flush_start = time.perf_counter()
+        if self._mmap_view is not None:
+            if self._buffer_view is not self._mmap_view:
+                np.copyto(self._mmap_view, self._buffer_view)
+        else:
+            self.memory_map.seek(0)
+            self.memory_map.write(self.buffer)
+        self.last_flush_ms = (time.perf_counter() - flush_start) * 1000
+        return self.last_flush_ms
+
+    def _region_routes(self, row0, row1, col0, col1):
+        """(src, dest) routing entries whose source pixel lies in rows [row0, row1) and columns
+        [col0, col1), with shadowed duplicate destinations dropped."""
+        if self._row_routes is None:
+            # Where several sources route to one LED the full scatter leaves the last one;
+            # drop the shadowed entries so a region write can never resurrect them
+            reverse_dest = self._fast_dest[::-1]
+            _, last = np.unique(reverse_dest, return_index=True)
+            winners = np.sort(len(reverse_dest) - 1 - last)
+            order = winners[np.argsort(self._fast_src[winners], kind='stable')]
+            src = np.ascontiguousarray(self._fast_src[order])
+            dest = np.ascontiguousarray(self._fast_dest[order])
+            # Entries of visual row r are src[starts[r]:starts[r + 1]]
+            starts = np.searchsorted(src, np.arange(self.height + 1) * self.width)
+            self._row_routes = (src, dest, src % self.width, starts)
+        src, dest, cols, starts = self._row_routes
+        lo, hi = starts[max(0, row0)], starts[min(self.height, row1)]
+        if col0 <= 0 and col1 >= self.width:
+            return src[lo:hi], dest[lo:hi]
+        keep = cols[lo:hi]
+        keep = (keep >= col0) & (keep < col1)
+        return src[lo:hi][keep], dest[lo:hi][keep]
+
+    def write(self, dot_colors, commit=True, regions=None):
+        """Write color data to FPP buffer and flush to memory map.
+
+        In double-buffer mode, pass ``commit=False`` to defer publishing the
+        frame until ``commit()`` is called.
+
+        ``regions`` is an optional list of (row0, row1, col0, col1) boxes of
+        dot_colors that changed since the previous write. Only the pixels
+        routed from those boxes are selected, corrected and scattered; the
+        rest of the buffer keeps the previous frame. Ignored by the
+        per-pixel (non-numpy) paths.
+        """
         if not self.memory_map:
             return 0.0
 
@@ -170,18 +301,25 @@ class FPPOutput:
         # Track timing for different stages
         select_start = time.perf_counter()
 
-        if HAS_NUMPY and isinstance(dot_colors, np.ndarray) and self._fast_dest is not None:
+        scattered = HAS_NUMPY and isinstance(dot_colors, np.ndarray) and self._fast_dest is not None
+        if scattered:
             colors_flat = dot_colors.reshape(-1, 3)
-            selected = colors_flat[self._fast_src]
-            select_elapsed = time.perf_counter() - select_start
-            
-            correct_start = time.perf_counter()
-            corrected = self._apply_correction_numpy(selected)
-            correct_elapsed = time.perf_counter() - correct_start
-            
-            assign_start = time.perf_counter()
-            self._buffer_view[self._fast_dest] = corrected
-            assign_elapsed = time.perf_counter() - assign_start
+            if regions is not None:
+                for box in regions:
+                    src, dest = self._region_routes(*box)
+                    if len(src):
+                        self._buffer_view[dest] = self._apply_correction_numpy(colors_flat[src])
+            else:
+                selected = colors_flat[self._fast_src]
+                select_elapsed = time.perf_counter() - select_start
+
+                correct_start = time.perf_counter()
+                corrected = self._apply_correction_numpy(selected)
+                correct_elapsed = time.perf_counter() - correct_start
+
+                assign_start = time.perf_counter()
+                self._buffer_view[self._fast_dest] = corrected
+                assign_elapsed = time.perf_counter() - assign_start
             
             # Optional: verbose logging for each write (disabled by default to reduce overhead)
             # print(f"[FPP_WRITE] select={select_elapsed*1000:.3f}ms correct={correct_elapsed*1000:.3f}ms assign={assign_elapsed*1000:.3f}ms", flush=True)
@@ -203,15 +341,22 @@ class FPPOutput:
                     self.buffer[byte_idx + 1] = g
                     self.buffer[byte_idx + 2] = b
 
-        flush_start = time.perf_counter()
-        self.memory_map.seek(0)
-        self.memory_map.write(self.buffer)
-        flush_elapsed = time.perf_counter() - flush_start
+        if not scattered:
+            # Per-pixel paths always fill self.buffer; flush it as a whole
+            flush_start = time.perf_counter()
+            self.memory_map.seek(0)
+            self.memory_map.write(self.buffer)
+            self.last_flush_ms = (time.perf_counter() - flush_start) * 1000
+        elif self._buffer_view is self._mmap_view:
+            # Direct mode: the scatter above was the only write
+            self.last_flush_ms = 0.0
+        elif commit:
+            self.commit()
         
         total_elapsed = time.perf_counter() - start
         
         # Optional: verbose logging (disabled by default)
-        # print(f"[FPP_FLUSH] seek+write={flush_elapsed*1000:.3f}ms total={total_elapsed*1000:.3f}ms", flush=True)
+        # print(f"[FPP_FLUSH] mode={self.write_mode} flush={self.last_flush_ms:.3f}ms total={total_elapsed*1000:.3f}ms", flush=True)
         
         return total_elapsed * 1000
 
@@ -221,6 +366,11 @@ class FPPOutput:
             return 0.0
         start = time.perf_counter()
         rr, gg, bb = self._apply_correction_tuple(int(r), int(g), int(b))
+        if self._mmap_view is not None:
+            self._buffer_view[:] = (rr, gg, bb)
+            if self._buffer_view is not self._mmap_view:
+                self.commit()
+            return (time.perf_counter() - start) * 1000
         for i in range(0, self.buffer_size, 3):
             self.buffer[i] = rr
             self.buffer[i + 1] = gg
@@ -234,6 +384,11 @@ class FPPOutput:
         self._cleanup()
 
     def _cleanup(self):
+        # Drop numpy views over the mmap first; close() fails while they exist
+        if self._mmap_view is not None:
+            if self._buffer_view is self._mmap_view:
+                self._buffer_view = None
+            self._mmap_view = None
         if self.memory_map:
             self.memory_map.close()
             self.memory_map = None
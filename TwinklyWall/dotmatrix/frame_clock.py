@@ -0,0 +1,198 @@
+"""Absolute-deadline frame pacing shared by every playback loop."""
+
+import time
+
+SKIP_POLICIES = ("skip", "catch_up", "resync")
+
+# Upper edges (ms) of the jitter/lateness histogram buckets; the last bucket is open-ended
+HISTOGRAM_EDGES_MS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 33.0)
+
+
+class FrameClock:
+    """Paces a loop to fixed perf_counter deadlines without accumulating drift.
+
+    Deadline n is start + n * period, so time spent rendering or oversleeping
+    on one frame never pushes later frames back. tick() sleeps until the next
+    deadline minus spin_ms, then busy-waits the remainder for sub-millisecond
+    accuracy.
+
+    When a caller falls a whole period or more behind, the skip policy decides
+    what happens to the missed deadlines:
+        skip     - drop them; tick() returns how many were dropped so video can
+                   advance its frame index and stay on the wall clock
+        catch_up - keep them; following ticks return immediately until the
+                   schedule is met again (bounded by max_catch_up)
+        resync   - forget them and restart the schedule from now
+
+    A gap longer than idle_s (the loop was not running, e.g. between videos)
+    restarts the schedule without counting late or skipped frames.
+
+    Jitter (how far after its deadline each tick returned) and lateness (for
+    ticks that arrived after their deadline) are kept as histograms so frame
+    stability can be checked at a given fps.
+    """
+
+    def __init__(self, fps, policy="skip", spin_ms=1.0, late_ms=None, max_catch_up=3, idle_s=1.0):
+        """
+        Args:
+            fps: Target frame rate
+            policy: One of SKIP_POLICIES for missed deadlines
+            spin_ms: Busy-wait window before each deadline (0 = sleep only)
+            late_ms: A tick this far past its deadline counts as late (default: 10% of the period)
+            max_catch_up: With policy "catch_up", resync once this many deadlines are owed
+            idle_s: Restart the schedule silently after a gap this long
+        """
+        if policy not in SKIP_POLICIES:
+            raise ValueError(f"Unknown skip policy: {policy}")
+        self.policy = policy
+        self.spin_s = max(0.0, spin_ms) / 1000.0
+        self.max_catch_up = max(1, int(max_catch_up))
+        self.idle_s = idle_s
+        self._late_ms = late_ms
+        self.frame = 0
+        self._next = 0.0
+        self.set_fps(fps)
+        self.reset_stats()
+
+    def set_fps(self, fps):
+        """Change the frame rate; the schedule restarts from the next tick."""
+        self.fps = float(fps)
+        self.period = 1.0 / max(1e-3, self.fps)
+        self.late_s = (self._late_ms / 1000.0) if self._late_ms is not None else self.period * 0.1
+        self._started = False
+
+    def start(self, now=None):
+        """Anchor the schedule: the next tick() returns immediately.
+
+        Called automatically by the first tick() and after an idle gap.
+        """
+        self._start = time.perf_counter() if now is None else now
+        self._next = self._start
+        self.frame = 0
+        self._started = True
+
+    def reset_stats(self):
+        """Clear the histograms and counters."""
+        self.ticks = 0
+        self.late_frames = 0
+        self.skipped_frames = 0
+        self.resyncs = 0
+        self.jitter_hist = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        self.late_hist = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        self.max_jitter_ms = 0.0
+        self._jitter_total_ms = 0.0
+
+    @property
+    def next_deadline(self):
+        """perf_counter time of the next deadline."""
+        return self._next
+
+    def time_until_next(self):
+        """Seconds until the next deadline (negative when already late)."""
+        return self._next - time.perf_counter()
+
+    def tick(self, stop_event=None):
+        """Wait for the next deadline and advance the schedule.
+
+        Args:
+            stop_event: Optional threading.Event; the sleep ends early when it is set
+
+        Returns:
+            Number of deadlines dropped since the previous tick (always 0 unless
+            the policy is "skip")
+        """
+        if not self._started or time.perf_counter() - self._next > self.idle_s:
+            self.start()
+
+        deadline = self._next
+        remaining = deadline - time.perf_counter()
+        if remaining > self.spin_s:
+            if stop_event is not None:
+                if stop_event.wait(remaining - self.spin_s):
+                    return 0
+            else:
+                time.sleep(remaining - self.spin_s)
+        now = time.perf_counter()
+        while now < deadline:
+            now = time.perf_counter()
+
+        self._record(now - deadline)
+
+        missed = int((now - deadline) / self.period)
+        dropped = 0
+        if missed == 0:
+            self._next = deadline + self.period
+            self.frame += 1
+        elif self.policy == "skip":
+            dropped = missed
+            self.skipped_frames += missed
+            self._next = deadline + (missed + 1) * self.period
+            self.frame += missed + 1
+        elif self.policy == "catch_up" and missed <= self.max_catch_up:
+            self._next = deadline + self.period
+            self.frame += 1
+        else:
+            # resync (or too far behind to catch up): restart the schedule from now
+            self.resyncs += 1
+            self._start = now
+            self._next = now + self.period
+            self.frame += 1
+        return dropped
+
+    def _record(self, lateness_s):
+        ms = lateness_s * 1000.0
+        self.ticks += 1
+        self._jitter_total_ms += ms
+        if ms > self.max_jitter_ms:
+            self.max_jitter_ms = ms
+        bucket = _bucket(ms)
+        self.jitter_hist[bucket] += 1
+        if lateness_s > self.late_s:
+            self.late_frames += 1
+            self.late_hist[bucket] += 1
+
+    def stats(self):
+        """Counters and histograms as a dict (histogram keys are bucket labels)."""
+        labels = _bucket_labels()
+        return {
+            "fps": self.fps,
+            "policy": self.policy,
+            "ticks": self.ticks,
+            "late_frames": self.late_frames,
+            "skipped_frames": self.skipped_frames,
+            "resyncs": self.resyncs,
+            "avg_jitter_ms": self._jitter_total_ms / self.ticks if self.ticks else 0.0,
+            "max_jitter_ms": self.max_jitter_ms,
+            "jitter_hist": dict(zip(labels, self.jitter_hist)),
+            "late_hist": dict(zip(labels, self.late_hist)),
+        }
+
+    def summary(self):
+        """One-line pacing summary for logs."""
+        avg = self._jitter_total_ms / self.ticks if self.ticks else 0.0
+        return (f"{self.fps:.1f} fps ({self.policy}) | ticks={self.ticks} late={self.late_frames} "
+                f"skipped={self.skipped_frames} resyncs={self.resyncs} | "
+                f"jitter avg={avg:.3f}ms max={self.max_jitter_ms:.3f}ms")
+
+    def format_histograms(self):
+        """Multi-line jitter/late histogram report."""
+        lines = [f"Frame pacing: {self.summary()}", f"  {'bucket':>12s} {'jitter':>8s} {'late':>8s}"]
+        for label, jitter, late in zip(_bucket_labels(), self.jitter_hist, self.late_hist):
+            if jitter or late:
+                lines.append(f"  {label:>12s} {jitter:8d} {late:8d}")
+        return "\n".join(lines)
+
+
+def _bucket(ms):
+    for i, edge in enumerate(HISTOGRAM_EDGES_MS):
+        if ms < edge:
+            return i
+    return len(HISTOGRAM_EDGES_MS)
+
+
+def _bucket_labels():
+    labels = [f"<{HISTOGRAM_EDGES_MS[0]:g}ms"]
+    for lo, hi in zip(HISTOGRAM_EDGES_MS, HISTOGRAM_EDGES_MS[1:]):
+        labels.append(f"{lo:g}-{hi:g}ms")
+    labels.append(f">={HISTOGRAM_EDGES_MS[-1]:g}ms")
+    return labels
@@ -0,0 +1,241 @@
+"""Shared-memory frame rings between frame producers and the output service.
+
+Each producer (video playback, Tetris, the DDP bridge) owns one ring file in
+/dev/shm and is its only writer. A ring holds a small header and a few slots
+of H x W x 3 uint8 frames. Every slot has a seqlock sequence number that is
+odd while the slot is being written and even once the frame is complete.
+Readers never take a lock. They copy the newest slot and check that its
+sequence did not change during the copy, so a torn frame is never returned.
+
+The output service (output_service.py) maps every ring read-only. It does
+routing, gamma and the FPP mmap write in one place, so producers can run in
+separate processes without fighting over the overlay buffer.
+"""
+
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+RING_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+MAGIC = b"TWRING1\0"
+VERSION = 1
+# magic, version, width, height, slots, frame bytes, writer pid
+HEADER = struct.Struct("<8sIIIIII")
+HEADER_SIZE = 64
+PUBLISHED_OFFSET = 32   # uint64: frames published so far
+HEARTBEAT_OFFSET = 40   # float64: time.time() of the last publish
+SLOT_HEADER_SIZE = 16   # uint64 sequence, float64 publish time
+DEFAULT_SLOTS = 4
+
+
+def ring_path(name):
+    """Path of the ring file for a producer name."""
+    return os.path.join(RING_DIR, f"TwinklyWall-Ring-{name.replace(' ', '_')}")
+
+
+def _slot_stride(frame_bytes):
+    # Keep every slot header 64-byte aligned so sequence numbers never straddle a cache line
+    return -(-(SLOT_HEADER_SIZE + frame_bytes) // 64) * 64
+
+
+class _RingMapping:
+    """numpy views over a mapped ring file."""
+
+    def __init__(self, path, mode):
+        self.path = path
+        self.stat = os.stat(path)
+        self.map = np.memmap(path, dtype=np.uint8, mode=mode)
+        magic, version, width, height, slots, frame_bytes, pid = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a frame ring: {path}")
+        self.width = width
+        self.height = height
+        self.slots = slots
+        self.frame_bytes = frame_bytes
+        self.pid = pid
+        stride = _slot_stride(frame_bytes)
+        if self.map.size < HEADER_SIZE + slots * stride:
+            raise ValueError(f"Frame ring is truncated: {path}")
+        self.published = self.map[PUBLISHED_OFFSET:PUBLISHED_OFFSET + 8].view(np.uint64)
+        self.heartbeat = self.map[HEARTBEAT_OFFSET:HEARTBEAT_OFFSET + 8].view(np.float64)
+        slot_bytes = self.map[HEADER_SIZE:HEADER_SIZE + slots * stride].reshape(slots, stride)
+        self.seq = [slot_bytes[i, 0:8].view(np.uint64) for i in range(slots)]
+        self.stamp = [slot_bytes[i, 8:16].view(np.float64) for i in range(slots)]
+        self.frames = [slot_bytes[i, SLOT_HEADER_SIZE:SLOT_HEADER_SIZE + frame_bytes].reshape(height, width, 3)
+                       for i in range(slots)]
+
+    def close(self):
+        # Dropping every view unmaps the file once numpy releases the memmap
+        self.seq = self.stamp = self.frames = self.published = self.heartbeat = None
+        self.map = None
+
+
+class FrameRingWriter:
+    """Producer side of a frame ring.
+
+    Has the same write()/write_solid()/close() surface as FPPOutput, so a
+    DotMatrix or the DDP bridge can publish to a ring instead of owning the
+    FPP overlay buffer.
+    """
+
+    write_mode = "ring"
+
+    def __init__(self, name, width, height, slots=DEFAULT_SLOTS):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.path = ring_path(name)
+        self.last_flush_ms = 0.0
+        self._ring = self._open_or_create(max(2, int(slots)))
+        self._published = int(self._ring.published[0])
+
+    def _open_or_create(self, slots):
+        frame_bytes = self.width * self.height * 3
+        try:
+            ring = _RingMapping(self.path, "r+")
+            if (ring.width, ring.height, ring.frame_bytes) == (self.width, self.height, frame_bytes):
+                # Restarted producer: keep counting so readers see the sequence move forward
+                HEADER.pack_into(ring.map, 0, MAGIC, VERSION, self.width, self.height, ring.slots, frame_bytes, os.getpid())
+                return ring
+            ring.close()
+        except (OSError, ValueError):
+            pass
+
+        # Build the file beside its final path and rename it in, so readers never map a half-written header
+        size = HEADER_SIZE + slots * _slot_stride(frame_bytes)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.truncate(size)
+            f.write(HEADER.pack(MAGIC, VERSION, self.width, self.height, slots, frame_bytes, os.getpid()))
+        os.replace(tmp_path, self.path)
+        return _RingMapping(self.path, "r+")
+
+    def write(self, dot_colors):
+        """Publish one frame. Returns elapsed ms."""
+        start = time.perf_counter()
+        frame = dot_colors if isinstance(dot_colors, np.ndarray) else np.asarray(dot_colors, dtype=np.uint8)
+        ring = self._ring
+        n = self._published
+        slot = n % ring.slots
+        ring.seq[slot][0] = 2 * n + 1
+        ring.frames[slot][...] = frame
+        now = time.time()
+        ring.stamp[slot][0] = now
+        ring.seq[slot][0] = 2 * n + 2
+        self._published = n + 1
+        ring.published[0] = n + 1
+        ring.heartbeat[0] = now
+        return (time.perf_counter() - start) * 1000
+
+    def write_solid(self, r, g, b):
+        """Publish a frame of one color. Returns elapsed ms."""
+        frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        frame[...] = (int(r) & 0xFF, int(g) & 0xFF, int(b) & 0xFF)
+        return self.write(frame)
+
+    def release(self):
+        """Tell the output service this producer is done, so its layer drops out
+        on the next poll instead of after the stale timeout."""
+        if self._ring is not None:
+            self._ring.heartbeat[0] = 0.0
+
+    def close(self):
+        """Unmap the ring. The file stays so the output service keeps the last frame."""
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+
+
+class FrameRingReader:
+    """Consumer side of a frame ring (lock-free, read-only)."""
+
+    def __init__(self, name, width=None, height=None, retries=3):
+        self.name = name
+        self.path = ring_path(name)
+        self.width = width
+        self.height = height
+        self.retries = retries
+        self.last_seq = None      # sequence of the last frame returned by read_latest
+        self.torn_reads = 0       # copies discarded because the writer reused the slot mid-copy
+        self._ring = None
+
+    @property
+    def is_open(self):
+        return self._ring is not None
+
+    def open(self):
+        """Map the ring if its producer has created it. Returns True when mapped."""
+        if self._ring is not None:
+            return True
+        try:
+            ring = _RingMapping(self.path, "r")
+        except (OSError, ValueError):
+            return False
+        if self.width is not None and (ring.width, ring.height) != (self.width, self.height):
+            ring.close()
+            raise ValueError(f"Ring {self.name} is {ring.width}x{ring.height}, expected {self.width}x{self.height}")
+        self._ring = ring
+        return True
+
+    def refresh(self):
+        """Remap if the producer recreated the ring file (e.g. with a new size)."""
+        if self._ring is None:
+            return self.open()
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return True
+        if (st.st_ino, st.st_dev) != (self._ring.stat.st_ino, self._ring.stat.st_dev):
+            self.close()
+            self.last_seq = None
+            return self.open()
+        return True
+
+    @property
+    def published(self):
+        """Frames published by the producer so far (0 if the ring is not mapped)."""
+        return int(self._ring.published[0]) if self._ring is not None else 0
+
+    def age(self):
+        """Seconds since the producer last published (inf if never, or released)."""
+        if self._ring is None or self._ring.published[0] == 0 or self._ring.heartbeat[0] == 0:
+            return float("inf")
+        return time.time() - float(self._ring.heartbeat[0])
+
+    def has_new(self):
+        """True if a frame newer than the last one read is available."""
+        return self._ring is not None and self.published > 0 and self.published != self.last_seq
+
+    def read_latest(self, out):
+        """Copy the newest complete frame into out (H x W x 3 uint8).
+
+        Returns the frame's sequence number, or None if there is nothing newer
+        than the last frame returned.
+        """
+        ring = self._ring
+        if ring is None:
+            return None
+        for _ in range(self.retries):
+            n = int(ring.published[0])
+            if n == 0 or n == self.last_seq:
+                return None
+            slot = (n - 1) % ring.slots
+            expected = 2 * (n - 1) + 2
+            if int(ring.seq[slot][0]) != expected:
+                # The writer has already lapped this slot; look again at the newer head
+                self.torn_reads += 1
+                continue
+            out[...] = ring.frames[slot]
+            if int(ring.seq[slot][0]) == expected:
+                self.last_seq = n
+                return n
+            self.torn_reads += 1
+        return None
+
+    def close(self):
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
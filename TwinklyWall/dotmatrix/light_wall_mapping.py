@@ -1,7 +1,21 @@
 import csv
+import glob
+import hashlib
+import os
 
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
 
-def load_light_wall_mapping(csv_file="dotmatrix/Light Wall Mapping.csv"):
+DEFAULT_MAPPING_CSV = "dotmatrix/Light Wall Mapping.csv"
+MAX_PIXELS = 4500
+# Bump when build_routing_indices() changes so stale compiled maps are rebuilt
+STAGGER_RULE = "stagger-v1:even=2r,odd=2r+1,clamp>98->97"
+
+
+def load_light_wall_mapping(csv_file=DEFAULT_MAPPING_CSV):
     mapping = {}
     try:
         with open(csv_file, 'r') as csv_file_handle:
@@ -36,3 +50,77 @@ def create_fpp_buffer_from_grid(dot_colors, mapping):
                 buffer[byte_index + 1] = green
                 buffer[byte_index + 2] = blue
     return buffer
+
+
+def build_routing_indices(mapping, width, height):
+    """Route visual grid cells to FPP pixel indices.
+
+    Maps visual canvas (50x90) to physical LED wall (99x90 with staggering):
+    even columns use physical_row = visual_row * 2, odd columns use
+    visual_row * 2 + 1. The last visual row for odd columns (row 99) is
+    clamped to row 97 to fit within bounds.
+
+    Returns (src_indices, dest_indices) lists, where src is the flattened
+    visual index (row * width + col) and dest is the FPP pixel index.
+    """
+    dest_indices = []
+    src_indices = []
+    for visual_row in range(height):
+        for visual_col in range(width):
+            physical_row = visual_row * 2 + (visual_col % 2)
+            if physical_row > 98:
+                physical_row = 97  # Last odd row
+            pixel_idx = mapping.get((physical_row, visual_col))
+            if pixel_idx is not None and 0 <= pixel_idx < MAX_PIXELS:
+                dest_indices.append(pixel_idx)
+                src_indices.append(visual_row * width + visual_col)
+    return src_indices, dest_indices
+
+
+def _routing_cache_key(csv_file, width, height):
+    digest = hashlib.sha1()
+    try:
+        with open(csv_file, 'rb') as f:
+            digest.update(f.read())
+    except FileNotFoundError:
+        digest.update(b"<linear fallback>")
+    digest.update(f"|{width}x{height}|{STAGGER_RULE}".encode())
+    return digest.hexdigest()[:16]
+
+
+def load_routing_arrays(width, height, csv_file=DEFAULT_MAPPING_CSV, cache_dir=None, rebuild=False):
+    """Return (src, dest) int32 routing arrays, using a compiled cache when possible.
+
+    The compiled map is a 2 x N int32 .npy named after a hash of the CSV
+    contents, width, height and stagger rule, so it is rebuilt automatically
+    when any of them change. It is loaded with mmap_mode='r'. If the cache
+    directory is not writable the arrays are simply built in memory.
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(csv_file) or ".", ".routing_cache")
+    key = _routing_cache_key(csv_file, width, height)
+    cache_path = os.path.join(cache_dir, f"routing_{width}x{height}_{key}.npy")
+
+    if not rebuild and os.path.exists(cache_path):
+        try:
+            compiled = np.load(cache_path, mmap_mode='r')
+            if compiled.ndim == 2 and compiled.shape[0] == 2:
+                return compiled[0], compiled[1]
+        except (OSError, ValueError):
+            pass
+
+    src, dest = build_routing_indices(load_light_wall_mapping(csv_file), width, height)
+    compiled = np.array([src, dest], dtype=np.int32).reshape(2, -1)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Remove compiled maps for older CSV revisions of the same size
+        for stale in glob.glob(os.path.join(cache_dir, f"routing_{width}x{height}_*.npy")):
+            if stale != cache_path:
+                os.remove(stale)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, compiled)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Routing cache not written ({e}); using in-memory map")
+    return compiled[0], compiled[1]
@@ -0,0 +1,78 @@
+"""Long-lived DotMatrix instances borrowed by game and video sessions."""
+
+import threading
+import time
+
+
+class MatrixPool:
+    """Keeps one DotMatrix per named output context alive across sessions.
+
+    Building a DotMatrix opens the FPP mmap, loads the routing map and (when
+    windowed) initializes pygame. A session that acquire()s a context gets the
+    existing instance; release() only blanks the output (or releases the ring
+    layer) so the next session starts at the cost of allocating its canvas.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._factories = {}
+        self._matrices = {}
+        self._owners = {}
+        self.builds = 0
+        self.reuses = 0
+        self.last_acquire_ms = 0.0
+
+    def register(self, name, factory):
+        """Declare how to build the context name (factory() -> DotMatrix). Built on first acquire."""
+        with self._lock:
+            self._factories[name] = factory
+
+    def get(self, name):
+        """The context's matrix, building it if needed, without taking ownership."""
+        with self._lock:
+            return self._get_locked(name)
+
+    def _get_locked(self, name):
+        matrix = self._matrices.get(name)
+        if matrix is None:
+            matrix = self._factories[name]()
+            self._matrices[name] = matrix
+            self.builds += 1
+        return matrix
+
+    def acquire(self, name, owner=None):
+        """Borrow a context for a session. Returns the DotMatrix."""
+        start = time.perf_counter()
+        with self._lock:
+            if name in self._matrices:
+                self.reuses += 1
+            matrix = self._get_locked(name)
+            self._owners[name] = owner
+        self.last_acquire_ms = (time.perf_counter() - start) * 1000
+        return matrix
+
+    def release(self, name):
+        """End a session: blank the output but keep the context for the next one."""
+        with self._lock:
+            matrix = self._matrices.get(name)
+            self._owners.pop(name, None)
+        if matrix is not None:
+            matrix.blank()
+
+    def owner(self, name):
+        with self._lock:
+            return self._owners.get(name)
+
+    def is_built(self, name):
+        with self._lock:
+            return name in self._matrices
+
+    def close(self, name=None):
+        """Shut down one context (or all of them); the next acquire rebuilds it."""
+        with self._lock:
+            names = [name] if name is not None else list(self._matrices)
+            matrices = [self._matrices.pop(n) for n in names if n in self._matrices]
+            for n in names:
+                self._owners.pop(n, None)
+        for matrix in matrices:
+            matrix.shutdown()
@@ -17,12 +17,24 @@ class PerformanceMonitor:
             'fpp_write': [],
             'total': []
         }
+        self.stage_labels = {}   # stage -> short note shown in the report (e.g. write mode)
+        self.stage_details = {}  # stage -> {detail name -> [ms, ...]}
+        self.frame_clock = None  # FrameClock pacing the frames, if any (summary shown in the report)
 
     def record(self, stage, duration_ms):
         """Record timing for a stage."""
         if self.enabled:
             self.stage_timings[stage].append(duration_ms)
 
+    def label(self, stage, text):
+        """Attach a short note to a stage in the report."""
+        self.stage_labels[stage] = text
+
+    def record_detail(self, stage, name, duration_ms):
+        """Record a sub-timing that is reported underneath its stage."""
+        if self.enabled:
+            self.stage_details.setdefault(stage, {}).setdefault(name, []).append(duration_ms)
+
     def frame_complete(self):
         """Mark frame as complete and log if needed."""
         if not self.enabled:
@@ -53,7 +65,11 @@ class PerformanceMonitor:
                 avg = sum(times) / len(times)
                 min_t = min(times)
                 max_t = max(times)
-                print(f"  {stage:20s}: {avg:6.2f}ms (min: {min_t:5.2f}ms, max: {max_t:5.2f}ms)")
+                note = f" [{self.stage_labels[stage]}]" if stage in self.stage_labels else ""
+                print(f"  {stage:20s}: {avg:6.2f}ms (min: {min_t:5.2f}ms, max: {max_t:5.2f}ms){note}")
+                for name, detail in self.stage_details.get(stage, {}).items():
+                    if detail:
+                        print(f"    {name:18s}: {sum(detail) / len(detail):6.2f}ms")
 
         if self.stage_timings['total']:
             avg_total = sum(self.stage_timings['total']) / len(self.stage_timings['total'])
@@ -61,6 +77,8 @@ class PerformanceMonitor:
                 frame_budget = 1000.0 / float(self.target_fps)
                 print(f"\nFrame budget: {frame_budget:5.2f}ms ({self.target_fps:.0f} FPS target)")
                 print(f"Headroom: {frame_budget - avg_total:6.2f}ms")
+        if self.frame_clock is not None and self.frame_clock.ticks:
+            print(f"Pacing: {self.frame_clock.summary()}")
         print(f"{'='*60}\n")
 
     def _reset(self):
@@ -68,3 +86,6 @@ class PerformanceMonitor:
         self.frame_count = 0
         for stage in self.stage_timings:
             self.stage_timings[stage].clear()
+        for details in self.stage_details.values():
+            for detail in details.values():
+                detail.clear()
@@ -94,7 +94,8 @@ def wait_for_health(timeout_sec: int = 20, url: str = "http://localhost:5000/api
 
 
 def has_rendered_videos(tw_dir: Path) -> bool:
-    rendered = list((tw_dir / "dotmatrix" / "rendered_videos").glob("*.npz"))
+    rendered_dir = tw_dir / "dotmatrix" / "rendered_videos"
+    rendered = list(rendered_dir.glob("*.twv")) + list(rendered_dir.glob("*.npz"))
     return len(rendered) > 0
 
 
@@ -0,0 +1,243 @@
+"""Low-latency UDP input channel for game controllers.
+
+Phones send one small binary datagram per button press instead of an HTTP
+POST to /api/game/heartbeat. The server decodes it and calls
+players.handle_input directly, so there is no JSON parse, no request
+dispatch and no TCP round trip in the input path. The HTTP endpoint stays as
+the fallback for clients that cannot reach the UDP port.
+
+Wire format (little-endian, 20 bytes, INPUT_PACKET):
+    magic     2s   b"TI"
+    version   u8   1
+    slot      u8   player index returned by /api/game/join (informational)
+    cmd       u8   index into COMMANDS
+    flags     u8   reserved (0)
+    reserved  2x
+    seq       u32  per-client sequence, incremented per packet
+    client_ms u64  client monotonic clock in ms (echoed back in the ack)
+
+A HELLO packet carries the UTF-8 player_id after the header and binds the
+sender's address to that player. Later packets from the same address are
+routed to it. Anything else from an address without a binding, or whose
+player has since left or timed out, is acked ACK_UNKNOWN_PLAYER and not
+applied: slots shift when a player leaves, so routing by slot would hand a
+departed phone someone else's pieces. The client then says HELLO again or
+falls back to HTTP.
+
+Every packet is answered with an ack (ACK_PACKET, 20 bytes):
+    magic b"TA", version, status (ACK_*), seq, client_ms, server_us u32
+
+so the client can measure round-trip time. Duplicated or reordered packets
+(seq not newer than the last one from that address) are acked with
+ACK_STALE and not applied.
+"""
+
+import os
+import socket
+import struct
+import threading
+import time
+
+from game_players import get_game_for_player, heartbeat
+from latency_stats import LatencyHistogram
+from logger import log
+from players import handle_input
+
+DEFAULT_INPUT_PORT = int(os.environ.get("TWINKLYWALL_INPUT_PORT", 5001))
+
+INPUT_MAGIC = b"TI"
+ACK_MAGIC = b"TA"
+VERSION = 1
+INPUT_PACKET = struct.Struct("<2sBBBBxxIQ")
+ACK_PACKET = struct.Struct("<2sBBIQI")
+
+# Command codes are indices into this tuple; append only
+COMMANDS = (
+    "HELLO",
+    "HEARTBEAT",
+    "MOVE_LEFT",
+    "MOVE_RIGHT",
+    "ROTATE_LEFT",
+    "ROTATE_RIGHT",
+    "MOVE_DOWN",
+    "HARD_DROP",
+    "MOVE_LEFT_HELD",
+    "MOVE_RIGHT_HELD",
+)
+CMD_HELLO = 0
+CMD_HEARTBEAT = 1
+
+ACK_OK = 0
+ACK_UNKNOWN_PLAYER = 1
+ACK_STALE = 2
+ACK_BAD_PACKET = 3
+
+
+def encode_input(slot, cmd, seq, client_ms, player_id=None):
+    """Build an input datagram (cmd is a COMMANDS name or index)."""
+    code = COMMANDS.index(cmd) if isinstance(cmd, str) else int(cmd)
+    packet = INPUT_PACKET.pack(INPUT_MAGIC, VERSION, slot, code, 0, seq & 0xFFFFFFFF, int(client_ms))
+    if player_id is not None:
+        packet += player_id.encode("utf-8")
+    return packet
+
+
+def decode_ack(data):
+    """(status, seq, client_ms, server_us) from an ack datagram."""
+    magic, version, status, seq, client_ms, server_us = ACK_PACKET.unpack_from(data)
+    if magic != ACK_MAGIC:
+        raise ValueError("Not an input ack")
+    return status, seq, client_ms, server_us
+
+
+def _seq_newer(seq, last):
+    # Serial-number comparison so the 32-bit sequence may wrap
+    return last is None or 0 < ((seq - last) & 0xFFFFFFFF) < 0x80000000
+
+
+class GameInputServer:
+    """UDP server that feeds controller packets into the player registry."""
+
+    def __init__(self, host="0.0.0.0", port=DEFAULT_INPUT_PORT, game="tetris"):
+        self.host = host
+        self.port = port
+        self.game = game
+        self.sock = None
+        self.handle_ms = LatencyHistogram()        # receive -> handle_input returned
+        self.delay_jitter_ms = LatencyHistogram()  # one-way delay above the best seen per client
+        self.packets = 0
+        self.bad_packets = 0
+        self.stale_packets = 0
+        self.unknown_player = 0
+        self._bound = {}        # addr -> player_id (from HELLO)
+        self._last_seq = {}     # addr -> last applied seq
+        self._min_offset = {}   # addr -> min(server_ms - client_ms): the fastest path seen
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """Bind the socket and serve on a daemon thread."""
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.port = self.sock.getsockname()[1]
+        self.sock.settimeout(0.5)
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        print(f"Game input: listening on UDP {self.host}:{self.port}")
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def _serve(self):
+        buf = bytearray(512)
+        view = memoryview(buf)
+        while self._running:
+            try:
+                n, addr = self.sock.recvfrom_into(buf)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            recv_time = time.perf_counter()
+            try:
+                ack = self.handle_packet(view[:n], addr, recv_time)
+            except Exception as e:
+                # A game handler raising must not take the input channel down with it
+                log(f"Error handling input from {addr[0]}:{addr[1]}: {e}", level='ERROR', module="GameInput")
+                continue
+            if ack:
+                try:
+                    self.sock.sendto(ack, addr)
+                except OSError:
+                    pass
+
+    def handle_packet(self, data, addr, recv_time=None):
+        """Apply one datagram. Returns the ack bytes to send back."""
+        recv_time = time.perf_counter() if recv_time is None else recv_time
+        self.packets += 1
+        if len(data) < INPUT_PACKET.size:
+            self.bad_packets += 1
+            return None
+        magic, version, _slot, code, _flags, seq, client_ms = INPUT_PACKET.unpack_from(data)
+        if magic != INPUT_MAGIC or version != VERSION or code >= len(COMMANDS):
+            self.bad_packets += 1
+            return self._ack(ACK_BAD_PACKET, seq, client_ms, recv_time) if magic == INPUT_MAGIC else None
+
+        if code == CMD_HELLO:
+            player_id = bytes(data[INPUT_PACKET.size:]).decode("utf-8", "replace")
+            if get_game_for_player(player_id) is None:
+                self.unknown_player += 1
+                return self._ack(ACK_UNKNOWN_PLAYER, seq, client_ms, recv_time)
+            self._bound[addr] = player_id
+            self._last_seq[addr] = seq
+            self._min_offset.pop(addr, None)
+            heartbeat(player_id)
+            log(f"🎮 UDP input bound {addr[0]}:{addr[1]} -> {player_id}", module="GameInput")
+            return self._ack(ACK_OK, seq, client_ms, recv_time)
+
+        player_id = self._resolve(addr)
+        if player_id is None:
+            self.unknown_player += 1
+            return self._ack(ACK_UNKNOWN_PLAYER, seq, client_ms, recv_time)
+        if not _seq_newer(seq, self._last_seq.get(addr)):
+            self.stale_packets += 1
+            return self._ack(ACK_STALE, seq, client_ms, recv_time)
+        self._last_seq[addr] = seq
+        self._record_delay(addr, client_ms)
+
+        heartbeat(player_id)
+        if code != CMD_HEARTBEAT:
+            handle_input(player_id, {
+                "player_id": player_id,
+                "cmd": COMMANDS[code],
+                "seq": seq,
+                "client_ms": client_ms,
+                "transport": "udp",
+                "recv_t": recv_time,
+            })
+        self.handle_ms.record((time.perf_counter() - recv_time) * 1000)
+        return self._ack(ACK_OK, seq, client_ms, recv_time)
+
+    def _resolve(self, addr):
+        """The player this address said HELLO as, or None (never bound, or that player has left)."""
+        player_id = self._bound.get(addr)
+        if player_id is not None and get_game_for_player(player_id) is None:
+            # Left or timed out: forget the address until it says HELLO again
+            del self._bound[addr]
+            self._last_seq.pop(addr, None)
+            self._min_offset.pop(addr, None)
+            return None
+        return player_id
+
+    def _record_delay(self, addr, client_ms):
+        # Clocks are not synchronized, so track delay relative to the fastest packet seen from this client
+        offset = time.monotonic() * 1000 - client_ms
+        best = self._min_offset.get(addr)
+        if best is None or offset < best:
+            self._min_offset[addr] = best = offset
+        self.delay_jitter_ms.record(offset - best)
+
+    def _ack(self, status, seq, client_ms, recv_time):
+        server_us = min(0xFFFFFFFF, int((time.perf_counter() - recv_time) * 1e6))
+        return ACK_PACKET.pack(ACK_MAGIC, VERSION, status, seq, client_ms, server_us)
+
+    def stats(self):
+        return {
+            "port": self.port,
+            "packets": self.packets,
+            "bad_packets": self.bad_packets,
+            "stale_packets": self.stale_packets,
+            "unknown_player": self.unknown_player,
+            "bound_clients": len(self._bound),
+            "handle": self.handle_ms.to_dict(),
+            "delay_jitter": self.delay_jitter_ms.to_dict(),
+        }
@@ -0,0 +1,80 @@
+"""Fixed-timestep game simulation on its own thread.
+
+Game logic used to run in the render loop, so a slow frame (FPP write,
+pacing sleep) delayed gravity and input. SimulationThread steps the game
+at a fixed rate with a constant dt on a thread of its own; the render
+loop only draws whatever the last step published.
+"""
+
+import threading
+import time
+import traceback
+
+from dotmatrix import FrameClock
+from latency_stats import LatencyHistogram
+from logger import log
+
+
+class SimulationThread:
+    """Calls step(dt) rate times a second on a daemon thread, always with dt = 1 / rate.
+
+    Deadlines come from a FrameClock with the catch_up policy: after a stall
+    the owed steps run back to back (up to max_catch_up), so game time keeps
+    up with the wall clock; a longer stall resyncs instead of bursting.
+    Because dt never varies, a game's course depends only on the inputs each
+    step sees.
+
+    If step raises, the error is logged and kept in .error and the thread
+    stops; .stopped is set whenever the thread is no longer stepping and
+    .first_step once the first step has returned.
+    """
+
+    def __init__(self, step, rate, name="simulation", max_catch_up=5):
+        self.step = step
+        self.rate = rate
+        self.dt = 1.0 / rate
+        self.name = name
+        self.clock = FrameClock(rate, policy="catch_up", max_catch_up=max_catch_up)
+        self.step_ms = LatencyHistogram()
+        self.steps = 0
+        self.error = None
+        self.stopped = threading.Event()
+        self.first_step = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.stopped.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self.stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _run(self):
+        try:
+            while not self.stopped.is_set():
+                self.clock.tick(self.stopped)
+                if self.stopped.is_set():
+                    break
+                start = time.perf_counter()
+                self.step(self.dt)
+                self.step_ms.record((time.perf_counter() - start) * 1000)
+                self.steps += 1
+                self.first_step.set()
+        except Exception as e:
+            self.error = e
+            log(f"Error in {self.name} step: {e}\n{traceback.format_exc()}", level='ERROR', module="GameLoop")
+        finally:
+            self.stopped.set()
+
+    def stats(self):
+        return {
+            "rate": self.rate,
+            "steps": self.steps,
+            "step": self.step_ms.to_dict(),
+            "pacing": self.clock.stats(),
+        }
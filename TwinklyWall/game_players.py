@@ -2,8 +2,13 @@
 
 from __future__ import annotations
 
+import heapq
+import itertools
+import threading
 import time
-from typing import Dict, List, Optional
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
 
 from players import Player, register_player, set_input_handler, get_registry, InputPayload
 from logger import log
@@ -17,93 +22,254 @@ GAME_LIMITS = {
 PLAYER_TIMEOUT_SEC = 10  # Mark player as idle if no heartbeat for 10s (matches heartbeat interval)
 
 
-class GamePlayerManager:
-    """Tracks active players per game, enforces limits, and detects disconnects."""
+@dataclass(frozen=True)
+class PlayerEntry:
+    """One tracked player. player is None for a heartbeat from someone who never joined."""
+
+    player: Optional[Player]
+    game: Optional[str]
+    phone_id: Optional[str]
+    joined_at: float  # time.time()
+    token: int  # matches the player's current deadline heap entry
+
+
+@dataclass(frozen=True)
+class PlayersSnapshot:
+    """Who is in which game. Never mutated: every join/leave publishes a new one."""
+
+    games: Mapping[str, Tuple[Player, ...]]  # game -> players in join order
+    entries: Mapping[str, PlayerEntry]  # player_id -> entry
+    version: int = 0
+
+
+_EMPTY = PlayersSnapshot(MappingProxyType({}), MappingProxyType({}))
 
-    def __init__(self):
-        self._active_by_game: Dict[str, List[str]] = {}  # game -> [player_id, ...]
-        self._last_heartbeat: Dict[str, float] = {}  # player_id -> timestamp
-        self._player_metadata: Dict[str, dict] = {}  # player_id -> {game, joined_at, ...}
+
+class GamePlayerManager:
+    """Tracks active players per game, enforces limits, and detects disconnects.
+
+    Membership is a copy-on-write PlayersSnapshot. Writers (join, leave,
+    expiry) build the next snapshot and swap it in under one short lock;
+    readers (request handlers, the Tetris monitor, game code) take
+    self._snapshot with a single attribute read and never lock or see a
+    half-applied change.
+
+    Idle expiry keeps one (deadline, player_id, token) entry per player in a
+    min-heap on the monotonic clock. heartbeat() only stores the time; when
+    an entry comes due its deadline is recomputed from the last heartbeat and
+    pushed back if the player was heard from since. The start_expiry() thread
+    sleeps on a condition variable until the earliest deadline, so a wakeup
+    only touches players that may have timed out instead of scanning everyone.
+    """
+
+    def __init__(self, timeout_sec: float = PLAYER_TIMEOUT_SEC):
+        self.timeout_sec = timeout_sec
+        self._snapshot = _EMPTY
+        self._last_heartbeat: Dict[str, float] = {}  # player_id -> time.monotonic()
+        self._deadlines: List[Tuple[float, str, int]] = []  # heap of (deadline, player_id, token)
+        self._tokens = itertools.count()  # a rejoin gets a new token, so older heap entries are dropped
+        # Serialises writers and guards the heartbeat/deadline state; notified when the earliest
+        # deadline moves earlier or expiry stops
+        self._cond = threading.Condition()
+        self._expiring = False
+        self._changed = threading.Event()  # set on every join/leave so session monitors wake at once
+
+    def snapshot(self) -> PlayersSnapshot:
+        """The current membership snapshot (lock-free; stays consistent however long it is held)."""
+        return self._snapshot
+
+    def _publish(self, games: Dict[str, Tuple[Player, ...]], entries: Dict[str, PlayerEntry]) -> None:
+        """Swap in a new snapshot. Caller holds _cond."""
+        self._snapshot = PlayersSnapshot(MappingProxyType(games), MappingProxyType(entries),
+                                         self._snapshot.version + 1)
 
     def can_join(self, game: str) -> bool:
         """Check if a new player can join this game (respects limits)."""
         limit = GAME_LIMITS.get(game)
         if limit is None:
             return True  # No limit
-        current_count = len(self._active_by_game.get(game, []))
-        return current_count < limit
+        return len(self._snapshot.games.get(game, ())) < limit
 
     def join(self, player_id: str, phone_id: Optional[str] = None, game: str = "tetris") -> bool:
         """
         Register a new player for a game if the limit allows.
         Returns True if successful, False if game is full.
         """
-        if not self.can_join(game):
+        with self._cond:
+            full = not self.can_join(game)
+            if not full:
+                # Register with the shared registry
+                player = register_player(player_id, phone_id=phone_id, game=game)
+
+                # Track in our game-specific manager
+                snapshot = self._snapshot
+                games = dict(snapshot.games)
+                members = games.get(game, ())
+                if all(member.player_id != player_id for member in members):
+                    members += (player,)
+                games[game] = members
+                entries = dict(snapshot.entries)
+                entries[player_id] = PlayerEntry(player, game, phone_id, time.time(), self._schedule(player_id))
+                self._publish(games, entries)
+                count = len(members)
+
+        if full:
             log(f"Game {game} is full, rejecting join from {player_id}", level='WARNING', module="GamePlayers")
             return False
-
-        # Register with the shared registry
-        register_player(player_id, phone_id=phone_id, game=game)
-
-        # Track in our game-specific manager
-        if game not in self._active_by_game:
-            self._active_by_game[game] = []
-        if player_id not in self._active_by_game[game]:
-            self._active_by_game[game].append(player_id)
-
-        self._last_heartbeat[player_id] = time.time()
-        self._player_metadata[player_id] = {
-            "game": game,
-            "joined_at": time.time(),
-            "phone_id": phone_id,
-        }
-
-        log(f"Player {phone_id} ({player_id}) joined {game}. Total in game: {len(self._active_by_game[game])}", module="GamePlayers")
+        log(f"Player {phone_id} ({player_id}) joined {game}. Total in game: {count}", module="GamePlayers")
+        self._changed.set()
         return True
 
     def leave(self, player_id: str) -> None:
         """Remove a player from all games (called on disconnect/timeout/backout)."""
-        registry = get_registry()
-        registry.unregister(player_id)
-
-        # Remove from all games
-        for game_list in self._active_by_game.values():
-            if player_id in game_list:
-                game_list.remove(player_id)
-
+        with self._cond:
+            self._remove_locked(player_id)
+        self._changed.set()
+
+    def _remove_locked(self, player_id: str) -> None:
+        """leave() without the lock or the change signal. Caller holds _cond."""
+        # Under our lock, like register_player() in join(), so the registry and the snapshot agree
+        get_registry().unregister(player_id)
+        snapshot = self._snapshot
+        if player_id in snapshot.entries:
+            # Remove from all games
+            games = {game: tuple(member for member in members if member.player_id != player_id)
+                     for game, members in snapshot.games.items()}
+            entries = dict(snapshot.entries)
+            del entries[player_id]
+            self._publish(games, entries)
         self._last_heartbeat.pop(player_id, None)
-        self._player_metadata.pop(player_id, None)
+        # The heap entry is dropped when it comes due; rebuild if churn left mostly dead entries
+        if len(self._deadlines) > 2 * len(self._snapshot.entries) + 64:
+            self._deadlines = [entry for entry in self._deadlines if self._is_current(entry)]
+            heapq.heapify(self._deadlines)
+
+    def wait_for_change(self, timeout: Optional[float] = None) -> bool:
+        """Block until a player joins or leaves (or timeout). Returns True if something changed."""
+        changed = self._changed.wait(timeout)
+        self._changed.clear()
+        return changed
+
+    def first_joined_at(self, game: str) -> Optional[float]:
+        """time.time() of the earliest join among the game's current players."""
+        snapshot = self._snapshot
+        stamps = [snapshot.entries[member.player_id].joined_at for member in snapshot.games.get(game, ())]
+        return min(stamps) if stamps else None
 
     def heartbeat(self, player_id: str) -> None:
         """Update the last-seen timestamp for a player (called on any input/ping)."""
-        self._last_heartbeat[player_id] = time.time()
-
-    def get_idle_players(self, timeout_sec: float = PLAYER_TIMEOUT_SEC) -> List[str]:
-        """Return player IDs that have not sent a heartbeat in timeout_sec."""
-        now = time.time()
-        idle = []
-        for player_id, last_ts in self._last_heartbeat.items():
-            if (now - last_ts) > timeout_sec:
-                idle.append(player_id)
-        return idle
-
-    def cleanup_idle(self, timeout_sec: float = PLAYER_TIMEOUT_SEC) -> None:
-        """Remove all idle players."""
-        for player_id in self.get_idle_players(timeout_sec):
-            game = self._player_metadata.get(player_id, {}).get("game", "unknown")
-            phone_id = self._player_metadata.get(player_id, {}).get("phone_id", player_id)
-            log(f"⏱️  TIMEOUT - Removing idle player: {phone_id} from {game} (no heartbeat for {timeout_sec}s)", module="GamePlayers")
-            self.leave(player_id)
+        with self._cond:
+            if player_id in self._snapshot.entries:
+                self._last_heartbeat[player_id] = time.monotonic()
+            else:
+                # Not joined (e.g. input after leaving): track it so it still times out of the registry
+                entries = dict(self._snapshot.entries)
+                entries[player_id] = PlayerEntry(None, None, player_id, time.time(), self._schedule(player_id))
+                self._publish(dict(self._snapshot.games), entries)
+
+    def _schedule(self, player_id: str) -> int:
+        """Start the player's idle timer. Returns its token. Caller holds _cond."""
+        now = time.monotonic()
+        token = next(self._tokens)
+        self._last_heartbeat[player_id] = now
+        heapq.heappush(self._deadlines, (now + self.timeout_sec, player_id, token))
+        if self._deadlines[0][2] == token:
+            self._cond.notify_all()
+        return token
+
+    def _is_current(self, entry: Tuple[float, str, int]) -> bool:
+        current = self._snapshot.entries.get(entry[1])
+        return current is not None and current.token == entry[2]
+
+    def _pop_expired(self, now: float) -> List[Tuple[str, PlayerEntry]]:
+        """Pop the players whose deadline has passed. Caller holds _cond."""
+        heap = self._deadlines
+        expired = []
+        while heap and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            if not self._is_current(entry):
+                continue
+            _, player_id, token = entry
+            deadline = self._last_heartbeat.get(player_id, 0.0) + self.timeout_sec
+            if deadline > now:
+                heapq.heappush(heap, (deadline, player_id, token))  # heard from since: push back
+            else:
+                expired.append((player_id, self._snapshot.entries[player_id]))
+        return expired
+
+    def _expire(self, expired: List[Tuple[str, PlayerEntry]]) -> int:
+        """Remove the popped players still idle. Returns how many were removed."""
+        removed = 0
+        for player_id, entry in expired:
+            with self._cond:
+                # _pop_expired decided under an earlier hold of the lock: check again
+                current = self._snapshot.entries.get(player_id)
+                if current is None or current.token != entry.token:
+                    continue  # left, or rejoined with a timer of its own
+                deadline = self._last_heartbeat.get(player_id, 0.0) + self.timeout_sec
+                if deadline > time.monotonic():
+                    heapq.heappush(self._deadlines, (deadline, player_id, entry.token))  # heartbeat just arrived
+                    continue
+                self._remove_locked(player_id)
+            removed += 1
+            game = entry.game or "unknown"
+            phone_id = entry.phone_id or player_id
+            log(f"⏱️  TIMEOUT - Removed idle player: {phone_id} from {game} (no heartbeat for {self.timeout_sec}s)", module="GamePlayers")
+            self._changed.set()
+        return removed
+
+    def get_idle_players(self, timeout_sec: Optional[float] = None) -> List[str]:
+        """Return player IDs that have not sent a heartbeat in timeout_sec (a full scan; for diagnostics)."""
+        timeout_sec = self.timeout_sec if timeout_sec is None else timeout_sec
+        now = time.monotonic()
+        with self._cond:
+            return [player_id for player_id, last_ts in self._last_heartbeat.items() if (now - last_ts) > timeout_sec]
+
+    def cleanup_idle(self) -> int:
+        """Remove players whose idle deadline has passed. Returns how many were removed."""
+        with self._cond:
+            expired = self._pop_expired(time.monotonic())
+        return self._expire(expired)
+
+    def start_expiry(self) -> threading.Thread:
+        """Start a daemon thread that removes idle players as their deadlines pass, until stop_expiry()."""
+        with self._cond:
+            self._expiring = True
+        thread = threading.Thread(target=self._expiry_loop, name="idle-expiry", daemon=True)
+        thread.start()
+        return thread
+
+    def stop_expiry(self) -> None:
+        """Wake the expiry thread and make it return."""
+        with self._cond:
+            self._expiring = False
+            self._cond.notify_all()
+
+    def _expiry_loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._expiring:
+                    now = time.monotonic()
+                    if self._deadlines and self._deadlines[0][0] <= now:
+                        break
+                    self._cond.wait(self._deadlines[0][0] - now if self._deadlines else None)
+                if not self._expiring:
+                    return
+                expired = self._pop_expired(time.monotonic())
+            # leave() logs and takes the registry lock: do it outside ours
+            try:
+                self._expire(expired)
+            except Exception as e:
+                log(f"Error expiring idle players: {e}", level='ERROR', module="GamePlayers")
 
     def get_active_players_for_game(self, game: str) -> List[Player]:
         """Return list of Player objects currently in this game."""
-        player_ids = self._active_by_game.get(game, [])
-        registry = get_registry()
-        return [registry._players[pid] for pid in player_ids if pid in registry._players]
+        return list(self._snapshot.games.get(game, ()))
 
     def get_game_for_player(self, player_id: str) -> Optional[str]:
         """Return the game a player is currently in, or None."""
-        return self._player_metadata.get(player_id, {}).get("game")
+        entry = self._snapshot.entries.get(player_id)
+        return entry.game if entry else None
 
     def is_game_full(self, game: str) -> bool:
         """Check if a game has reached its player limit."""
@@ -111,7 +277,7 @@ class GamePlayerManager:
 
     def player_count_for_game(self, game: str) -> int:
         """Get current player count for a game."""
-        return len(self._active_by_game.get(game, []))
+        return len(self._snapshot.games.get(game, ()))
 
 
 # Module-level singleton
@@ -141,6 +307,11 @@ def heartbeat(player_id: str) -> None:
     _game_manager.heartbeat(player_id)
 
 
+def players_snapshot() -> PlayersSnapshot:
+    """The current immutable view of every game's players (no lock taken)."""
+    return _game_manager.snapshot()
+
+
 def get_active_players_for_game(game: str) -> List[Player]:
     """Get list of Player objects currently in a game (use by index: [0], [1], etc.)."""
     return _game_manager.get_active_players_for_game(game)
@@ -156,11 +327,31 @@ def is_game_full(game: str) -> bool:
     return _game_manager.is_game_full(game)
 
 
-def cleanup_idle_players() -> None:
-    """Remove players that haven't sent a heartbeat (call periodically, e.g., every 5 sec)."""
-    _game_manager.cleanup_idle()
+def cleanup_idle_players() -> int:
+    """Remove players whose heartbeat deadline has passed now. Returns how many were removed."""
+    return _game_manager.cleanup_idle()
+
+
+def start_idle_expiry() -> threading.Thread:
+    """Start the thread that removes idle players at their heartbeat deadlines."""
+    return _game_manager.start_expiry()
+
+
+def stop_idle_expiry() -> None:
+    """Stop the idle expiry thread."""
+    _game_manager.stop_expiry()
 
 
 def player_count_for_game(game: str) -> int:
     """Get current player count for a game."""
     return _game_manager.player_count_for_game(game)
+
+
+def wait_for_player_change(timeout: Optional[float] = None) -> bool:
+    """Block until any player joins or leaves, or timeout. Returns True on a change."""
+    return _game_manager.wait_for_change(timeout)
+
+
+def first_joined_at(game: str) -> Optional[float]:
+    """Wall-clock time the current session's first player joined, or None."""
+    return _game_manager.first_joined_at(game)
@@ -0,0 +1,515 @@
+"""Numpy-backed board for Tetris.
+
+FastTetris is the Tetris game from tetris.py with the board kept in an int8
+array instead of a list of lists. tetris.py is left as written; this
+subclass only replaces the board-bound hot paths:
+
+- collision: each rotation state has a precomputed mask trimmed to its
+  filled cells, so a move test is one bounds check plus a masked slice test
+- rotation: all four SRS states of each piece and the SRS kick tables are
+  built at import; a turn is a lookup plus at most five collision tests
+- line clears: only after a lock, and only over the rows the piece
+  touched; one boolean row mask and a compaction
+- input: controller commands are queued by the network threads and
+  applied at the start of the next tick, on the thread running tick()
+- pieces: with a seed, the 7-bag shuffles with its own random.Random, so
+  a game is reproducible from its seed and the commands each tick applied
+  (see tetris_replay.py); without one it draws from the random module
+- drawing: each tick publishes a read-only TetrisSnapshot (the board with
+  the live piece on top, and the next piece). TetrisRenderer draws
+  snapshots into the canvas through a precomputed pixel -> cell map,
+  instead of 150 pygame.draw.rect calls per tick. Headless, it rewrites
+  only the cells whose color changed (locks, clears, the old and new piece
+  footprint) and the border and preview only when the next piece changes;
+  take_dirty() hands the changed canvas rects to DotMatrix.render_frame so
+  sampling and FPP routing skip the rest
+
+By default a FastTetris draws its own snapshots during tick(), like
+Tetris. Set renderer to None to only publish them, and draw them on
+another thread (see run_tetris in main.py).
+
+Board row 0 is the bottom row, the same orientation as Tetris.dead_grid.
+"""
+
+import random
+from collections import deque
+
+import numpy as np
+import pygame
+
+from game_players import get_active_players_for_game
+from games.tetris import Random_Bag, Tetris, Tetromino
+from players import set_input_handler
+
+
+# SRS spawn states (top row first, like Tetromino.shapes); the other states are
+# clockwise turns of the bounding box
+SRS_SPAWN = (
+    (),
+    ((0, 0, 0, 0), (1, 1, 1, 1), (0, 0, 0, 0), (0, 0, 0, 0)),   # I
+    ((2, 0, 0), (2, 2, 2), (0, 0, 0)),                          # J
+    ((0, 0, 3), (3, 3, 3), (0, 0, 0)),                          # L
+    ((0, 0, 0, 0), (0, 4, 4, 0), (0, 4, 4, 0), (0, 0, 0, 0)),   # O (never rotates)
+    ((0, 5, 5), (5, 5, 0), (0, 0, 0)),                          # S
+    ((6, 6, 0), (0, 6, 6), (0, 0, 0)),                          # Z
+    ((0, 7, 0), (7, 7, 7), (0, 0, 0)),                          # T
+)
+I_PIECE = 1
+O_PIECE = 4
+
+# Controller command -> FastTetris method, as Tetris.bind_input maps them
+INPUT_ACTIONS = {
+    "MOVE_LEFT": "move_piece_left",
+    "MOVE_RIGHT": "move_piece_right",
+    "ROTATE_RIGHT": "rotate_clockwise",
+    "ROTATE_LEFT": "rotate_counterclockwise",
+    "MOVE_DOWN": "drop_piece",
+    "HARD_DROP": "drop_piece",
+}
+MAX_REPEAT = 15  # a coalesced command never needs more repeats than the board is tall
+PREVIEW_POSITION = (-4, 13)  # grid position Tetris.draw_next_piece_preview draws the next piece at
+
+# SRS wall kicks, (dx, dy) with +y up (the board's orientation), tried in order.
+# Indexed [from_state][direction] with direction 0 = clockwise, 1 = counter-clockwise.
+# States are 0 (spawn), 1 (R), 2, 3 (L).
+_JLSTZ_KICKS = (
+    (((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),    # 0 -> R
+     ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2))),      # 0 -> L
+    (((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),        # R -> 2
+     ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2))),       # R -> 0
+    (((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),       # 2 -> L
+     ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2))),   # 2 -> R
+    (((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),     # L -> 0
+     ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2))),    # L -> 2
+)
+_I_KICKS = (
+    (((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)),      # 0 -> R
+     ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1))),     # 0 -> L
+    (((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),      # R -> 2
+     ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2))),     # R -> 0
+    (((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),      # 2 -> L
+     ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1))),     # 2 -> R
+    (((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),      # L -> 0
+     ((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2))),     # L -> 2
+)
+
+
+# KICKS[type_index][from_state][direction] -> five (dx, dy) offsets
+KICKS = tuple(_I_KICKS if t == I_PIECE else _JLSTZ_KICKS for t in range(len(SRS_SPAWN)))
+
+
+def _rotate_clockwise(shape):
+    # Same turn as Tetris.attempt_rotate_tetromino_clockwise: transpose, then reverse each row
+    size = len(shape)
+    return [[shape[size - 1 - x][y] for x in range(size)] for y in range(size)]
+
+
+def _shape_states():
+    """The four SRS rotation states of each piece, indexed [type][state].
+
+    Tetromino.shapes is not always the SRS spawn state (its I bar sits one
+    row lower, which is SRS state 2), so each piece also records which state
+    its Tetromino.shapes entry is. That entry is reused as the state object
+    itself, so a freshly spawned piece is found by identity.
+    """
+    states = [()]
+    spawn_state = [0]
+    for type_index in range(1, len(SRS_SPAWN)):
+        rotations = [[list(row) for row in SRS_SPAWN[type_index]]]
+        for _ in range(3):
+            rotations.append(_rotate_clockwise(rotations[-1]))
+        original = Tetromino.shapes[type_index]
+        matches = [r for r, shape in enumerate(rotations) if shape == original]
+        if not matches:
+            raise ValueError(f"Tetromino.shapes[{type_index}] is not an SRS rotation state")
+        spawn_state.append(matches[0])
+        rotations[matches[0]] = original
+        states.append(tuple(rotations))
+    return tuple(states), tuple(spawn_state)
+
+
+class PieceMask:
+    """Filled cells of one rotation state, in grid orientation (row 0 at the bottom)."""
+
+    __slots__ = ("x0", "y0", "width", "height", "hit", "xs", "ys")
+
+    def __init__(self, shape):
+        grid = np.array(shape, dtype=np.int8)[::-1] != 0
+        ys, xs = np.nonzero(grid)
+        self.x0, self.y0 = int(xs.min()), int(ys.min())
+        self.width = int(xs.max()) - self.x0 + 1
+        self.height = int(ys.max()) - self.y0 + 1
+        # -1 on filled cells, so board_slice & hit is nonzero exactly where the piece overlaps a block
+        self.hit = np.where(grid[self.y0:self.y0 + self.height, self.x0:self.x0 + self.width], -1, 0).astype(np.int8)
+        self.xs = xs
+        self.ys = ys
+
+
+SHAPE_STATES, SPAWN_STATE = _shape_states()
+# id(shape list) -> PieceMask for every precomputed rotation state
+_MASKS = {id(shape): PieceMask(shape) for rotations in SHAPE_STATES for shape in rotations}
+# id(shape list) -> SRS state of that shape
+_STATE_OF = {id(rotations[r]): r for rotations in SHAPE_STATES for r in range(len(rotations))}
+
+
+def piece_mask(shape):
+    """PieceMask for a shape list (cached for the precomputed states)."""
+    mask = _MASKS.get(id(shape))
+    return mask if mask is not None else PieceMask(shape)
+
+
+class TetrisSnapshot:
+    """Everything one tick left on screen, safe to hand to another thread.
+
+    cells is a read-only copy of the board (before that tick's line clear,
+    as Tetris draws it) with the live piece on top.
+    """
+
+    __slots__ = ("tick", "cells", "next_piece", "lines_cleared")
+
+    def __init__(self, tick, cells, next_piece, lines_cleared):
+        cells.flags.writeable = False
+        self.tick = tick
+        self.cells = cells
+        self.next_piece = next_piece
+        self.lines_cleared = lines_cleared
+
+
+class TetrisRenderer:
+    """Draws TetrisSnapshots into a canvas with the geometry of a Tetris game.
+
+    Pixel-identical to Tetris drawing the same state. Headless, the canvas
+    is only touched where a snapshot differs from the previous one; a
+    window is cleared and redrawn every time, as Tetris does.
+    """
+
+    def __init__(self, game, canvas):
+        self.screen = canvas
+        self.headless = game.headless
+        self.blocks_width = game.blocks_width
+        self.blocks_height = game.blocks_height
+        self.block_size = game.block_size
+        self.game_x_offset = game.game_x_offset
+        self.game_y_offset = game.game_y_offset
+        self.border_thickness = game.border_thickness
+        self.border_color = game.border_color
+        self.colors = list(game.colors)
+        self.palette = np.array(self.colors, dtype=np.uint8)
+        self.get_size = game.get_size
+        self._build_pixel_map()
+        self._drawn = np.zeros((self.blocks_height, self.blocks_width), dtype=np.int8)  # board area on the canvas
+        self._shown_next = None     # piece type in the preview on the canvas
+        self._full_redraw = True    # canvas contents unknown: draw everything
+        self._dirty_all = True      # take_dirty() reports the whole canvas
+        self._dirty_board = None    # pygame.Rect: changed board area since take_dirty()
+        self._dirty_rects = []      # other changed rects (border, preview)
+
+    def _build_pixel_map(self):
+        """Record which canvas pixels each board cell covers.
+
+        The cells are drawn once, with their ids as colors, by the same
+        draw_square calls Tetris.draw_grid makes. So the map matches its
+        (fractional offset) geometry exactly, including overlaps.
+        """
+        width, height = self.screen.get_size()
+        scratch = pygame.Surface((width, height))
+        scratch.fill((0, 0, 0))
+        for y_index in range(self.blocks_height):
+            y_position = self.blocks_height - y_index + self.game_y_offset
+            for x_index in range(self.blocks_width):
+                x_position = x_index + self.game_x_offset
+                cell = y_index * self.blocks_width + x_index + 1
+                rect = (x_position * self.block_size, y_position * self.block_size, self.block_size, self.block_size)
+                pygame.draw.rect(scratch, (cell & 0xFF, cell >> 8, 0), rect)
+        ids = pygame.surfarray.array3d(scratch).astype(np.int32)
+        ids = ids[:, :, 0] | (ids[:, :, 1] << 8)
+        self._px_x, self._px_y = np.nonzero(ids)
+        self._px_cell = ids[self._px_x, self._px_y] - 1
+        # Pixel bounding box of each cell, for the dirty rects
+        cells = self.blocks_width * self.blocks_height
+        self._cell_x0 = np.full(cells, width, dtype=np.int32)
+        self._cell_y0 = np.full(cells, height, dtype=np.int32)
+        self._cell_x1 = np.zeros(cells, dtype=np.int32)
+        self._cell_y1 = np.zeros(cells, dtype=np.int32)
+        np.minimum.at(self._cell_x0, self._px_cell, self._px_x)
+        np.minimum.at(self._cell_y0, self._px_cell, self._px_y)
+        np.maximum.at(self._cell_x1, self._px_cell, self._px_x + 1)
+        np.maximum.at(self._cell_y1, self._px_cell, self._px_y + 1)
+
+    def invalidate(self):
+        """Redraw the whole canvas next time (call after drawing over it elsewhere)."""
+        self._full_redraw = True
+        self._dirty_all = True
+
+    def take_dirty(self):
+        """Canvas rects (x, y, w, h) changed since the last call, or None for "everything".
+
+        Rects from all draws since the previous call are returned, so a
+        renderer that samples every few ticks still sees every change. An
+        empty list means the canvas is unchanged.
+        """
+        if self._dirty_all or not self.headless:
+            self._dirty_all = False
+            self._dirty_board = None
+            self._dirty_rects = []
+            return None
+        rects = self._dirty_rects
+        if self._dirty_board is not None:
+            rects.append(self._dirty_board)
+        self._dirty_board = None
+        self._dirty_rects = []
+        return [tuple(rect) for rect in rects]
+
+    def draw(self, snapshot):
+        """Bring the canvas up to date with a snapshot."""
+        full = self._full_redraw or not self.headless
+        if not self.headless:
+            self.screen.fill((35, 35, 35))  # Help the preview pixels to stand out from the black background
+        if full:
+            self._draw_cells(snapshot.cells)
+            self._drawn[...] = snapshot.cells
+        else:
+            changed = snapshot.cells != self._drawn
+            cells = np.flatnonzero(changed)
+            if len(cells):
+                self._draw_cells(snapshot.cells, changed)
+                self._drawn[...] = snapshot.cells
+                x0, y0 = int(self._cell_x0[cells].min()), int(self._cell_y0[cells].min())
+                rect = pygame.Rect(x0, y0, int(self._cell_x1[cells].max()) - x0, int(self._cell_y1[cells].max()) - y0)
+                self._dirty_board = rect if self._dirty_board is None else self._dirty_board.union(rect)
+        # Border and preview are static until the next piece changes (its preview can overlap the left border)
+        if full or snapshot.next_piece != self._shown_next:
+            self._draw_border()
+            self._draw_preview(snapshot.next_piece)
+            self._shown_next = snapshot.next_piece
+        self._full_redraw = False
+
+    def _mark(self, rect):
+        if self._full_redraw:
+            return
+        rect = pygame.Rect(rect).clip(self.screen.get_rect())
+        if rect.width and rect.height:
+            self._dirty_rects.append(rect)
+
+    def _draw_cells(self, cells, changed=None):
+        pixels = pygame.surfarray.pixels3d(self.screen)
+        if changed is None:
+            pixels[self._px_x, self._px_y] = self.palette[cells.ravel()[self._px_cell]]
+        else:
+            pick = changed.ravel()[self._px_cell]
+            pixels[self._px_x[pick], self._px_y[pick]] = self.palette[cells.ravel()[self._px_cell[pick]]]
+        del pixels  # unlock the surface before anything else draws on it
+
+    def _draw_border(self):
+        # Same rects as Tetris.draw_border
+        x_left = int(self.game_x_offset * self.block_size) - self.border_thickness
+        x_right = int(self.game_x_offset * self.block_size + (self.blocks_width * self.block_size))
+        pygame.draw.rect(self.screen, self.border_color, (x_left, 0, self.border_thickness, 1000,))
+        pygame.draw.rect(self.screen, self.border_color, (x_right, 0, self.border_thickness, 1000,))
+        self._mark((x_left, 0, self.border_thickness, self.screen.get_height()))
+        self._mark((x_right, 0, self.border_thickness, self.screen.get_height()))
+
+    def _draw_preview(self, type_index):
+        # Same box and squares as Tetris.draw_next_piece_preview / draw_tetromino
+        size = self.get_size(type_index)
+        thickness = self.block_size + size * 4
+        x_left = int(self.game_x_offset * self.block_size) - thickness - self.border_thickness
+        pygame.draw.rect(self.screen, self.border_color, (x_left, 0, thickness, thickness,))
+        self._mark((x_left, 0, thickness, thickness))
+
+        shape = Tetromino.shapes[type_index]
+        pos = PREVIEW_POSITION
+        for local_y, grid_y in enumerate(range(pos[1], pos[1] + size)):
+            y_position = self.blocks_height - grid_y + self.game_y_offset
+            y_position *= self.block_size
+            for local_x, grid_x in enumerate(range(pos[0], pos[0] + size)):
+                x_position = grid_x + self.game_x_offset
+                x_position *= self.block_size
+                if shape[-local_y + size - 1][local_x] != 0:
+                    pygame.draw.rect(self.screen, self.colors[type_index], (x_position, y_position, self.block_size, self.block_size))
+        # The piece may stick out of the box
+        piece_x = int((pos[0] + self.game_x_offset) * self.block_size)
+        piece_y = int((self.blocks_height - (pos[1] + size - 1) + self.game_y_offset) * self.block_size)
+        self._mark((piece_x, piece_y, size * self.block_size + 1, size * self.block_size + 1))
+
+
+class SeededBag(Random_Bag):
+    """Random_Bag shuffling with its own random.Random(seed) instead of the random module."""
+
+    def __init__(self, seed):
+        super().__init__()
+        self.random = random.Random(seed)
+
+    def refill_bag(self):
+        new_bag = list(range(1, self.bag_size + 1))
+        self.random.shuffle(new_bag)
+        self.contents = new_bag
+        if self.next_piece is None:
+            self.next_piece = self.contents.pop()
+
+
+class FastTetris(Tetris):
+    """Tetris with a numpy int8 board, vectorized collision and clears, and queued input.
+
+    seed: pieces come from a SeededBag(seed); None keeps Tetris's global-random bag
+    draw: False starts without a renderer (renderer = None), for games that draw boards themselves
+    """
+
+    def __init__(self, canvas, HEADLESS, seed=None, draw=True):
+        super().__init__(canvas, HEADLESS)
+        self.seed = seed
+        if seed is not None:
+            # Tetris.__init__ already spawned from its own bag; start over from the seeded one
+            self.bag = SeededBag(seed)
+            self.spawn_tetromino()
+        self.board = np.zeros((self.blocks_height, self.blocks_width), dtype=np.int8)
+        # Anything still reading dead_grid[y][x] sees the same cells
+        self.dead_grid = self.board
+        self.lines_cleared = 0
+        self._lock_rows = None  # (first, end) board rows touched by pieces locked since the last clear
+        self.inputs = deque()   # (player slot, command) waiting for the next tick
+        self.ticks = 0
+        self.snapshot = None    # TetrisSnapshot of the last tick
+        self._view = np.zeros_like(self.board)  # this tick's board with the live piece on top
+        # Draws each snapshot during tick(); None = only publish snapshots
+        self.renderer = TetrisRenderer(self, canvas) if draw else None
+        # Gets input(tick, slot, cmd) for every command as it is applied (see tetris_replay.TetrisRecorder)
+        self.recorder = None
+        self.player_slots = 0   # players bound by begin_play()
+
+    def bind_input(self, tetris):
+        """Queue controller commands instead of running them on the network thread.
+
+        Each player's commands are tagged with their slot (join order) for recordings.
+        """
+        players = get_active_players_for_game("tetris")
+        for slot, player in enumerate(players):
+            set_input_handler(player.player_id,
+                              lambda player_obj, payload, slot=slot: tetris.queue_input(player_obj, payload, slot))
+        tetris.player_slots = len(players)
+
+    def queue_input(self, player, payload, slot=0):
+        """Input handler: the command is applied at the start of the next tick.
+
+        A coalesced payload (see players.InputRing) carries a repeat count,
+        capped at MAX_REPEAT since the payload comes off the network.
+        """
+        cmd = payload.get("cmd")
+        if cmd in INPUT_ACTIONS:
+            count = payload.get("count", 1)
+            count = min(count, MAX_REPEAT) if isinstance(count, int) and count > 0 else 1
+            self.inputs.extend([(slot, cmd)] * count)
+
+    def apply_inputs(self):
+        """Run the queued commands in arrival order."""
+        while self.inputs:
+            slot, cmd = self.inputs.popleft()
+            if self.recorder is not None:
+                self.recorder.input(self.ticks, slot, cmd)
+            getattr(self, INPUT_ACTIONS[cmd])()
+
+    def tick(self, delta_time, fps):
+        self.apply_inputs()
+        super().tick(delta_time, fps)
+
+    def rotate_tetromino(self, clockwise=True) -> bool:
+        """SRS rotation: a table lookup, then at most five collision tests.
+
+        The first kick offset that fits moves the piece and turns it. If none
+        fits the piece stays as it was.
+        """
+        piece = self.live_tetromino
+        if piece.type_index == O_PIECE:  # O (square) piece doesn't rotate
+            return True
+        state = _STATE_OF[id(piece.shape)]
+        target = (state + (1 if clockwise else 3)) % 4
+        shape = SHAPE_STATES[piece.type_index][target]
+        x, y = piece.grid_position
+        for dx, dy in KICKS[piece.type_index][state][0 if clockwise else 1]:
+            position = (x + dx, y + dy)
+            if self.check_move_validity(test_postion=position, test_shape=shape):
+                piece.shape = shape
+                piece.grid_position = position
+                piece.rotation = target
+                return True
+        return False
+
+    def check_move_validity(self, test_postion: () = None, test_shape=None) -> bool:
+        if test_shape is None:
+            test_shape = self.live_tetromino.shape
+        if test_postion is None:
+            test_postion = self.live_tetromino.grid_position
+        piece = piece_mask(test_shape)
+        x = test_postion[0] + piece.x0
+        y = test_postion[1] + piece.y0
+        if x < 0 or y < 0 or x + piece.width > self.blocks_width or y + piece.height > self.blocks_height:
+            return False
+        return not np.count_nonzero(self.board[y:y + piece.height, x:x + piece.width] & piece.hit)
+
+    def lock_piece(self):
+        pos = self.live_tetromino.grid_position
+        piece = piece_mask(self.live_tetromino.shape)
+        self.board[piece.ys + pos[1], piece.xs + pos[0]] = self.live_tetromino.type_index
+        first, end = pos[1] + piece.y0, pos[1] + piece.y0 + piece.height
+        if self._lock_rows is not None:
+            # Several locks in one tick (queued inputs, then the lock timer): check all their rows
+            first, end = min(first, self._lock_rows[0]), max(end, self._lock_rows[1])
+        self._lock_rows = (first, end)
+        self.spawn_tetromino()
+
+    def clear_lines(self, rows=None):
+        """Remove full rows and drop the rows above. Returns the number cleared.
+
+        Only a lock can fill a row, so by default just the rows the last
+        locked piece touched are checked, once.
+        """
+        rows = rows or self._lock_rows
+        if rows is None:
+            return 0
+        self._lock_rows = None
+        first, end = rows
+        touched = self.board[first:end].all(axis=1)
+        if not touched.any():
+            return 0
+        full = np.zeros(self.blocks_height, dtype=bool)
+        full[first:end] = touched
+        kept = self.board[~full]
+        self.board[:len(kept)] = kept
+        self.board[len(kept):] = 0
+        cleared = int(full.sum())
+        self.lines_cleared += cleared
+        return cleared
+
+    def draw_grid(self):
+        # The frame is drawn from the snapshot published in draw_next_piece_preview()
+        self._view[...] = self.board
+
+    def draw_border(self):
+        pass  # drawn by TetrisRenderer
+
+    def draw_tetromino(self, grid_position=None, type_index=None):
+        if grid_position is not None or type_index is not None:
+            super().draw_tetromino(grid_position, type_index)
+            return
+        piece = piece_mask(self.live_tetromino.shape)
+        xs = piece.xs + self.live_tetromino.grid_position[0]
+        ys = piece.ys + self.live_tetromino.grid_position[1]
+        # A valid position is always on the board; clip anyway rather than wrap around
+        on_board = (xs >= 0) & (ys >= 0) & (xs < self.blocks_width) & (ys < self.blocks_height)
+        self._view[ys[on_board], xs[on_board]] = self.live_tetromino.type_index
+
+    def draw_next_piece_preview(self):
+        # Last draw call of Tetris.tick: the frame is complete
+        self.ticks += 1
+        self.snapshot = TetrisSnapshot(self.ticks, self._view.copy(), self.bag.next_piece, self.lines_cleared)
+        if self.renderer is not None:
+            self.renderer.draw(self.snapshot)
+
+    def take_dirty(self):
+        """See TetrisRenderer.take_dirty. None ("everything") when the game has no renderer."""
+        return self.renderer.take_dirty() if self.renderer is not None else None
+
+    def invalidate(self):
+        """See TetrisRenderer.invalidate. Nothing to do when the game has no renderer."""
+        if self.renderer is not None:
+            self.renderer.invalidate()
@@ -0,0 +1,330 @@
+"""Split-screen versus Tetris: one FastTetris board per player.
+
+VersusTetris runs a board per player index side by side on the wall, each
+with its own bag and live piece, all stepped by one tick(). Every board's
+bag shares the game seed, so all players get the same pieces. Clearing 2,
+3 or 4 lines at once sends 1, 2 or 4 garbage rows to the next board; they
+rise from the bottom at the start of its next tick, with one gap column.
+A board that tops out is emptied and play goes on (topouts counts them).
+
+VersusRenderer draws all boards in one pass: a single pixel -> cell map
+spans every board and next-piece preview, so a frame is one compare of the
+combined cell state against what is on the canvas and one palette gather
+into the changed pixels, however many boards there are.
+"""
+
+import random
+
+import numpy as np
+import pygame
+
+from game_players import get_active_players_for_game
+from games.fast_tetris import FastTetris
+from games.tetris import Tetromino
+from players import set_input_handler
+
+# Lines cleared at once -> garbage rows sent to the next board
+GARBAGE_LINES = {2: 1, 3: 2, 4: 4}
+GARBAGE = 8             # board value of a garbage block
+GARBAGE_COLOR = (128, 128, 128)
+PREVIEW_BACKGROUND = 9  # palette index behind the preview pieces
+PREVIEW_CELLS = 4       # the preview is a 4 x 4 grid of cells
+PREVIEW_MARGIN = 2      # pixels of box around the preview grid
+
+
+class VersusSnapshot:
+    """What one tick left on screen: a TetrisSnapshot per board."""
+
+    __slots__ = ("tick", "boards")
+
+    def __init__(self, tick, boards):
+        self.tick = tick
+        self.boards = boards
+
+
+def versus_layout(canvas_size, boards, blocks_width, blocks_height, block_size, border):
+    """Pixel origins [(board_x, board_y, preview_x, preview_y)] for boards side by side.
+
+    Boards sit at the canvas edges with the spare width in between; each
+    preview goes in the gap next to its board, the first at the top and the
+    last at the bottom, so two boards can share one gap. Raises ValueError
+    if the boards and a preview do not fit across the canvas.
+    """
+    width, height = canvas_size
+    outer = blocks_width * block_size + 2 * border
+    preview = PREVIEW_CELLS * block_size + 2 * PREVIEW_MARGIN
+    spare = width - boards * outer
+    gap = spare // (boards - 1) if boards > 1 else spare
+    if gap < preview:
+        raise ValueError(f"{boards} boards of {outer}px and a {preview}px preview do not fit in {width}px")
+    board_y = height - blocks_height * block_size
+    layout = []
+    for index in range(boards):
+        left = index * (outer + gap)
+        if index < boards - 1 or boards == 1:
+            preview_x, preview_y = left + outer + (gap - preview) // 2, 0
+        else:
+            preview_x, preview_y = left - gap + (gap - preview) // 2, height - preview
+        layout.append((left + border, board_y, preview_x, preview_y))
+    return layout
+
+
+def _preview_cells():
+    """Preview grid values (row 0 at the top) for each piece type, flattened."""
+    cells = np.zeros((len(Tetromino.shapes), PREVIEW_CELLS * PREVIEW_CELLS), dtype=np.int8)
+    for type_index in range(1, len(Tetromino.shapes)):
+        shape = np.array(Tetromino.shapes[type_index], dtype=np.int8)
+        grid = np.zeros((PREVIEW_CELLS, PREVIEW_CELLS), dtype=np.int8)
+        # 3-wide pieces sit one row down, level with the I and O pieces
+        grid[PREVIEW_CELLS - len(shape):, :len(shape)] = shape
+        cells[type_index] = grid.ravel()
+    return cells
+
+
+PREVIEW_STATE = _preview_cells()
+
+
+class VersusTetris:
+    """Tetris boards for players side by side, ticked together.
+
+    Player slot i (join order) plays board i. Like FastTetris, it draws its
+    own snapshots during tick() unless renderer is set to None.
+
+    Args:
+        canvas: pygame Surface the boards are laid out on
+        HEADLESS: As for Tetris
+        players: Number of boards
+        seed: Seeds every board's bag and the garbage gaps; None draws from the random module
+    """
+
+    def __init__(self, canvas, HEADLESS, players=2, seed=None):
+        self.screen = canvas
+        self.headless = HEADLESS
+        self.seed = seed
+        self.boards = [FastTetris(canvas, HEADLESS, seed=seed, draw=False) for _ in range(players)]
+        self.layout = versus_layout(canvas.get_size(), players, self.boards[0].blocks_width,
+                                    self.boards[0].blocks_height, self.boards[0].block_size,
+                                    self.boards[0].border_thickness)
+        self.random = random.Random(seed) if seed is not None else random
+        self.pending_garbage = [0] * players  # rows waiting to rise into each board
+        self.garbage_sent = [0] * players
+        self.topouts = [0] * players
+        self.player_slots = 0
+        self.snapshot = None
+        self.renderer = VersusRenderer(self, canvas)
+
+    @property
+    def ticks(self):
+        return self.boards[0].ticks
+
+    @property
+    def lines_cleared(self):
+        return sum(board.lines_cleared for board in self.boards)
+
+    @property
+    def recorder(self):
+        return self.boards[0].recorder
+
+    @recorder.setter
+    def recorder(self, recorder):
+        # Boards tick in step, so each one records its own slot's commands with the shared tick
+        for board in self.boards:
+            board.recorder = recorder
+
+    def begin_play(self):
+        self.bind_input(self)
+
+    def bind_input(self, versus):
+        """Each player's commands go to their own board."""
+        players = get_active_players_for_game("tetris")
+        for slot, player in enumerate(players):
+            set_input_handler(player.player_id,
+                              lambda player_obj, payload, slot=slot: versus.queue_input(player_obj, payload, slot))
+        versus.player_slots = len(players)
+
+    def queue_input(self, player, payload, slot=0):
+        self.boards[slot % len(self.boards)].queue_input(player, payload, slot)
+
+    def tick(self, delta_time, fps):
+        for index, board in enumerate(self.boards):
+            if self.pending_garbage[index]:
+                self._raise_garbage(index)
+            cleared = board.lines_cleared
+            board.tick(delta_time, fps)
+            sent = GARBAGE_LINES.get(board.lines_cleared - cleared, 0)
+            if sent and len(self.boards) > 1:
+                self.pending_garbage[(index + 1) % len(self.boards)] += sent
+                self.garbage_sent[index] += sent
+            if not board.check_move_validity():
+                self._top_out(index)
+        self.snapshot = VersusSnapshot(self.ticks, tuple(board.snapshot for board in self.boards))
+        if self.renderer is not None:
+            self.renderer.draw(self.snapshot)
+
+    def _raise_garbage(self, index):
+        """Push the board up by its pending garbage rows and fill the bottom with them."""
+        board = self.boards[index]
+        rows = min(self.pending_garbage[index], board.blocks_height)
+        self.pending_garbage[index] = 0
+        cells = board.board
+        cells[rows:] = cells[:-rows].copy()
+        cells[:rows] = GARBAGE
+        cells[:rows, self.random.randrange(board.blocks_width)] = 0
+        # The live piece rides up with the stack rather than sinking into it
+        piece = board.live_tetromino
+        for _ in range(rows):
+            if board.check_move_validity():
+                return
+            piece.grid_position = (piece.grid_position[0], piece.grid_position[1] + 1)
+        if not board.check_move_validity():
+            self._top_out(index)
+
+    def _top_out(self, index):
+        board = self.boards[index]
+        board.board[...] = 0
+        board.reset_down()
+        self.pending_garbage[index] = 0
+        self.topouts[index] += 1
+
+    def take_dirty(self):
+        """See VersusRenderer.take_dirty. None ("everything") when the game has no renderer."""
+        return self.renderer.take_dirty() if self.renderer is not None else None
+
+    def invalidate(self):
+        """See VersusRenderer.invalidate. Nothing to do when the game has no renderer."""
+        if self.renderer is not None:
+            self.renderer.invalidate()
+
+
+class VersusRenderer:
+    """Draws VersusSnapshots into a canvas, every board in one pass.
+
+    The state drawn is one int8 vector: each board's cells followed by its
+    preview grid. A pixel map built at start lists, for every board and
+    preview pixel, which entry of that vector colors it. Headless, only
+    pixels of changed entries are written; a window is cleared and redrawn
+    every time, as Tetris does.
+    """
+
+    def __init__(self, game, canvas):
+        first = game.boards[0]
+        self.screen = canvas
+        self.headless = game.headless
+        self.layout = game.layout
+        self.blocks_width = first.blocks_width
+        self.blocks_height = first.blocks_height
+        self.block_size = first.block_size
+        self.border_thickness = first.border_thickness
+        self.border_color = first.border_color
+        palette = list(first.colors) + [GARBAGE_COLOR, first.border_color]
+        self.palette = np.array(palette, dtype=np.uint8)
+        self.board_cells = self.blocks_width * self.blocks_height
+        self.cells_per_board = self.board_cells + PREVIEW_CELLS * PREVIEW_CELLS
+        self._state = np.zeros(len(self.layout) * self.cells_per_board, dtype=np.int8)
+        self._drawn = np.zeros_like(self._state)
+        self._build_pixel_map()
+        self._full_redraw = True
+        self._dirty_all = True
+        self._dirty_rects = []
+
+    def _build_pixel_map(self):
+        """Pixel coordinates, state index and empty color of every cell pixel, for all boards."""
+        size = self.block_size
+        # One cell's pixels, relative to its top-left corner
+        dx, dy = np.meshgrid(np.arange(size), np.arange(size), indexing="ij")
+        dx, dy = dx.ravel(), dy.ravel()
+        xs, ys, cells, empty = [], [], [], []
+        x0, y0 = [], []
+        for index, (board_x, board_y, preview_x, preview_y) in enumerate(self.layout):
+            base = index * self.cells_per_board
+            # Board cells: row 0 at the bottom
+            y, x = np.divmod(np.arange(self.board_cells), self.blocks_width)
+            left = board_x + x * size
+            top = board_y + (self.blocks_height - 1 - y) * size
+            # Preview cells: row 0 at the top, inside the box margin
+            row, col = np.divmod(np.arange(PREVIEW_CELLS * PREVIEW_CELLS), PREVIEW_CELLS)
+            left = np.concatenate([left, preview_x + PREVIEW_MARGIN + col * size])
+            top = np.concatenate([top, preview_y + PREVIEW_MARGIN + row * size])
+            x0.append(left)
+            y0.append(top)
+            xs.append((left[:, None] + dx).ravel())
+            ys.append((top[:, None] + dy).ravel())
+            cells.append(np.repeat(base + np.arange(self.cells_per_board), size * size))
+            empty.append(np.repeat(np.where(np.arange(self.cells_per_board) < self.board_cells, 0,
+                                            PREVIEW_BACKGROUND), size * size))
+        self._px_x = np.concatenate(xs)
+        self._px_y = np.concatenate(ys)
+        self._px_cell = np.concatenate(cells)
+        self._px_empty = np.concatenate(empty).astype(np.int8)
+        self._cell_x0 = np.concatenate(x0)
+        self._cell_y0 = np.concatenate(y0)
+
+    def invalidate(self):
+        """Redraw the whole canvas next time (call after drawing over it elsewhere)."""
+        self._full_redraw = True
+        self._dirty_all = True
+
+    def take_dirty(self):
+        """Canvas rects (x, y, w, h) changed since the last call, or None for "everything".
+
+        At most one rect per board: the box around its changed cells.
+        """
+        if self._dirty_all or not self.headless:
+            self._dirty_all = False
+            self._dirty_rects = []
+            return None
+        rects = self._dirty_rects
+        self._dirty_rects = []
+        return [tuple(rect) for rect in rects]
+
+    def draw(self, snapshot):
+        """Bring the canvas up to date with a snapshot."""
+        state = self._state.reshape(len(self.layout), self.cells_per_board)
+        for index, board in enumerate(snapshot.boards):
+            state[index, :self.board_cells] = board.cells.ravel()
+            state[index, self.board_cells:] = PREVIEW_STATE[board.next_piece]
+        full = self._full_redraw or not self.headless
+        if full:
+            self.screen.fill((0, 0, 0) if self.headless else (35, 35, 35))
+            self._draw_frames()
+            pick = None
+        else:
+            changed = np.flatnonzero(self._state != self._drawn)
+            if not len(changed):
+                return
+            pick = np.zeros(len(self._state), dtype=bool)
+            pick[changed] = True
+            pick = pick[self._px_cell]
+            self._mark(changed)
+        cells = self._px_cell if pick is None else self._px_cell[pick]
+        values = self._state[cells]
+        values = np.where(values == 0, self._px_empty if pick is None else self._px_empty[pick], values)
+        pixels = pygame.surfarray.pixels3d(self.screen)
+        if pick is None:
+            pixels[self._px_x, self._px_y] = self.palette[values]
+        else:
+            pixels[self._px_x[pick], self._px_y[pick]] = self.palette[values]
+        del pixels  # unlock the surface before anything else draws on it
+        self._drawn[...] = self._state
+        self._full_redraw = False
+
+    def _mark(self, changed):
+        """Add the box around each board's changed cells to the dirty rects."""
+        boards = changed // self.cells_per_board
+        for index in np.unique(boards):
+            cells = changed[boards == index]
+            x0, y0 = int(self._cell_x0[cells].min()), int(self._cell_y0[cells].min())
+            x1 = int(self._cell_x0[cells].max()) + self.block_size
+            y1 = int(self._cell_y0[cells].max()) + self.block_size
+            self._dirty_rects.append(pygame.Rect(x0, y0, x1 - x0, y1 - y0))
+
+    def _draw_frames(self):
+        """Borders beside each board and the preview boxes."""
+        height = self.screen.get_height()
+        board_width = self.blocks_width * self.block_size
+        box = PREVIEW_CELLS * self.block_size + 2 * PREVIEW_MARGIN
+        for board_x, _, preview_x, preview_y in self.layout:
+            pygame.draw.rect(self.screen, self.border_color,
+                             (board_x - self.border_thickness, 0, self.border_thickness, height))
+            pygame.draw.rect(self.screen, self.border_color, (board_x + board_width, 0, self.border_thickness, height))
+            pygame.draw.rect(self.screen, self.border_color, (preview_x, preview_y, box, box))
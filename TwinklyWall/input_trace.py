@@ -0,0 +1,124 @@
+"""Input-to-photon tracing: from a controller packet to the FPP write.
+
+Each input gets a trace id and timestamps as it passes through the stages:
+
+    receive     transport receive (UDP datagram / HTTP request) -> Players.handle_input
+    queue_wait  handled by the game's input handler -> next game tick starts
+    game_tick   that tick's duration (logic + drawing to the canvas)
+    render_wait tick done -> the next render slot starts (set by RENDER_FPS)
+    render      DotMatrix scaling / sampling / preview for that frame
+    fpp_write   writing the frame to the FPP mmap (or output ring)
+    total       transport receive -> fpp_write done
+
+All times are time.perf_counter(). Per-stage p50/p95/p99 come from
+LatencyHistogram and are served at /api/game/trace.
+"""
+
+import itertools
+import threading
+import time
+
+from latency_stats import LatencyHistogram
+
+STAGES = ("receive", "queue_wait", "game_tick", "render_wait", "render", "fpp_write", "total")
+
+
+class InputTracer:
+    """Follows inputs through one game loop and records per-stage latency."""
+
+    def __init__(self, max_pending=256):
+        self.max_pending = max_pending
+        self.stages = {name: LatencyHistogram() for name in STAGES}
+        self.completed = 0
+        self.dropped = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._applied = []   # [trace] handled, waiting for a tick
+        self._ticked = []    # [trace] seen by a tick, waiting for a frame
+        self._tick_start = None
+
+    def stamp(self, payload):
+        """Tag a payload on arrival in Players.handle_input.
+
+        Transports may set payload["recv_t"] when the bytes arrived; otherwise
+        the receive stage starts now.
+        """
+        now = time.perf_counter()
+        payload["trace_id"] = next(self._ids)
+        payload.setdefault("recv_t", now)
+        payload["handled_t"] = now
+        return payload
+
+    def applied(self, payload):
+        """The game's handler has applied the input; its effect shows from the next tick."""
+        if "trace_id" not in payload:
+            return
+        trace = {"id": payload["trace_id"], "recv": payload["recv_t"], "arrived": payload["handled_t"],
+                 "handled": time.perf_counter()}
+        with self._lock:
+            if len(self._applied) >= self.max_pending:
+                self._applied.pop(0)
+                self.dropped += 1
+            self._applied.append(trace)
+
+    def tick_started(self, now=None):
+        self._tick_start = time.perf_counter() if now is None else now
+
+    def tick_done(self, now=None):
+        """Attach every input applied before this tick started to the tick."""
+        now = time.perf_counter() if now is None else now
+        start = self._tick_start if self._tick_start is not None else now
+        with self._lock:
+            if not self._applied:
+                return
+            waiting = []
+            for trace in self._applied:
+                if trace["handled"] <= start:
+                    trace["tick_start"] = start
+                    trace["tick_end"] = now
+                    self._ticked.append(trace)
+                else:
+                    waiting.append(trace)
+            self._applied = waiting
+
+    def frame_written(self, render_start, write_start, write_end):
+        """Close every trace whose tick finished before this frame was rendered."""
+        with self._lock:
+            if not self._ticked:
+                return
+            done = [t for t in self._ticked if t["tick_end"] <= render_start]
+            self._ticked = [t for t in self._ticked if t["tick_end"] > render_start]
+        for trace in done:
+            self.stages["receive"].record(max(0.0, trace["arrived"] - trace["recv"]) * 1000)
+            self.stages["queue_wait"].record(max(0.0, trace["tick_start"] - trace["handled"]) * 1000)
+            self.stages["game_tick"].record((trace["tick_end"] - trace["tick_start"]) * 1000)
+            self.stages["render_wait"].record((render_start - trace["tick_end"]) * 1000)
+            self.stages["render"].record((write_start - render_start) * 1000)
+            self.stages["fpp_write"].record((write_end - write_start) * 1000)
+            self.stages["total"].record((write_end - trace["recv"]) * 1000)
+        self.completed += len(done)
+
+    def reset(self):
+        with self._lock:
+            self._applied = []
+            self._ticked = []
+        for hist in self.stages.values():
+            hist.reset()
+        self.completed = 0
+        self.dropped = 0
+
+    def stats(self):
+        return {
+            "completed": self.completed,
+            "pending": len(self._applied) + len(self._ticked),
+            "dropped": self.dropped,
+            "stages": {name: hist.to_dict() for name, hist in self.stages.items()},
+        }
+
+
+_tracer = InputTracer()
+
+
+def get_tracer():
+    """Return the shared InputTracer."""
+    return _tracer
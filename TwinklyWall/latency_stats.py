@@ -0,0 +1,74 @@
+"""Thread-safe latency histograms with percentiles over a recent window."""
+
+import threading
+from collections import deque
+
+# Upper edges (ms) of the histogram buckets; the last bucket is open-ended
+LATENCY_EDGES_MS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 250.0)
+
+
+class LatencyHistogram:
+    """Counts samples into fixed buckets and keeps the last `window` samples
+    for percentiles, so one slow minute doesn't hide in a day of totals."""
+
+    def __init__(self, edges_ms=LATENCY_EDGES_MS, window=2048):
+        self.edges_ms = tuple(edges_ms)
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+            self.buckets = [0] * (len(self.edges_ms) + 1)
+            self._recent.clear()
+
+    def record(self, ms):
+        with self._lock:
+            self.count += 1
+            self.total_ms += ms
+            if ms > self.max_ms:
+                self.max_ms = ms
+            self.buckets[self._bucket(ms)] += 1
+            self._recent.append(ms)
+
+    def _bucket(self, ms):
+        for i, edge in enumerate(self.edges_ms):
+            if ms < edge:
+                return i
+        return len(self.edges_ms)
+
+    def labels(self):
+        labels = [f"<{self.edges_ms[0]:g}ms"]
+        for lo, hi in zip(self.edges_ms, self.edges_ms[1:]):
+            labels.append(f"{lo:g}-{hi:g}ms")
+        labels.append(f">={self.edges_ms[-1]:g}ms")
+        return labels
+
+    def percentiles(self, pcts=(50, 95, 99)):
+        """{pct: ms} over the recent window (None when empty)."""
+        with self._lock:
+            ordered = sorted(self._recent)
+        if not ordered:
+            return {p: None for p in pcts}
+        last = len(ordered) - 1
+        return {p: ordered[min(last, int(round(p / 100.0 * last)))] for p in pcts}
+
+    def to_dict(self):
+        pct = self.percentiles()
+        with self._lock:
+            return {
+                "count": self.count,
+                "avg_ms": round(self.total_ms / self.count, 3) if self.count else None,
+                "max_ms": round(self.max_ms, 3),
+                "p50_ms": _round(pct[50]),
+                "p95_ms": _round(pct[95]),
+                "p99_ms": _round(pct[99]),
+                "histogram": {label: n for label, n in zip(self.labels(), self.buckets) if n},
+            }
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
@@ -23,10 +23,20 @@ os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
 
 # FPS/performance debug flag (off by default, enable via env or CLI)
 FPS_DEBUG = os.environ.get('TWINKLYWALL_FPS_DEBUG', '').lower() in ('1', 'true', 'yes')
+# Publish frames to shared-memory rings for output_service.py instead of writing FPP directly
+FRAME_RING = os.environ.get('TWINKLYWALL_FRAME_RING', '').lower() in ('1', 'true', 'yes')
+# Every Tetris session is saved here as a replay (.twtr); set empty to disable recording
+TETRIS_RECORDINGS = os.environ.get('TWINKLYWALL_TETRIS_RECORDINGS',
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings'))
 
 # Import after setting environment variables
-from dotmatrix import DotMatrix
-from games.tetris import Tetris
+from dotmatrix import DotMatrix, FrameClock
+from game_loop import SimulationThread
+from input_trace import get_tracer
+from games.fast_tetris import FastTetris
+from games.versus_tetris import VersusTetris
+from game_players import get_active_players_for_game
+from tetris_replay import TetrisRecorder, TetrisReplay, load_recording, new_recording_path, new_seed
 from video_player import VideoPlayer
 from logger import log
 import pygame
@@ -45,40 +55,93 @@ def _resolve_fpp_memory_file():
 
 from logger import log
 
-def run_tetris(matrix, stop_event=None):
+def run_tetris(matrix, stop_event=None, owns_matrix=True, on_first_frame=None, replay=None):
+    """Run Tetris on matrix until stop_event is set.
+
+    A pooled matrix (owns_matrix=False) is only blanked on exit; its owner
+    releases it. on_first_frame() is called right after the first frame is
+    handed to the output.
+
+    With two players joined, each gets a board of their own (VersusTetris).
+    The session is recorded to TETRIS_RECORDINGS. With replay (a
+    TetrisReplay) the recorded game is played back instead of binding
+    players, and the loop ends with the recording.
+    """
     canvas_width = matrix.width * matrix.supersample
     # Canvas height accounts for stagger: 50 logical rows × 2 pixels per row
     # This ensures each dot gets unique pixel data when staggered columns are sampled.
     # Even columns sample rows [0,2,4,...,98], odd columns sample [1,3,5,...,99]
     canvas_height = (matrix.height) * matrix.supersample  # 50 * 2 = 100px tall
     canvas = pygame.Surface((canvas_width, canvas_height))
-    tetris = Tetris(canvas, HEADLESS)
-    tetris.begin_play()
 
     # Game timing constants
     GAME_TICK_RATE = 60  # Game logic updates per second
     RENDER_FPS = 20      # Display refresh rate
-    game_tick_interval = 1.0 / GAME_TICK_RATE
-    render_interval = 1.0 / RENDER_FPS
+    # Tetris.tick scales gravity by its fps argument. The nominal render rate keeps
+    # the fall speed the game was tuned for, and a constant keeps every run reproducible.
+    gravity_fps = RENDER_FPS
+    tracer = get_tracer()
+
+    recorder = None
+    if replay is not None:
+        tetris = replay.new_game(canvas, HEADLESS)
+        GAME_TICK_RATE = replay.recording.tick_rate
+        gravity_fps = replay.recording.gravity_fps
+        log(f"▶️ Replaying {replay.recording.path.name} ({replay.recording.duration_s:.1f}s)", module="Tetris")
+    else:
+        players = len(get_active_players_for_game("tetris"))
+        if players > 1:
+            tetris = VersusTetris(canvas, HEADLESS, players=players, seed=new_seed())
+        else:
+            tetris = FastTetris(canvas, HEADLESS, seed=new_seed())
+        tetris.begin_play()
+        if TETRIS_RECORDINGS:
+            try:
+                boards = len(tetris.boards) if isinstance(tetris, VersusTetris) else 1
+                recorder = TetrisRecorder(new_recording_path(TETRIS_RECORDINGS, tetris.seed), tetris.seed,
+                                          GAME_TICK_RATE, gravity_fps, tetris.player_slots, boards)
+                tetris.recorder = recorder
+            except OSError as e:
+                log(f"Not recording this Tetris session: {e}", level='WARNING', module="Tetris")
+    # The render loop below owns the canvas; the game only publishes snapshots
+    renderer = tetris.renderer
+    tetris.renderer = None
+
+    def step(dt):
+        if replay is not None:
+            if replay.done(tetris):
+                sim.stop()
+                return
+            replay.feed(tetris)
+        tracer.tick_started()
+        tetris.tick(dt, gravity_fps)
+        tracer.tick_done()
+
+    # Game logic on its own fixed-timestep thread; input handlers only queue commands for it
+    sim = SimulationThread(step, GAME_TICK_RATE, name="tetris-sim")
+    # Renders the latest snapshot on absolute deadlines; missed frames are skipped
+    clock = FrameClock(RENDER_FPS, policy="skip")
 
     frame_count = 0
     fps_check_interval = 100  # Log FPS every N frames (only when FPS_DEBUG)
     last_fps_time = time.time()
-    last_game_tick = time.time()
-    last_render = time.time()
-    last_tick_time = time.time()  # Track time for delta time calculation
-    last_frame_time = time.time()
-    current_fps = RENDER_FPS
+    drawn = None
 
     try:
         log("▶️ Tetris game loop started", module="Tetris")
+        sim.start()
+        sim.first_step.wait(1.0)
         while True:
             # Check stop signal FIRST, before any blocking operations
             if stop_event is not None and stop_event.is_set():
                 log("⏹️  Stop signal received, exiting Tetris loop", module="Tetris")
                 break
+            if sim.stopped.is_set():
+                log("⏹️  Tetris simulation stopped, exiting Tetris loop", module="Tetris")
+                break
 
-            current_time = time.time()
+            # Wait for the next frame deadline (wakes early on stop)
+            clock.tick(stop_event)
 
             if not HEADLESS:
                 for event in pygame.event.get():
@@ -90,47 +153,34 @@ def run_tetris(matrix, stop_event=None):
             if stop_event is not None and stop_event.is_set():
                 break
 
-            # Game logic tick (runs at GAME_TICK_RATE)
-            if current_time - last_game_tick >= game_tick_interval:
-                delta_time = current_time - last_tick_time  # Calculate time since last tick
-                try:
-                    tetris.tick(delta_time, current_fps)  # Pass delta time and current FPS to tick method
-                    last_game_tick = current_time
-                    last_tick_time = current_time  # Update for next delta calculation
-                except Exception as e:
-                    import traceback
-                    log(f"Error in tetris.tick(): {e}\n{traceback.format_exc()}", level='ERROR', module="Tetris")
-                    break
-
-            # Render frame (runs at RENDER_FPS)
-            if current_time - last_render >= render_interval:
-                try:
-                    matrix.render_frame(canvas)
-                    frame_count += 1
-                    render_delta = current_time - last_frame_time
-                    if render_delta > 0:
-                        current_fps = 1.0 / render_delta
-                    last_frame_time = current_time
-                    last_render = current_time
-
-                    if frame_count == 1:
-                        print("First frame rendered successfully")
-
-                    # Log actual FPS periodically (opt-in)
-                    if FPS_DEBUG and frame_count % fps_check_interval == 0:
-                        now = time.time()
-                        elapsed = now - last_fps_time
-                        actual_fps = fps_check_interval / elapsed if elapsed > 0 else 0
-                        log(f"📊 Tetris FPS: {actual_fps:.1f} (frame {frame_count})", module="Tetris")
-                        last_fps_time = now
-
-                except Exception as e:
-                    import traceback
-                    log(f"Error in matrix.render_frame(): {e}\n{traceback.format_exc()}", level='ERROR', module="Tetris")
-                    break
-
-            # Small sleep to prevent busy waiting
-            time.sleep(0.001)
+            try:
+                snapshot = tetris.snapshot
+                if snapshot is not drawn and snapshot is not None:
+                    renderer.draw(snapshot)
+                    drawn = snapshot
+                # Only what changed since the last render is resampled and sent to FPP
+                matrix.render_frame(canvas, pace=False, dirty=renderer.take_dirty())
+                tracer.frame_written(*matrix.last_frame_times)
+                frame_count += 1
+
+                if frame_count == 1:
+                    print("First frame rendered successfully")
+                    if on_first_frame is not None:
+                        on_first_frame()
+
+                # Log actual FPS periodically (opt-in)
+                if FPS_DEBUG and frame_count % fps_check_interval == 0:
+                    now = time.time()
+                    elapsed = now - last_fps_time
+                    actual_fps = fps_check_interval / elapsed if elapsed > 0 else 0
+                    log(f"📊 Tetris FPS: {actual_fps:.1f} (frame {frame_count}) | {clock.summary()}", module="Tetris")
+                    log(f"📊 Tetris simulation: {sim.clock.summary()}", module="Tetris")
+                    last_fps_time = now
+
+            except Exception as e:
+                import traceback
+                log(f"Error in matrix.render_frame(): {e}\n{traceback.format_exc()}", level='ERROR', module="Tetris")
+                break
 
     except KeyboardInterrupt:
         print("\nShutting down...")
@@ -138,9 +188,21 @@ def run_tetris(matrix, stop_event=None):
         import traceback
         log(f"Unexpected error in Tetris loop: {e}\n{traceback.format_exc()}", level='ERROR', module="Tetris")
     finally:
+        sim.stop()
+        if recorder is not None:
+            try:
+                recorder.close(tetris)
+                log(f"Tetris session recorded to {recorder.path}", module="Tetris")
+            except Exception as e:
+                log(f"Error finishing Tetris recording: {e}", level='ERROR', module="Tetris")
         log("🛑 Tetris game shutting down, cleaned {frame_count} frames, avg FPS should be ~20", module="Tetris")
+        log(f"Tetris pacing: {clock.summary()}", module="Tetris")
+        log(f"Tetris simulation: {sim.steps} steps | {sim.clock.summary()}", module="Tetris")
         try:
-            matrix.shutdown()
+            if owns_matrix:
+                matrix.shutdown()
+            else:
+                matrix.blank()
         except Exception as e:
             import traceback
             log(f"Error during matrix shutdown: {e}\n{traceback.format_exc()}", level='ERROR', module="Tetris")
@@ -174,9 +236,12 @@ def run_video(matrix, render_path, loop, speed, start, end, brightness, playback
         matrix.shutdown()
 
 
-def build_matrix(show_preview=True, fps=20):
+def build_matrix(show_preview=True, fps=20, ring_name="tetris"):
     fpp_memory_file = _resolve_fpp_memory_file()
-    if ON_PI:
+    output_ring = ring_name if (FRAME_RING and ON_PI) else None
+    if output_ring:
+        print(f"Publishing frames to output ring: {output_ring}")
+    elif ON_PI:
         print(f"FPP memory file: {fpp_memory_file}")
     
     # Show preview windows only when not on Pi and show_preview is True
@@ -196,13 +261,15 @@ def build_matrix(show_preview=True, fps=20):
         fpp_gamma=2.2,
         fpp_color_order="RGB",
         fpp_memory_buffer_file=fpp_memory_file,
+        fpp_direct_mmap=True,
+        output_ring=output_ring,
     )
 
 
 def main():
     parser = argparse.ArgumentParser(description="Run LED Wall apps")
     parser.add_argument("--mode", choices=["tetris", "video", "api"], default="api", help="App mode to run")
-    parser.add_argument("--render", type=str, default=None, help="Path or name of rendered .npz (for video mode)")
+    parser.add_argument("--render", type=str, default=None, help="Path or name of rendered .twv/.npz (for video mode)")
     parser.add_argument("--no-loop", action="store_true", help="Disable looping (video mode)")
     parser.add_argument("--speed", type=float, default=1.0, help="Playback speed multiplier (video mode)")
     parser.add_argument("--playback-fps", type=float, default=20.0, help="Playback FPS target; adjusts speed relative to render")
@@ -210,6 +277,7 @@ def main():
     parser.add_argument("--end", type=int, default=None, help="End frame (exclusive, video mode)")
     parser.add_argument("--brightness", type=float, default=None, help="Optional brightness scalar (0-1 or 0-255) for video mode")
     parser.add_argument("--fps-debug", action="store_true", help="Enable FPS/performance debug logging")
+    parser.add_argument("--replay", type=str, default=None, help="Play back a Tetris recording (.twtr) on the wall (tetris mode)")
     args = parser.parse_args()
     # Apply CLI flag for FPS debug (overrides env when true)
     global FPS_DEBUG
@@ -235,12 +303,15 @@ def main():
     if args.mode == "api":
         # Run the API server with Tetris monitor thread
         print("Starting API server mode...")
-        from api_server import app, start_cleanup_thread
-        from game_players import get_active_players_for_game
+        from api_server import app, start_cleanup_thread, start_input_server, matrix_pool, record_session_start
+        from game_players import get_active_players_for_game, wait_for_player_change, first_joined_at
         import threading
         import time
         
         start_cleanup_thread()
+        start_input_server()
+        # The Tetris output context lives for the whole process; sessions acquire/release it
+        matrix_pool.register("tetris", lambda: build_matrix(show_preview=False))  # API mode doesn't show windows
         
         # Thread to monitor Tetris and control game lifecycle
         def _monitor_tetris():
@@ -248,6 +319,10 @@ def main():
             stop_event = None
             matrix = None
             last_player_count = 0
+            try:
+                matrix_pool.get("tetris")  # Build up front so the first join doesn't pay for it
+            except Exception as e:
+                log(f"Error pre-building Tetris matrix: {e}", level='ERROR', module="TetrisMonitor")
 
             while True:
                 try:
@@ -264,15 +339,40 @@ def main():
                             log("🔇 Stopped active video playback before starting game", module="TetrisMonitor")
                         except Exception as e:
                             log(f"Error stopping video playback: {e}", level='ERROR', module="TetrisMonitor")
-                        matrix = build_matrix(show_preview=False)  # API mode doesn't show windows
+                        woke_at = time.time()
+                        matrix = matrix_pool.acquire("tetris", owner="tetris")
+                        joined_at = first_joined_at("tetris") or woke_at
+                        acquire_ms = matrix_pool.last_acquire_ms
                         stop_event = threading.Event()
                         tetris_thread = threading.Thread(
                             target=run_tetris,
                             args=(matrix, stop_event),
+                            kwargs={
+                                'owns_matrix': False,
+                                'on_first_frame': lambda: record_session_start("tetris", joined_at, acquire_ms, woke_at, time.time()),
+                            },
                             daemon=True
                         )
                         tetris_thread.start()
 
+                    # A player joined mid-game: start over with a board per player (same matrix).
+                    # When one leaves, the game goes on so the others keep their boards and scores.
+                    elif current_count > last_player_count > 0 and tetris_thread and tetris_thread.is_alive():
+                        log(f"🔁 Tetris now has {current_count} player(s), restarting the game...", module="TetrisMonitor")
+                        stop_event.set()
+                        tetris_thread.join(timeout=2)
+                        if tetris_thread.is_alive():
+                            log("❌ Tetris thread did not stop, not restarting it", level='ERROR', module="TetrisMonitor")
+                        else:
+                            stop_event = threading.Event()
+                            tetris_thread = threading.Thread(
+                                target=run_tetris,
+                                args=(matrix, stop_event),
+                                kwargs={'owns_matrix': False},
+                                daemon=True
+                            )
+                            tetris_thread.start()
+
                     # Stop Tetris if all players left and a game is running
                     elif current_count == 0 and last_player_count > 0:
                         if tetris_thread and tetris_thread.is_alive():
@@ -293,22 +393,25 @@ def main():
                             finally:
                                 try:
                                     if matrix:
-                                        log("Calling matrix.shutdown()...", module="TetrisMonitor")
-                                        matrix.shutdown()
+                                        log("Releasing pooled Tetris matrix...", module="TetrisMonitor")
+                                        matrix_pool.release("tetris")
                                 except Exception as e:
-                                    log(f"Error shutting down matrix: {e}", level='ERROR', module="TetrisMonitor")
+                                    log(f"Error releasing matrix: {e}", level='ERROR', module="TetrisMonitor")
                                 tetris_thread = None
                                 stop_event = None
                                 matrix = None
                                 log("✅ Tetris cleanup complete", module="TetrisMonitor")
                         else:
                             # No thread to stop, just reset state
+                            if matrix:
+                                matrix_pool.release("tetris")
                             tetris_thread = None
                             stop_event = None
                             matrix = None
 
                     last_player_count = current_count
-                    time.sleep(1)
+                    # Wakes as soon as a player joins or leaves; the timeout catches idle expiry
+                    wait_for_player_change(1.0)
                 except Exception as e:
                     log(f"Error in Tetris monitor: {e}", level='ERROR', module="TetrisMonitor")
                     time.sleep(1)
@@ -322,10 +425,11 @@ def main():
         # Run Flask server (blocks)
         app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
     else:
-        matrix = build_matrix()
+        matrix = build_matrix(ring_name=args.mode)
 
         if args.mode == "tetris":
-            run_tetris(matrix)
+            replay = TetrisReplay(load_recording(args.replay)) if args.replay else None
+            run_tetris(matrix, replay=replay)
         else:
             # Default to Shireworks render if none specified
             render_path = args.render or "dotmatrix/rendered_videos/Shireworks - Trim_90x50_20fps.npz"
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Output service: the single writer of the FPP Pixel Overlay buffer.
+
+Producers (video playback, Tetris, the DDP bridge) publish finished H x W x 3
+frames into shared-memory rings (dotmatrix/frame_ring.py) instead of each
+opening their own FPPOutput. This process maps those rings, and does
+routing, gamma and the mmap write in one place, paced by a FrameClock.
+
+Each ring is a layer of a Compositor (dotmatrix/compositor.py), ranked in
+--rings order (highest first). A layer is live while its producer has
+published within its timeout. The top live layer is shown. A handoff (a game
+starting over a video, DDP mirroring taking over, a producer stopping)
+crossfades over --fade-ms instead of clearing to black. An optional idle
+pattern sits underneath everything.
+
+Usage:
+    python output_service.py --rings ddp,tetris,video:2000 [--idle breathe] [--fade-ms 250]
+
+A ring may carry its own timeout in ms (name:timeout); the default is
+--stale-ms.
+
+Producers opt in with TWINKLYWALL_FRAME_RING=1 (main.py / api_server.py) or
+ddp_bridge.py --output-ring ddp.
+"""
+
+import argparse
+import os
+import signal
+import sys
+import time
+
+from dotmatrix.compositor import IDLE_PATTERNS, Compositor
+from dotmatrix.fpp_output import FPPOutput
+from dotmatrix.frame_clock import FrameClock
+from dotmatrix.frame_ring import FrameRingReader
+
+# Live DDP mirroring > games > playlist video
+DEFAULT_RINGS = "ddp,tetris,video"
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Single FPP overlay writer fed by shared-memory frame rings")
+    p.add_argument("--rings", default=os.environ.get("TWINKLYWALL_RINGS", DEFAULT_RINGS), help="Comma-separated ring names, highest priority first")
+    p.add_argument("--width", type=int, default=90, help="Matrix width")
+    p.add_argument("--height", type=int, default=50, help="Matrix height")
+    p.add_argument("--model", default=os.environ.get("FPP_MODEL_NAME", "Light Wall"), help="Overlay model name (for mmap file)")
+    p.add_argument("--memory-file", default=os.environ.get("FPP_MEMORY_FILE"), help="FPP mmap file (overrides --model)")
+    p.add_argument("--fps", type=float, default=float(os.environ.get("TWINKLYWALL_OUTPUT_FPS", 40)), help="Ring poll / output rate")
+    p.add_argument("--stale-ms", type=float, default=500.0, help="Default layer timeout: a ring that has not published for this long drops out")
+    p.add_argument("--fade-ms", type=float, default=float(os.environ.get("TWINKLYWALL_FADE_MS", 250)), help="Crossfade time when the top layer changes (0 = cut)")
+    p.add_argument("--idle", choices=sorted(IDLE_PATTERNS), default=os.environ.get("TWINKLYWALL_IDLE", "none"), help="Pattern shown when no producer is live")
+    p.add_argument("--gamma", type=float, default=2.2, help="FPP gamma (0 disables)")
+    p.add_argument("--color-order", default="RGB", help="FPP channel order")
+    p.add_argument("--duration-sec", type=float, default=0.0, help="Exit after this many seconds (0 = run forever)")
+    p.add_argument("--verbose", action="store_true", help="Print per-second stats")
+    return p.parse_args()
+
+
+def parse_ring_spec(spec, default_timeout_ms):
+    """Parse "ddp,tetris:1000,video" into [(name, timeout_ms), ...]."""
+    rings = []
+    for item in spec.split(","):
+        name, _, timeout = item.strip().partition(":")
+        if name:
+            rings.append((name, float(timeout) if timeout else default_timeout_ms))
+    return rings
+
+
+class FrameOutputService:
+    """Composites the frame rings and writes the result to FPP."""
+
+    def __init__(self, rings, width, height, memory_file, fps=40.0, fade_ms=250.0, idle="none",
+                 gamma=2.2, color_order="RGB", verbose=False):
+        """
+        Args:
+            rings: [(name, timeout_ms), ...] highest priority first
+        """
+        self.width = width
+        self.height = height
+        self.verbose = verbose
+        self.compositor = Compositor(width, height, fade_ms=fade_ms)
+        self.readers = []
+        for rank, (name, timeout_ms) in enumerate(rings):
+            self.readers.append((FrameRingReader(name, width, height),
+                                 self.compositor.add_layer(name, priority=len(rings) - rank, timeout_ms=timeout_ms)))
+        if IDLE_PATTERNS.get(idle):
+            self.compositor.add_layer("idle", priority=-1, source=IDLE_PATTERNS[idle](width, height))
+        self.out = FPPOutput(width, height, mapping_file=memory_file, color_order=color_order,
+                             gamma=gamma or None, direct_mmap=True)
+        self.clock = FrameClock(fps, policy="skip")
+        self.frames_written = 0
+        self._stop = False
+        self._write_ms_acc = 0.0
+        self._sec_frames = 0
+        self._sec_start = time.time()
+        self._last_refresh = 0.0
+
+    def stop(self):
+        self._stop = True
+
+    def step(self):
+        """Pull new ring frames into their layers, composite, and write if the output changed.
+
+        Returns True if a frame was written.
+        """
+        if time.time() - self._last_refresh >= 1.0:
+            # Pick up rings created (or recreated) since the last check
+            for reader, _ in self.readers:
+                reader.refresh()
+            self._last_refresh = time.time()
+
+        now = time.perf_counter()
+        for reader, layer in self.readers:
+            if not reader.is_open:
+                continue
+            if reader.read_latest(layer.frame) is not None:
+                self.compositor.touch(layer.name, now)
+            # Liveness follows the producer's own publish time, so release() drops a layer at once
+            layer.updated = now - reader.age()
+
+        previous = self.compositor.top
+        if not self.compositor.compose(now):
+            return False
+        if self.compositor.top != previous:
+            print(f"[OUTPUT] source {previous or 'none'} -> {self.compositor.top or 'none'}", flush=True)
+        self._write_ms_acc += self.out.write(self.compositor.output)
+        self.frames_written += 1
+        self._sec_frames += 1
+        return True
+
+    def _report(self):
+        elapsed = time.time() - self._sec_start
+        if elapsed < 1.0:
+            return
+        if self.verbose:
+            avg_ms = self._write_ms_acc / max(1, self._sec_frames)
+            ages = " ".join(f"{r.name}={r.age() * 1000:.0f}ms" if r.is_open else f"{r.name}=-" for r, _ in self.readers)
+            torn = sum(r.torn_reads for r, _ in self.readers)
+            fade = " (fading)" if self.compositor.fading else ""
+            print(f"[OUTPUT] fps={self._sec_frames / elapsed:.1f} write={avg_ms:.2f}ms "
+                  f"top={self.compositor.top or 'none'}{fade} | ages {ages} | torn={torn} | "
+                  f"{self.clock.summary()}", flush=True)
+        self._sec_frames = 0
+        self._write_ms_acc = 0.0
+        self._sec_start = time.time()
+
+    def run(self, duration_sec=0.0):
+        names = " > ".join(layer.name for layer in self.compositor.layers)
+        print(f"Output service: {self.width}x{self.height} layers [{names}] -> FPP ({self.out.write_mode} mode), "
+              f"fade {self.compositor.fade_s * 1000:.0f}ms", flush=True)
+        end = time.perf_counter() + duration_sec if duration_sec else None
+        try:
+            while not self._stop and (end is None or time.perf_counter() < end):
+                self.clock.tick()
+                self.step()
+                self._report()
+        finally:
+            print(f"Output service stopped: {self.frames_written} frames, {self.compositor.transitions} transitions | "
+                  f"{self.clock.summary()}", flush=True)
+            for reader, _ in self.readers:
+                reader.close()
+            self.out.close()
+
+
+def main():
+    args = parse_args()
+    memory_file = args.memory_file or f"/dev/shm/FPP-Model-Data-{args.model.replace(' ', '_')}"
+    rings = parse_ring_spec(args.rings, args.stale_ms)
+    service = FrameOutputService(rings, args.width, args.height, memory_file, fps=args.fps,
+                                 fade_ms=args.fade_ms, idle=args.idle, gamma=args.gamma,
+                                 color_order=args.color_order, verbose=args.verbose)
+    signal.signal(signal.SIGTERM, lambda signum, frame: service.stop())
+    try:
+        service.run(args.duration_sec)
+    except KeyboardInterrupt:
+        print("Exiting.")
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,19 +4,123 @@ Each phone connecting from the Flutter controller should identify itself
 with a unique ``player_id`` (for example, a UUID or any device-local token).
 The registry keeps track of active players, exposes per-player input
 callbacks, and lets game code pull queued inputs when no callback is set.
+
+Queued inputs live in a bounded InputRing per player, so a game that only
+uses callbacks (and never drains) costs at most ``capacity`` payloads per
+player. What happens when a ring is full or unattended is its policy:
+
+- ``drop-oldest``: the oldest payload makes room for the new one.
+- ``coalesce``: as drop-oldest, but a MOVE_* repeating the newest queued
+  command is folded into that payload's ``count`` instead of queued again.
+- ``drop-on-idle`` (default): as drop-oldest, but once nobody has drained
+  the ring for ``idle_sec`` it is emptied and new payloads are not kept until
+  the next drain. Callback-only games (Tetris) never fill it.
+
+TWINKLYWALL_INPUT_POLICY / TWINKLYWALL_INPUT_CAPACITY set the defaults for
+the shared registry. ``input_stats()`` counts, per player and in total,
+payloads dropped before anyone received them, payloads a handler received
+but an idle ring did not keep, and coalesced payloads.
 """
 
 from __future__ import annotations
 
+import os
+import time
 from collections import deque
 from dataclasses import dataclass, field
-from datetime import datetime
 from threading import Lock
-from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from input_trace import get_tracer
 
 InputPayload = Dict[str, Any]
 InputHandler = Callable[["Player", InputPayload], None]
 
+DROP_OLDEST = "drop-oldest"
+COALESCE = "coalesce"
+DROP_ON_IDLE = "drop-on-idle"
+INPUT_POLICIES = (DROP_OLDEST, COALESCE, DROP_ON_IDLE)
+INPUT_CAPACITY = 32  # payloads per player
+INPUT_IDLE_SEC = 2.0  # drop-on-idle: undrained for this long -> stop queueing
+COALESCED_COMMANDS = frozenset({"MOVE_LEFT", "MOVE_RIGHT", "MOVE_DOWN"})
+
+
+class InputRing:
+    """Bounded FIFO of one player's payloads.
+
+    Each entry remembers whether an on_input handler already received the
+    payload. Only payloads nobody received are counted as ``dropped``;
+    handled ones that a drop-on-idle ring stops keeping are counted as
+    ``idle``, which is the normal state of a callback-only game.
+
+    Not locked itself: Players holds its lock around every call.
+    """
+
+    __slots__ = ("capacity", "policy", "idle_sec", "dropped", "idle", "coalesced", "_items", "_last_drain")
+
+    def __init__(self, capacity: int = INPUT_CAPACITY, policy: str = DROP_ON_IDLE,
+                 idle_sec: float = INPUT_IDLE_SEC) -> None:
+        if policy not in INPUT_POLICIES:
+            raise ValueError(f"Unknown input policy {policy!r} (expected one of {', '.join(INPUT_POLICIES)})")
+        if capacity < 1:
+            raise ValueError("Input ring capacity must be at least 1")
+        self.capacity = capacity
+        self.policy = policy
+        self.idle_sec = idle_sec
+        self.dropped = 0  # never received: evicted or discarded before a handler or a drain saw them
+        self.idle = 0  # received by a handler, then not kept because nobody drains
+        self.coalesced = 0
+        self._items: Deque[Tuple[InputPayload, bool]] = deque()  # (payload, handled)
+        self._last_drain = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _discard(self, handled: bool) -> None:
+        if handled:
+            self.idle += 1
+        else:
+            self.dropped += 1
+
+    def push(self, payload: InputPayload, now: Optional[float] = None, handled: bool = False) -> bool:
+        """Queue a payload (handled: an on_input handler receives it). Returns False if not queued."""
+        items = self._items
+        if self.policy == DROP_ON_IDLE:
+            now = time.monotonic() if now is None else now
+            if now - self._last_drain > self.idle_sec:
+                for _, was_handled in items:
+                    self._discard(was_handled)
+                items.clear()
+                self._discard(handled)
+                return False
+        elif self.policy == COALESCE and items:
+            cmd = payload.get("cmd")
+            newest, newest_handled = items[-1]
+            if cmd in COALESCED_COMMANDS and newest.get("cmd") == cmd:
+                # A copy: callbacks may still hold the queued payload
+                items[-1] = (dict(newest, count=newest.get("count", 1) + payload.get("count", 1)),
+                             newest_handled and handled)
+                self.coalesced += 1
+                return True
+        if len(items) >= self.capacity:
+            self._discard(items.popleft()[1])
+        items.append((payload, handled))
+        return True
+
+    def pop(self) -> Optional[InputPayload]:
+        self._last_drain = time.monotonic()
+        return self._items.popleft()[0] if self._items else None
+
+    def drain(self, limit: Optional[int] = None) -> List[InputPayload]:
+        """Remove and return up to limit payloads (all if None), oldest first."""
+        self._last_drain = time.monotonic()
+        items = self._items
+        if limit is None or limit >= len(items):
+            batch = [payload for payload, _ in items]
+            items.clear()
+            return batch
+        return [items.popleft()[0] for _ in range(limit)]
+
 
 @dataclass
 class Player:
@@ -26,14 +130,14 @@ class Player:
     phone_id: str
     game: str = "tetris"
     connected: bool = True
-    last_seen: datetime = field(default_factory=datetime.utcnow)
+    last_seen: float = field(default_factory=time.monotonic)  # time.monotonic() of the last input
     on_input: Optional[InputHandler] = None
-    backlog: Deque[InputPayload] = field(default_factory=deque)
+    backlog: InputRing = field(default_factory=InputRing)
 
-    def enqueue(self, payload: InputPayload) -> None:
-        """Append a payload to this player's backlog and update last_seen."""
-        self.backlog.append(payload)
-        self.last_seen = datetime.utcnow()
+    def enqueue(self, payload: InputPayload) -> bool:
+        """Queue a payload in this player's ring and update last_seen. False if the ring did not keep it."""
+        self.last_seen = time.monotonic()
+        return self.backlog.push(payload, self.last_seen, handled=self.on_input is not None)
 
     def has_pending(self) -> bool:
         return bool(self.backlog)
@@ -45,10 +149,19 @@ class Players:
     This class is thread-safe for concurrent network/game threads.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, *, input_capacity: int = INPUT_CAPACITY, input_policy: str = DROP_ON_IDLE,
+                 input_idle_sec: float = INPUT_IDLE_SEC) -> None:
+        InputRing(input_capacity, input_policy, input_idle_sec)  # validate up front
         self._players: Dict[str, Player] = {}
         self._lock = Lock()
         self._global_listeners: List[InputHandler] = []
+        self.input_capacity = input_capacity
+        self.input_policy = input_policy
+        self.input_idle_sec = input_idle_sec
+        # Counters of players that have since been unregistered
+        self._retired_dropped = 0
+        self._retired_idle = 0
+        self._retired_coalesced = 0
 
     def register(
         self,
@@ -66,28 +179,44 @@ class Players:
         - ``on_input``: optional callback invoked for each incoming payload for this player.
         """
         with self._lock:
-            existing = self._players.get(player_id)
-            if existing:
-                existing.connected = True
-                existing.game = game or existing.game
-                existing.last_seen = datetime.utcnow()
-                if on_input:
-                    existing.on_input = on_input
-                return existing
-
-            player = Player(
-                player_id=player_id,
-                phone_id=phone_id or player_id,
-                game=game,
-                on_input=on_input,
-            )
-            self._players[player_id] = player
-            return player
+            return self._register_locked(player_id, phone_id=phone_id, game=game, on_input=on_input)
+
+    def _register_locked(
+        self,
+        player_id: str,
+        *,
+        phone_id: Optional[str] = None,
+        game: str = "tetris",
+        on_input: Optional[InputHandler] = None,
+    ) -> Player:
+        """register() for callers already holding self._lock (it is not reentrant)."""
+        existing = self._players.get(player_id)
+        if existing:
+            existing.connected = True
+            existing.game = game or existing.game
+            existing.last_seen = time.monotonic()
+            if on_input:
+                existing.on_input = on_input
+            return existing
+
+        player = Player(
+            player_id=player_id,
+            phone_id=phone_id or player_id,
+            game=game,
+            on_input=on_input,
+            backlog=InputRing(self.input_capacity, self.input_policy, self.input_idle_sec),
+        )
+        self._players[player_id] = player
+        return player
 
     def unregister(self, player_id: str) -> None:
         """Remove a player completely (e.g., phone left the game page)."""
         with self._lock:
-            self._players.pop(player_id, None)
+            player = self._players.pop(player_id, None)
+            if player:
+                self._retired_dropped += player.backlog.dropped
+                self._retired_idle += player.backlog.idle
+                self._retired_coalesced += player.backlog.coalesced
 
     def mark_disconnected(self, player_id: str) -> None:
         """Mark a player as offline without deleting its backlog."""
@@ -95,14 +224,12 @@ class Players:
             player = self._players.get(player_id)
             if player:
                 player.connected = False
-                player.last_seen = datetime.utcnow()
+                player.last_seen = time.monotonic()
 
     def set_input_handler(self, player_id: str, handler: InputHandler) -> None:
         """Attach/replace the per-player callback."""
         with self._lock:
-            player = self._players.get(player_id)
-            if not player:
-                player = self.register(player_id)
+            player = self._players.get(player_id) or self._register_locked(player_id)
             player.on_input = handler
 
     def add_global_listener(self, handler: InputHandler) -> None:
@@ -115,21 +242,25 @@ class Players:
 
         - Ensures the player exists (auto-registers if needed).
         - Updates last_seen.
-        - Enqueues the payload.
+        - Queues the payload in the player's InputRing (subject to its policy).
         - Invokes per-player and global callbacks (outside the lock).
+        - Tags the payload for input-to-photon tracing (see input_trace.py).
         """
         listeners: List[InputHandler]
         player: Player
         handler: Optional[InputHandler]
 
+        tracer = get_tracer()
+        tracer.stamp(payload)
         with self._lock:
-            player = self._players.get(player_id) or self.register(player_id)
+            player = self._players.get(player_id) or self._register_locked(player_id)
             player.enqueue(payload)
             handler = player.on_input
             listeners = list(self._global_listeners)
 
         if handler:
             handler(player, payload)
+            tracer.applied(payload)
         for listener in listeners:
             listener(player, payload)
 
@@ -137,17 +268,47 @@ class Players:
         """Pop the oldest queued payload for a player, if any."""
         with self._lock:
             player = self._players.get(player_id)
-            if not player or not player.backlog:
-                return None
-            return player.backlog.popleft()
+            return player.backlog.pop() if player else None
+
+    def drain_batch(self, player_id: str, limit: Optional[int] = None) -> List[InputPayload]:
+        """Remove and return a player's queued payloads (up to limit), oldest first, in one lock hold."""
+        with self._lock:
+            player = self._players.get(player_id)
+            return player.backlog.drain(limit) if player else []
+
+    def drain_game(self, game: str, limit: Optional[int] = None) -> List[Tuple[Player, List[InputPayload]]]:
+        """One game tick's input: (player, payloads) for every player in game, drained in one lock hold."""
+        with self._lock:
+            return [(player, player.backlog.drain(limit)) for player in self._players.values() if player.game == game]
 
     def drain_inputs(self, player_id: str) -> Iterable[InputPayload]:
         """Yield and clear all queued payloads for a player."""
-        while True:
-            payload = self.next_input(player_id)
-            if payload is None:
-                break
-            yield payload
+        yield from self.drain_batch(player_id)
+
+    def input_stats(self) -> Dict[str, Any]:
+        """Queue depth and dropped/idle/coalesced counters, in total and per player."""
+        with self._lock:
+            players = {
+                player.player_id: {
+                    "queued": len(player.backlog),
+                    "dropped": player.backlog.dropped,
+                    "idle": player.backlog.idle,
+                    "coalesced": player.backlog.coalesced,
+                }
+                for player in self._players.values()
+            }
+            dropped = self._retired_dropped + sum(p["dropped"] for p in players.values())
+            idle = self._retired_idle + sum(p["idle"] for p in players.values())
+            coalesced = self._retired_coalesced + sum(p["coalesced"] for p in players.values())
+        return {
+            "policy": self.input_policy,
+            "capacity": self.input_capacity,
+            "queued": sum(p["queued"] for p in players.values()),
+            "dropped": dropped,
+            "idle": idle,
+            "coalesced": coalesced,
+            "players": players,
+        }
 
     def active_players(self) -> List[Player]:
         """Snapshot of all players (connected flag may be False)."""
@@ -165,7 +326,10 @@ class Players:
 
 
 # Module-level singleton and helpers so callers don't manage registry wiring
-_registry = Players()
+_registry = Players(
+    input_capacity=int(os.environ.get("TWINKLYWALL_INPUT_CAPACITY", INPUT_CAPACITY)),
+    input_policy=os.environ.get("TWINKLYWALL_INPUT_POLICY", DROP_ON_IDLE),
+)
 
 
 def get_registry() -> Players:
@@ -194,6 +358,21 @@ def set_input_handler(player_id: str, handler: InputHandler) -> None:
     _registry.set_input_handler(player_id, handler)
 
 
+def drain_batch(player_id: str, limit: Optional[int] = None) -> List[InputPayload]:
+    """Take a player's queued payloads from the shared registry in one go."""
+    return _registry.drain_batch(player_id, limit)
+
+
+def drain_game(game: str, limit: Optional[int] = None) -> List[Tuple[Player, List[InputPayload]]]:
+    """Take every queued payload for a game's players from the shared registry (once per tick)."""
+    return _registry.drain_game(game, limit)
+
+
+def input_stats() -> Dict[str, Any]:
+    """Queue depth and dropped/idle/coalesced input counters of the shared registry."""
+    return _registry.input_stats()
+
+
 def active_players() -> List[Player]:
     """Snapshot of active players from the shared registry."""
     return _registry.active_players()
@@ -0,0 +1,197 @@
+"""
+Rendered Video: uncompressed, memory-mappable container for pre-rendered clips.
+
+A .twv file is a small fixed header, a JSON metadata block, and then every
+frame back to back as one contiguous N x H x W x 3 uint8 array starting at a
+page-aligned offset. Opening one costs a header read and an np.memmap; frames
+are paged in by the kernel as playback reaches them and stay in the page cache
+between plays, instead of np.load() decompressing the whole .npz into RAM.
+
+Usage:
+    python rendered_video.py convert <file.npz> [more.npz ...] [--delete]
+    python rendered_video.py info <file.twv>
+"""
+
+import json
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+RAW_SUFFIX = ".twv"
+MAGIC = b"TWRV"
+VERSION = 1
+# magic, version, header size, frame count, width, height, channels, metadata length, data offset, fps
+HEADER = struct.Struct("<4sHHIHHBxxxIQd")
+DATA_ALIGN = 4096
+
+
+class RawVideoWriter:
+    """Streams frames into a .twv file.
+
+    Frames are appended as they are produced, so a renderer never holds the
+    whole clip in memory. The file is written next to its destination and
+    renamed into place on close(), so players never see a partial render.
+    """
+
+    def __init__(self, path, width, height, fps, metadata=None):
+        self.path = Path(path)
+        self.width = int(width)
+        self.height = int(height)
+        self.fps = float(fps)
+        self.frame_count = 0
+        meta = json.dumps(metadata or {}, default=str).encode("utf-8")
+        self._meta = meta
+        self._data_offset = -(-(HEADER.size + len(meta)) // DATA_ALIGN) * DATA_ALIGN
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(self._header())
+        self._file.write(meta)
+        self._file.seek(self._data_offset)
+
+    def _header(self):
+        return HEADER.pack(MAGIC, VERSION, HEADER.size, self.frame_count, self.width, self.height, 3,
+                           len(self._meta), self._data_offset, self.fps)
+
+    def write_frame(self, frame):
+        """Append one H x W x 3 uint8 frame."""
+        arr = np.ascontiguousarray(frame, dtype=np.uint8)
+        if arr.shape != (self.height, self.width, 3):
+            raise ValueError(f"Frame shape {arr.shape} does not match {(self.height, self.width, 3)}")
+        self._file.write(arr.data)
+        self.frame_count += 1
+
+    def write_frames(self, frames):
+        """Append an N x H x W x 3 block of frames."""
+        for frame in frames:
+            self.write_frame(frame)
+
+    def close(self):
+        """Finalize the header and move the file into place."""
+        if self._file is None:
+            return
+        # Make sure a zero-frame file still spans the data offset
+        self._file.truncate(self._data_offset + self.frame_count * self.height * self.width * 3)
+        self._file.seek(0)
+        self._file.write(self._header())
+        self._file.close()
+        self._file = None
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discard a partially written file."""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def read_header(path):
+    """Read the header and metadata of a .twv file without mapping the frames."""
+    with open(path, "rb") as f:
+        raw = f.read(HEADER.size)
+        if len(raw) < HEADER.size:
+            raise ValueError(f"Not a rendered video (truncated header): {path}")
+        magic, version, header_size, frames, width, height, channels, meta_len, data_offset, fps = HEADER.unpack(raw)
+        if magic != MAGIC:
+            raise ValueError(f"Not a rendered video (bad magic): {path}")
+        if version != VERSION:
+            raise ValueError(f"Unsupported rendered video version {version}: {path}")
+        f.seek(header_size)
+        metadata = json.loads(f.read(meta_len).decode("utf-8")) if meta_len else {}
+    return {
+        "frame_count": frames,
+        "width": width,
+        "height": height,
+        "channels": channels,
+        "fps": fps,
+        "data_offset": data_offset,
+        "metadata": metadata,
+    }
+
+
+def open_raw_video(path):
+    """Map a .twv file for playback.
+
+    Returns a dict with keys: frames (read-only np.memmap, N x H x W x 3), fps,
+    width, height, metadata. Nothing beyond the header is read until frames are
+    indexed.
+    """
+    info = read_header(path)
+    shape = (info["frame_count"], info["height"], info["width"], info["channels"])
+    expected = info["data_offset"] + int(np.prod(shape))
+    if os.path.getsize(path) < expected:
+        raise ValueError(f"Rendered video is truncated: {path}")
+    if info["frame_count"] == 0:
+        frames = np.zeros(shape, dtype=np.uint8)
+    else:
+        frames = np.memmap(path, dtype=np.uint8, mode="r", offset=info["data_offset"], shape=shape)
+    return {
+        "frames": frames,
+        "fps": info["fps"],
+        "width": info["width"],
+        "height": info["height"],
+        "metadata": info["metadata"],
+    }
+
+
+def convert_npz(npz_path, output_path=None):
+    """Convert a savez_compressed render (.npz) to a .twv file beside it.
+
+    Returns the path of the new file.
+    """
+    npz_path = Path(npz_path)
+    output_path = Path(output_path) if output_path else npz_path.with_suffix(RAW_SUFFIX)
+    with np.load(npz_path) as data:
+        frames = data["frames"]
+        fps = float(data["fps"]) if "fps" in data else 20.0
+        height = int(data["height"]) if "height" in data else frames.shape[1]
+        width = int(data["width"]) if "width" in data else frames.shape[2]
+        metadata = {key: data[key].item() for key in data.files
+                    if key not in ("frames", "fps", "width", "height") and data[key].ndim == 0}
+    frames = frames.reshape((-1, height, width, 3))
+    metadata["converted_from"] = npz_path.name
+    with RawVideoWriter(output_path, width, height, fps, metadata) as writer:
+        writer.write_frames(frames)
+    return output_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    p = argparse.ArgumentParser(description="Convert and inspect memory-mapped rendered videos (.twv)")
+    sub = p.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="Convert .npz renders to .twv")
+    conv.add_argument("paths", nargs="+", help=".npz files to convert")
+    conv.add_argument("--delete", action="store_true", help="Remove each .npz after a successful conversion")
+    info_p = sub.add_parser("info", help="Print the header of a .twv file")
+    info_p.add_argument("path")
+    args = p.parse_args()
+
+    if args.command == "convert":
+        for path in args.paths:
+            out = convert_npz(path)
+            clip = open_raw_video(out)
+            print(f"{path} -> {out} ({clip['frames'].shape[0]} frames, "
+                  f"{clip['width']}x{clip['height']} @ {clip['fps']:.2f} fps, "
+                  f"{out.stat().st_size / (1024 * 1024):.2f} MB)")
+            if args.delete:
+                os.remove(path)
+    else:
+        info = read_header(args.path)
+        for key, value in info.items():
+            print(f"{key}: {value}")
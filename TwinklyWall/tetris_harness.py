@@ -0,0 +1,291 @@
+"""Headless Tetris harness: load-test and replay the game path without phones.
+
+TetrisHarness plays FastTetris on an off-screen Surface the way run_tetris
+does (same tick, same snapshot renderer, same DotMatrix dirty-rect render),
+but as fast as possible with a fixed dt on the calling thread. Bot players
+join through game_players and send their commands through
+players.handle_input, so the input path is the real one too.
+
+A run is fully determined by the seed and the input log (tick, player,
+command). Save the log with save_log() and feed it back as a script to
+reproduce a bug report; state_hash() fingerprints the final game state.
+The seed goes to FastTetris's SeededBag, so nothing else drawing from the
+random module can change the pieces. (Sessions on the wall are recorded
+as .twtr files instead; see tetris_replay.py.)
+"""
+
+import contextlib
+import gc
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pygame
+
+from dotmatrix import DotMatrix
+from game_players import join_game, leave_game
+from games.fast_tetris import INPUT_ACTIONS, SHAPE_STATES, FastTetris, piece_mask
+from input_trace import get_tracer
+from players import handle_input
+
+COMMANDS = tuple(INPUT_ACTIONS)
+
+
+class RandomBot:
+    """Sends rate random commands per second of game time (evenly spaced, random choice).
+
+    phase (0..1) offsets the schedule, so bots sharing a game take turns
+    instead of sending on the same ticks.
+    """
+
+    def __init__(self, rng, rate, tick_rate, phase=0.0):
+        self.rng = rng
+        self.per_tick = rate / tick_rate
+        self._due = phase
+
+    def commands(self, tick):
+        self._due += self.per_tick
+        while self._due >= 1.0:
+            self._due -= 1.0
+            yield self.rng.choice(COMMANDS)
+
+
+class StackBot(RandomBot):
+    """Steers each piece to its best rotation and column (see _score), turns and moves it
+    there, then soft-drops it until it touches down. Rows fill and clear, so line clears
+    get exercised."""
+
+    def __init__(self, rng, rate, tick_rate, game, phase=0.0):
+        super().__init__(rng, rate, tick_rate, phase)
+        self.game = game
+        self._piece = None
+        self._target = (None, 0)
+        self._placed = 0
+
+    def _pick(self, piece):
+        game = self.game
+        y_start = piece.grid_position[1]
+        best, best_score = [], None
+        for shape in SHAPE_STATES[piece.type_index]:
+            mask = piece_mask(shape)
+            for x in range(-mask.x0, game.blocks_width - mask.x0 - mask.width + 1):
+                if not game.check_move_validity(test_postion=(x, y_start), test_shape=shape):
+                    continue
+                y = y_start
+                while game.check_move_validity(test_postion=(x, y - 1), test_shape=shape):
+                    y -= 1
+                score = self._score(mask, x, y)
+                if best_score is None or score < best_score:
+                    best, best_score = [(shape, x)], score
+                elif score == best_score:
+                    best.append((shape, x))
+        if not best:
+            return piece.shape, piece.grid_position[0]
+        # Every bot sees the same pieces, so counting them keeps co-op bots on one target
+        self._placed += 1
+        return best[self._placed % len(best)]
+
+    def _score(self, mask, x, y):
+        """Lower is better: more lines cleared, then fewer holes, a flatter and a lower stack."""
+        board = self.game.board != 0
+        board[mask.ys + y, mask.xs + x] = True
+        full = board.all(axis=1)
+        board = board[~full]
+        filled = board.any(axis=0)
+        heights = np.where(filled, len(board) - np.argmax(board[::-1], axis=0), 0)
+        holes = int(heights.sum()) - int(np.count_nonzero(board))
+        return (-int(full.sum()), holes, int(np.abs(np.diff(heights)).sum()), int(heights.max()))
+
+    def commands(self, tick):
+        for _ in super().commands(tick):
+            piece = self.game.live_tetromino
+            if piece is not self._piece:
+                self._piece = piece
+                self._target = self._pick(piece)
+            shape, target_x = self._target
+            x = piece.grid_position[0]
+            if piece.shape is not shape:
+                yield "ROTATE_RIGHT"
+            elif x != target_x:
+                yield "MOVE_RIGHT" if x < target_x else "MOVE_LEFT"
+            elif not self.game.is_down:
+                # Once down, let the lock timer run out: every move while down
+                # counts towards max_moves_while_down
+                yield "MOVE_DOWN"
+
+
+class ScriptBot:
+    """Replays a player's commands from an input log: {tick: [cmd, ...]}."""
+
+    def __init__(self, by_tick):
+        self.by_tick = by_tick
+
+    def commands(self, tick):
+        return self.by_tick.get(tick, ())
+
+
+def load_log(path):
+    """(header, [(tick, player, cmd), ...]) from a file written by save_log()."""
+    with open(path) as f:
+        header = json.loads(f.readline())
+        entries = [tuple(json.loads(line)) for line in f if line.strip()]
+    return header, entries
+
+
+class TetrisHarness:
+    """Drives a headless FastTetris with bot players.
+
+    Args:
+        seed: Seeds the piece sequence and the bots
+        players: Number of bot players (Tetris allows up to 2)
+        rate: Commands per second of game time, per bot
+        bot: "random" (any command) or "stack" (place pieces to clear lines, see StackBot)
+        script: Optional input log entries [(tick, player, cmd)]; replaces the bots
+        tick_rate, render_fps: As in run_tetris; a frame is rendered every tick_rate // render_fps ticks
+        fpp_file: Write FPP output (direct mmap) to this file; None renders without FPP
+    """
+
+    def __init__(self, seed=0, players=1, rate=4.0, bot="random", script=None, tick_rate=60, render_fps=20,
+                 fpp_file=None):
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.render_fps = render_fps
+        self.dt = 1.0 / tick_rate
+        self.ticks_per_render = max(1, tick_rate // render_fps)
+        self.player_ids = [f"harness-{seed}-{i + 1}" for i in range(players)]
+        for player_id in self.player_ids:
+            if not join_game(player_id, phone_id=player_id, game="tetris"):
+                self.close()
+                raise RuntimeError(f"Could not join {player_id}: tetris is full")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.matrix = DotMatrix(
+                headless=True, fpp_output=fpp_file is not None, disable_blending=True, supersample=1,
+                fpp_gamma=2.2, fpp_memory_buffer_file=fpp_file, fpp_direct_mmap=True,
+                enable_performance_monitor=False, max_fps=None,
+            )
+            self.canvas = pygame.Surface((self.matrix.width, self.matrix.height))
+            self.game = FastTetris(self.canvas, True, seed=seed)
+        self.renderer = self.game.renderer
+        self.game.renderer = None
+        self.game.begin_play()
+
+        if script is not None:
+            by_player = [{} for _ in range(players)]
+            for tick, player, cmd in script:
+                by_player[player].setdefault(tick, []).append(cmd)
+            self.bots = [ScriptBot(by_tick) for by_tick in by_player]
+        elif bot == "stack":
+            self.bots = [StackBot(random.Random(f"{seed}:{i}"), rate, tick_rate, self.game, i / players)
+                         for i in range(players)]
+        else:
+            self.bots = [RandomBot(random.Random(f"{seed}:{i}"), rate, tick_rate, i / players) for i in range(players)]
+
+        self.tick = 0
+        self.log = []       # (tick, player, cmd) as sent
+        self.topouts = 0
+        self.frames = 0
+        self.tick_s = 0.0
+        self.render_s = 0.0
+
+    def step(self):
+        """Send this tick's bot commands, tick once and render if a frame is due."""
+        tracer = get_tracer()
+        tick = self.tick
+        for index, bot in enumerate(self.bots):
+            player_id = self.player_ids[index]
+            for cmd in bot.commands(tick):
+                handle_input(player_id, {"player_id": player_id, "cmd": cmd, "transport": "harness"})
+                self.log.append((tick, index, cmd))
+
+        start = time.perf_counter()
+        tracer.tick_started(start)
+        self.game.tick(self.dt, self.render_fps)
+        tracer.tick_done()
+        self.tick_s += time.perf_counter() - start
+        self.tick += 1
+        if not self.game.check_move_validity():
+            # The new piece spawned into the stack: the game is lost; start over on an empty board
+            self.game.board[...] = 0
+            self.game.reset_down()
+            self.topouts += 1
+
+        if tick % self.ticks_per_render == 0:
+            start = time.perf_counter()
+            self.renderer.draw(self.game.snapshot)
+            self.matrix.render_frame(self.canvas, pace=False, dirty=self.renderer.take_dirty())
+            tracer.frame_written(*self.matrix.last_frame_times)
+            self.render_s += time.perf_counter() - start
+            self.frames += 1
+
+    def run(self, ticks, trace_alloc=False):
+        """Run ticks steps as fast as possible. Returns the stats() of this run."""
+        if trace_alloc:
+            tracemalloc.start()
+        gc_before = sum(stat["collections"] for stat in gc.get_stats())
+        blocks_before = sys.getallocatedblocks()
+        first_tick, tick_s, render_s, frames = self.tick, self.tick_s, self.render_s, self.frames
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # Tetris prints on every lock-down tick
+            for _ in range(ticks):
+                self.step()
+        elapsed = time.perf_counter() - start
+        run_ticks = self.tick - first_tick
+        run_frames = self.frames - frames
+        stats = {
+            "ticks": run_ticks,
+            "frames": run_frames,
+            "elapsed_s": round(elapsed, 3),
+            "ticks_per_s": round(run_ticks / elapsed, 1) if elapsed else None,
+            "tick_us": round((self.tick_s - tick_s) * 1e6 / run_ticks, 1) if run_ticks else None,
+            "render_ms": round((self.render_s - render_s) * 1000 / run_frames, 4) if run_frames else None,
+            "partial_frames": self.matrix.partial_frames,
+            "inputs": len(self.log),
+            "lines_cleared": self.game.lines_cleared,
+            "topouts": self.topouts,
+            "alloc_blocks_growth": sys.getallocatedblocks() - blocks_before,
+            "gc_collections": sum(stat["collections"] for stat in gc.get_stats()) - gc_before,
+        }
+        if trace_alloc:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            stats["traced_kib"] = round(current / 1024, 1)
+            stats["traced_peak_kib"] = round(peak / 1024, 1)
+        return stats
+
+    def state_hash(self):
+        """Fingerprint of the game state: tick, board with the live piece, next piece, lines cleared."""
+        snapshot = self.game.snapshot
+        digest = hashlib.sha1()
+        digest.update(f"{self.tick}:{snapshot.next_piece}:{self.game.lines_cleared}:{self.topouts}:".encode())
+        digest.update(snapshot.cells.tobytes())
+        return digest.hexdigest()[:16]
+
+    def save_log(self, path):
+        """Write the seed and every command sent so far, one JSON line each."""
+        with open(path, "w") as f:
+            f.write(json.dumps({"seed": self.seed, "players": len(self.player_ids), "ticks": self.tick,
+                                "state_hash": self.state_hash()}) + "\n")
+            for entry in self.log:
+                f.write(json.dumps(list(entry)) + "\n")
+
+    def close(self):
+        for player_id in self.player_ids:
+            leave_game(player_id)
+        if getattr(self, "matrix", None) is not None:
+            self.matrix.shutdown()
+            self.matrix = None
+
+
+def temp_fpp_file():
+    """A throwaway FPP memory file for benchmarking the output path."""
+    handle, path = tempfile.mkstemp(prefix="twinklywall-fpp-")
+    os.close(handle)
+    return path
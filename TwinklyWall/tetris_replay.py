@@ -0,0 +1,276 @@
+"""
+Tetris replays: compact session recordings, re-simulated tick for tick.
+
+A FastTetris game with a seed is fully determined by that seed, the fixed
+tick dt and the commands applied before each tick. A .twtr recording stores
+exactly that: a fixed header, then one small EVENT per applied command (the
+tick it was applied before, milliseconds since the session started, the
+player slot and the command). A minute of play with two busy players is a
+few kilobytes.
+
+Events are appended while the game runs; close() fills in the tick count
+and the final state hash. If the process dies first, the header still says
+0 ticks and load_recording() replays up to the last event on disk.
+
+TetrisReplay re-simulates a recording headless as fast as the CPU allows
+(timing every tick, so any recording doubles as a game-loop benchmark) and
+checks the final state hash, or feeds a live game tick by tick so
+run_tetris can play it back on the wall at normal speed.
+
+Usage:
+    python tetris_replay.py info <file.twtr>
+    python tetris_replay.py run <file.twtr> [--repeat 5]
+    python main.py --mode tetris --replay <file.twtr>     (on the wall, in real time)
+"""
+
+import argparse
+import contextlib
+import hashlib
+import os
+import secrets
+import struct
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from games.fast_tetris import FastTetris
+from games.versus_tetris import VersusTetris
+from latency_stats import LatencyHistogram
+
+RECORDING_SUFFIX = ".twtr"
+MAGIC = b"TWTR"
+VERSION = 1
+# magic, version, header size, seed, tick rate, gravity fps, player slots, boards (0 = 1), ticks, commands,
+# start time, state hash
+HEADER = struct.Struct("<4sHHQHHBBIId8s")
+# tick the command was applied before, ms since the session started, player slot, command code
+EVENT = struct.Struct("<IIBB")
+# Command codes as stored in recordings: only ever append
+COMMANDS = ("MOVE_LEFT", "MOVE_RIGHT", "ROTATE_RIGHT", "ROTATE_LEFT", "MOVE_DOWN", "HARD_DROP")
+_CODES = {cmd: code for code, cmd in enumerate(COMMANDS)}
+NO_HASH = bytes(8)
+
+
+def new_seed():
+    """A fresh seed for a recorded game."""
+    return secrets.randbits(32)
+
+
+def state_hash(game):
+    """8-byte fingerprint of everything the next tick depends on."""
+    if isinstance(game, VersusTetris):
+        digest = hashlib.sha1(b"".join(state_hash(board) for board in game.boards))
+        digest.update(repr((game.pending_garbage, game.garbage_sent, game.topouts)).encode())
+        return digest.digest()[:8]
+    piece = game.live_tetromino
+    digest = hashlib.sha1(game.board.tobytes())
+    digest.update(repr((
+        game.ticks, game.lines_cleared, game.bag.next_piece, tuple(game.bag.contents),
+        piece.type_index, tuple(piece.grid_position), piece.shape, piece.precise_height,
+        game.accumulated_gravity, game.is_down, game.down_time_elapsed, game.moves_while_down,
+    )).encode())
+    return digest.digest()[:8]
+
+
+class TetrisRecorder:
+    """Writes a .twtr recording while a game is played.
+
+    Attach it as game.recorder: FastTetris.apply_inputs() calls input() for
+    every command on the thread running the game, where it costs a struct
+    pack and a buffered write. close(game) completes the header.
+    """
+
+    def __init__(self, path, seed, tick_rate, gravity_fps, players, boards=1):
+        self.path = Path(path)
+        self.seed = int(seed)
+        self.tick_rate = int(tick_rate)
+        self.gravity_fps = int(gravity_fps)
+        self.players = int(players)
+        self.boards = int(boards)
+        self.commands = 0
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self._file = open(self.path, "wb")
+        self._file.write(self._header(0, NO_HASH))
+
+    def _header(self, ticks, digest):
+        return HEADER.pack(MAGIC, VERSION, HEADER.size, self.seed, self.tick_rate, self.gravity_fps, self.players,
+                           self.boards, ticks, self.commands, self.started, digest)
+
+    def input(self, tick, slot, cmd):
+        ms = int((time.perf_counter() - self._t0) * 1000)
+        self._file.write(EVENT.pack(tick, ms, slot, _CODES[cmd]))
+        self.commands += 1
+
+    def close(self, game=None):
+        """Write the tick count and final state hash of game (if given) and close the file."""
+        if self._file is None:
+            return
+        ticks, digest = (game.ticks, state_hash(game)) if game is not None else (0, NO_HASH)
+        self._file.seek(0)
+        self._file.write(self._header(ticks, digest))
+        self._file.close()
+        self._file = None
+
+
+def new_recording_path(directory, seed, keep=50):
+    """Path for the next recording in directory, deleting the oldest beyond keep."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    old = sorted(directory.glob(f"*{RECORDING_SUFFIX}"), key=lambda p: p.stat().st_mtime)
+    for path in old[:max(0, len(old) - keep + 1)]:
+        path.unlink(missing_ok=True)
+    return directory / f"tetris-{time.strftime('%Y%m%d-%H%M%S')}-{seed:08x}{RECORDING_SUFFIX}"
+
+
+class Recording:
+    """A loaded .twtr file. events: [(tick, ms, slot, cmd)] in the order they were applied.
+
+    boards > 1 is a VersusTetris game with a board per player slot.
+    """
+
+    def __init__(self, path, seed, tick_rate, gravity_fps, players, boards, ticks, started, state_hash, events):
+        self.path = Path(path)
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.gravity_fps = gravity_fps
+        self.players = players
+        self.boards = max(1, boards)
+        self.started = started
+        self.state_hash = state_hash
+        self.events = events
+        # An unfinished recording (the process died) replays up to its last command
+        self.complete = ticks > 0
+        self.ticks = ticks if self.complete else (events[-1][0] + 1 if events else 0)
+
+    @property
+    def duration_s(self):
+        return self.ticks / self.tick_rate if self.tick_rate else 0.0
+
+
+def load_recording(path):
+    data = Path(path).read_bytes()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is too short for a recording header")
+    magic, version, header_size, seed, tick_rate, gravity_fps, players, boards, ticks, _, started, digest = \
+        HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a Tetris recording")
+    if version != VERSION:
+        raise ValueError(f"{path}: unsupported recording version {version}")
+    # Events up to the last complete one (a crash can cut the final write short)
+    count = (len(data) - header_size) // EVENT.size
+    events = [(tick, ms, slot, COMMANDS[code])
+              for tick, ms, slot, code in EVENT.iter_unpack(data[header_size:header_size + count * EVENT.size])]
+    return Recording(path, seed, tick_rate, gravity_fps, players, boards, ticks, started,
+                     digest if digest != NO_HASH else None, events)
+
+
+class TetrisReplay:
+    """Re-simulates a Recording.
+
+    new_game() builds the game with the recorded seed; feed(game) queues the
+    commands recorded for the tick the game is about to run; done(game) is
+    true once every recorded tick has run. run() does all of it headless,
+    as fast as possible.
+    """
+
+    def __init__(self, recording):
+        self.recording = recording
+        self.dt = 1.0 / recording.tick_rate
+        self._next = 0
+
+    def new_game(self, canvas=None, headless=True):
+        self._next = 0
+        if canvas is None:
+            canvas = pygame.Surface((90, 50))
+        if self.recording.boards > 1:
+            return VersusTetris(canvas, headless, players=self.recording.boards, seed=self.recording.seed)
+        return FastTetris(canvas, headless, seed=self.recording.seed)
+
+    def feed(self, game):
+        events = self.recording.events
+        index = self._next
+        while index < len(events) and events[index][0] <= game.ticks:
+            _, _, slot, cmd = events[index]
+            game.queue_input(None, {"cmd": cmd}, slot)
+            index += 1
+        self._next = index
+
+    def done(self, game):
+        return game.ticks >= self.recording.ticks
+
+    def run(self, repeat=1):
+        """Re-simulate repeat times at unbounded speed. Returns timings and whether the state hash matched."""
+        recording = self.recording
+        tick_ms = LatencyHistogram()
+        elapsed = 0.0
+        digest = None
+        for _ in range(repeat):
+            # Tetris prints on every new bag and lock-down tick
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                game = self.new_game()
+                game.renderer = None
+                start = time.perf_counter()
+                while not self.done(game):
+                    self.feed(game)
+                    tick_start = time.perf_counter()
+                    game.tick(self.dt, recording.gravity_fps)
+                    tick_ms.record((time.perf_counter() - tick_start) * 1000)
+                elapsed += time.perf_counter() - start
+            digest = state_hash(game)
+        ticks = recording.ticks * repeat
+        return {
+            "ticks": ticks,
+            "commands": len(recording.events) * repeat,
+            "elapsed_s": round(elapsed, 3),
+            "ticks_per_s": round(ticks / elapsed, 1) if elapsed else None,
+            "realtime_x": round(ticks / elapsed / recording.tick_rate, 1) if elapsed else None,
+            "tick": tick_ms.to_dict(),
+            "state_hash": digest.hex(),
+            "expected_hash": recording.state_hash.hex() if recording.state_hash else None,
+            "matches": None if recording.state_hash is None else digest == recording.state_hash,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and re-simulate Tetris recordings")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info", help="Show a recording's header")
+    info.add_argument("file")
+    run = sub.add_parser("run", help="Re-simulate headless at full speed and check the final state")
+    run.add_argument("file")
+    run.add_argument("--repeat", type=int, default=1, help="Re-simulate this many times (benchmarking)")
+    args = parser.parse_args()
+
+    recording = load_recording(args.file)
+    if args.command == "info":
+        print(f"{recording.path.name}: seed {recording.seed}, {recording.players} player(s) on "
+              f"{recording.boards} board(s), "
+              f"{recording.ticks} ticks at {recording.tick_rate}/s ({recording.duration_s:.1f}s), "
+              f"{len(recording.events)} commands, started {time.ctime(recording.started)}"
+              + ("" if recording.complete else " (unfinished)"))
+        return
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    stats = TetrisReplay(recording).run(repeat=args.repeat)
+    tick = stats["tick"]
+    print(f"Replayed {stats['ticks']} ticks ({stats['commands']} commands) in {stats['elapsed_s']}s: "
+          f"{stats['ticks_per_s']} ticks/s, {stats['realtime_x']}x real time")
+    print(f"Tick: avg {tick['avg_ms']}ms, p50 {tick['p50_ms']}ms, p99 {tick['p99_ms']}ms, max {tick['max_ms']}ms")
+    if stats["matches"] is None:
+        print(f"State hash: {stats['state_hash']} (recording has none to check against)")
+    elif stats["matches"]:
+        print(f"State hash: {stats['state_hash']} (matches)")
+    else:
+        print(f"MISMATCH: state hash {stats['state_hash']}, recorded {stats['expected_hash']}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,23 @@
 """
 Video Player: Plays pre-rendered videos on the DotMatrix.
 
-Loads .npz files produced by video_renderer and streams frames to the matrix
-with accurate timing, looping, and optional playback controls.
+Loads renders produced by video_renderer (memory-mapped .twv, or legacy .npz)
+and streams frames to the matrix with accurate timing, looping, and optional
+playback controls.
 """
 
 import os
-import time
 from pathlib import Path
 from typing import Optional, Union
 
 import numpy as np
 
+from dotmatrix.frame_clock import FrameClock
+from rendered_video import RAW_SUFFIX, open_raw_video
+
 
 class VideoPlayer:
-    """Optimized player for rendered videos (.npz) targeting DotMatrix."""
+    """Optimized player for rendered videos (.twv / .npz) targeting DotMatrix."""
 
     def __init__(self, matrix, base_dir: Union[str, Path] = "dotmatrix/rendered_videos"):
         """
@@ -25,6 +28,7 @@ class VideoPlayer:
         self.matrix = matrix
         self.base_dir = Path(base_dir)
         self._stop = False
+        self.clock = None  # FrameClock of the current/last playback (pacing stats)
 
     def stop(self):
         """Request playback to stop after current frame."""
@@ -32,24 +36,37 @@ class VideoPlayer:
 
     def _resolve_path(self, name_or_path: Union[str, Path]) -> Optional[Path]:
         p = Path(name_or_path)
-        if p.suffix == "":
-            # Bare name: try in base_dir with .npz
-            candidate = self.base_dir / f"{p.name}.npz"
-            return candidate if candidate.exists() else None
-        if p.exists():
-            return p
-        # Try relative to base_dir
-        candidate = self.base_dir / p.name
-        return candidate if candidate.exists() else None
+        if p.suffix not in (RAW_SUFFIX, ".npz"):
+            # Bare name: try in base_dir, preferring the memory-mapped render
+            for suffix in (RAW_SUFFIX, ".npz"):
+                candidate = self.base_dir / f"{p.name}{suffix}"
+                if candidate.exists():
+                    return candidate
+            return p if p.suffix and p.exists() else None
+        for candidate in (p, self.base_dir / p.name):
+            # A converted .twv next to a legacy .npz starts without decompressing
+            if candidate.suffix == ".npz" and candidate.with_suffix(RAW_SUFFIX).exists():
+                return candidate.with_suffix(RAW_SUFFIX)
+            if candidate.exists():
+                return candidate
+        return None
 
     def load(self, name_or_path: Union[str, Path]):
-        """Load a rendered video (.npz) from disk into memory.
+        """Open a rendered video.
+
+        .twv renders are memory-mapped, so this returns immediately and frames
+        are read from the page cache as they are played. Legacy .npz renders
+        are decompressed into memory.
 
         Returns a dict with keys: frames (H x W x 3 x N or N x H x W x 3), fps, width, height
         """
         path = self._resolve_path(name_or_path)
         if not path:
             raise FileNotFoundError(f"Render not found: {name_or_path}")
+        if path.suffix == RAW_SUFFIX:
+            clip = open_raw_video(path)
+            clip["path"] = str(path)
+            return clip
         data = np.load(path)
         frames = data["frames"]
         fps = float(data["fps"]) if "fps" in data else 20.0
@@ -83,7 +100,7 @@ class VideoPlayer:
         """Play a rendered video on the matrix.
 
         Args:
-            name_or_path: Path or base-name of .npz file (searched under base_dir)
+            name_or_path: Path or base-name of .twv/.npz file (searched under base_dir)
             loop: If True, loop indefinitely (ignored if repeat is provided)
             repeat: Number of times to repeat playback (None = 1 pass, 0 = infinite)
             speed: Playback speed multiplier (e.g., 0.5 = half speed, 2.0 = double)
@@ -109,7 +126,6 @@ class VideoPlayer:
         # Compute target playback fps
         target_fps = playback_fps if playback_fps is not None else fps * max(1e-3, speed)
         target_fps = max(1e-3, target_fps)
-        frame_dt = 1.0 / target_fps
 
         # Logging: playback configuration (reflects actual target_fps)
         target_label = "FPP" if getattr(self.matrix, "fpp", None) else "Preview"
@@ -135,9 +151,9 @@ class VideoPlayer:
             if scale_0_255 is not None:
                 # Fast scalar multiply using float32 then clip/cast; avoid modifying original frames
                 scaled = np.minimum(255.0, (arr_uint8.astype(np.float32) * (scale_0_255 / 255.0))).astype(np.uint8)
-                self.matrix.render_colors(scaled)
+                self.matrix.render_colors(scaled, pace=False)
             else:
-                self.matrix.render_colors(arr_uint8)
+                self.matrix.render_colors(arr_uint8, pace=False)
 
         frames_rendered = 0
 
@@ -145,22 +161,25 @@ class VideoPlayer:
         infinite = loop or (repeat == 0)
         remaining = repeat if (repeat is not None and repeat > 0) else (None if infinite else 1)
 
+        # The player is the only pacer: one deadline per video frame, and frames whose
+        # deadline has already passed are dropped so playback stays on the wall clock
+        clock = FrameClock(target_fps, policy="skip")
+        self.clock = clock
+
         try:
             while infinite or (remaining is None or remaining > 0):
-                t_loop_start = time.perf_counter()
-                for idx in range(start_frame, end_frame):
+                idx = start_frame
+                while idx < end_frame:
                     if self._stop:
                         return frames_rendered
-                    t0 = time.perf_counter()
+                    idx += clock.tick()
+                    if idx >= end_frame:
+                        break
                     render_frame(frames[idx])
-                    # Accurate frame pacing
-                    elapsed = time.perf_counter() - t0
-                    sleep_time = frame_dt - elapsed
-                    if sleep_time > 0:
-                        time.sleep(sleep_time)
+                    idx += 1
                     frames_rendered += 1
                     if frames_rendered % 200 == 0:
-                        print(f"  Progress: {frames_rendered} frames rendered")
+                        print(f"  Progress: {frames_rendered} frames rendered | {clock.summary()}")
                 if not infinite:
                     if remaining is None:
                         remaining = 0
@@ -170,6 +189,7 @@ class VideoPlayer:
             pass
 
         print(f"[VideoPlayer] Playback finished, frames rendered: {frames_rendered}")
+        print(clock.format_histograms())
 
         return frames_rendered
 
@@ -187,8 +207,8 @@ def video_player_cli(path: str, loop: bool = False):
 if __name__ == "__main__":
     import argparse
 
-    p = argparse.ArgumentParser(description="Play a rendered .npz video on the DotMatrix")
-    p.add_argument("path", help="Path or base name of the .npz in dotmatrix/rendered_videos")
+    p = argparse.ArgumentParser(description="Play a rendered .twv/.npz video on the DotMatrix")
+    p.add_argument("path", help="Path or base name of the render in dotmatrix/rendered_videos")
     p.add_argument("--loop", action="store_true", help="Loop playback")
     p.add_argument("--speed", type=float, default=1.0, help="Playback speed multiplier")
     p.add_argument("--start", type=int, default=0, help="Start frame index")
@@ -2,7 +2,9 @@
 Video Renderer: Pre-renders video files to optimized FPP color data.
 
 Converts video files to cached numpy arrays of color data that can be played back
-directly on the LED wall without real-time decoding overhead.
+directly on the LED wall without real-time decoding overhead. Renders are
+written as memory-mapped .twv files (see rendered_video.py) by default, or as
+compressed .npz archives.
 """
 
 import os
@@ -11,6 +13,9 @@ import numpy as np
 import pickle
 from pathlib import Path
 
+from dotmatrix.frame_clock import FrameClock
+from rendered_video import RAW_SUFFIX, RawVideoWriter, open_raw_video
+
 try:
     import cv2
     HAS_CV2 = True
@@ -23,7 +28,7 @@ class VideoRenderer:
     """Renders video files to pre-computed color data for FPP playback."""
     
     def __init__(self, matrix_width=90, matrix_height=50, output_dir="dotmatrix/rendered_videos", 
-                 downscale_factor=1.0, quantize_bits=8):
+                 downscale_factor=1.0, quantize_bits=8, output_format="twv"):
         """
         Initialize video renderer.
         
@@ -33,6 +38,7 @@ class VideoRenderer:
             output_dir: Directory to save rendered video data
             downscale_factor: Downscale resolution by this factor (e.g., 0.5 = 80x45 from 90x50) to reduce payload
             quantize_bits: Bits per color channel (8=no quantize, 6=reduce to 6-bit per channel for ~25% bandwidth savings)
+            output_format: "twv" (uncompressed, memory-mapped at playback) or "npz" (compressed archive)
         """
         if not HAS_CV2:
             raise ImportError("opencv-python is required for video rendering")
@@ -44,6 +50,9 @@ class VideoRenderer:
         # Compute actual downscaled dimensions
         self.downscaled_width = max(1, int(matrix_width * self.downscale_factor))
         self.downscaled_height = max(1, int(matrix_height * self.downscale_factor))
+        if output_format not in ("twv", "npz"):
+            raise ValueError(f"Unknown output format: {output_format}")
+        self.output_format = output_format
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
     
@@ -85,8 +94,23 @@ class VideoRenderer:
         print(f"  Total frames: {total_frames}")
         print(f"  Payload reduction: {self._estimate_payload_reduction():.1f}%")
         
-        # Pre-allocate output array
+        # Output name is needed up front: .twv renders stream frames straight to disk
+        if output_name is None:
+            input_name = Path(video_path).stem
+            quant_str = f"_{self.quantize_bits}bit" if self.quantize_bits < 8 else ""
+            suffix = RAW_SUFFIX if self.output_format == "twv" else ".npz"
+            output_name = f"{input_name}_{self.downscaled_width}x{self.downscaled_height}_{target_fps:.0f}fps{quant_str}{suffix}"
+        output_path = self.output_dir / output_name
+        metadata = {
+            "source_video": video_path,
+            "downscale_factor": self.downscale_factor,
+            "quantize_bits": self.quantize_bits,
+        }
+
+        writer = None
         frames_to_render = []
+        if self.output_format == "twv":
+            writer = RawVideoWriter(output_path, self.downscaled_width, self.downscaled_height, target_fps, metadata)
         frame_interval = source_fps / target_fps if target_fps < source_fps else 1.0
         
         start_time = time.time()
@@ -113,11 +137,14 @@ class VideoRenderer:
             
             # Apply quantization if needed (reduce to 6-bit, 4-bit, etc. per channel)
             if self.quantize_bits < 8:
-                quantized = self._quantize_frame(resized)
-                frames_to_render.append(quantized.astype(np.uint8))
+                out_frame = self._quantize_frame(resized).astype(np.uint8)
             else:
                 # Store as uint8 numpy array (height, width, 3)
-                frames_to_render.append(resized.astype(np.uint8))
+                out_frame = resized.astype(np.uint8)
+            if writer is not None:
+                writer.write_frame(out_frame)
+            else:
+                frames_to_render.append(out_frame)
             
             rendered_count += 1
             if rendered_count % 100 == 0:
@@ -133,24 +160,18 @@ class VideoRenderer:
         print(f"\n  Rendered {rendered_count} frames in {elapsed:.2f}s ({rendered_count/elapsed:.1f} fps)")
         
         # Save to file
-        if output_name is None:
-            input_name = Path(video_path).stem
-            quant_str = f"_{self.quantize_bits}bit" if self.quantize_bits < 8 else ""
-            output_name = f"{input_name}_{self.downscaled_width}x{self.downscaled_height}_{target_fps:.0f}fps{quant_str}.npz"
-        
-        output_path = self.output_dir / output_name
-        
-        # Save as compressed numpy archive
-        np.savez_compressed(
-            output_path,
-            frames=np.array(frames_to_render, dtype=np.uint8),
-            fps=target_fps,
-            width=self.downscaled_width,
-            height=self.downscaled_height,
-            source_video=video_path,
-            downscale_factor=self.downscale_factor,
-            quantize_bits=self.quantize_bits
-        )
+        if writer is not None:
+            writer.close()
+        else:
+            # Save as compressed numpy archive
+            np.savez_compressed(
+                output_path,
+                frames=np.array(frames_to_render, dtype=np.uint8),
+                fps=target_fps,
+                width=self.downscaled_width,
+                height=self.downscaled_height,
+                **metadata
+            )
         
         file_size_mb = output_path.stat().st_size / (1024 * 1024)
         print(f"  Saved: {output_path} ({file_size_mb:.2f} MB)")
@@ -162,7 +183,7 @@ class VideoRenderer:
         Load a pre-rendered video file.
         
         Args:
-            render_path: Path to .npz render file
+            render_path: Path to .twv or .npz render file
         
         Returns:
             dict with 'frames' (numpy array), 'fps', 'width', 'height'
@@ -171,6 +192,11 @@ class VideoRenderer:
             print(f"Error: Render file not found: {render_path}")
             return None
         
+        if Path(render_path).suffix == RAW_SUFFIX:
+            clip = open_raw_video(render_path)
+            clip['source_video'] = str(clip['metadata'].get('source_video', ''))
+            return clip
+        
         data = np.load(render_path)
         return {
             'frames': data['frames'],
@@ -185,7 +211,7 @@ class VideoRenderer:
         Play a pre-rendered video on the matrix.
         
         Args:
-            render_path: Path to .npz render file
+            render_path: Path to .twv or .npz render file
             matrix: DotMatrix instance to render to
             loop: Loop playback
         
@@ -198,7 +224,7 @@ class VideoRenderer:
         
         frames = video_data['frames']
         target_fps = video_data['fps']
-        frame_time = 1.0 / target_fps
+        clock = FrameClock(target_fps, policy="skip")
         
         print(f"\nPlaying: {render_path}")
         print(f"  Frames: {len(frames)}, FPS: {target_fps:.2f}")
@@ -206,18 +232,16 @@ class VideoRenderer:
         frames_played = 0
         try:
             while True:
-                for frame_data in frames:
-                    frame_start = time.time()
+                idx = 0
+                while idx < len(frames):
+                    # Absolute frame deadlines; late frames are dropped
+                    idx += clock.tick()
+                    if idx >= len(frames):
+                        break
                     
                     # Render directly using pre-computed colors
-                    matrix.render_colors(frame_data)
-                    
-                    # Frame timing
-                    elapsed = time.time() - frame_start
-                    sleep_time = frame_time - elapsed
-                    if sleep_time > 0:
-                        time.sleep(sleep_time)
-                    
+                    matrix.render_colors(frames[idx], pace=False)
+                    idx += 1
                     frames_played += 1
                 
                 if not loop:
@@ -255,10 +279,10 @@ class VideoRenderer:
 
 
 def render_video_cli(video_path, output_fps=None, matrix_width=90, matrix_height=50,
-                     downscale_factor=1.0, quantize_bits=8):
+                     downscale_factor=1.0, quantize_bits=8, output_format="twv"):
     """Convenience function for command-line video rendering."""
     renderer = VideoRenderer(matrix_width, matrix_height, downscale_factor=downscale_factor, 
-                            quantize_bits=quantize_bits)
+                            quantize_bits=quantize_bits, output_format=output_format)
     return renderer.render_video(video_path, output_fps=output_fps)
 
 
@@ -266,9 +290,10 @@ if __name__ == "__main__":
     import sys
     
     if len(sys.argv) < 2:
-        print("Usage: python video_renderer.py <video_path> [fps] [width] [height] [downscale] [quantize_bits]")
+        print("Usage: python video_renderer.py <video_path> [fps] [width] [height] [downscale] [quantize_bits] [twv|npz]")
         print("Example: python video_renderer.py demo.mp4 20 90 50 0.889 6")
         print("         (renders 90x50 at 20fps, downscaled to 80x45, 6-bit quantized)")
+        print("Convert existing .npz renders: python rendered_video.py convert <file.npz>")
         sys.exit(1)
     
     video_path = sys.argv[1]
@@ -277,5 +302,6 @@ if __name__ == "__main__":
     height = int(sys.argv[4]) if len(sys.argv) > 4 else 50
     downscale = float(sys.argv[5]) if len(sys.argv) > 5 else 1.0
     quantize = int(sys.argv[6]) if len(sys.argv) > 6 else 8
+    output_format = sys.argv[7] if len(sys.argv) > 7 else "twv"
     
-    render_video_cli(video_path, fps, width, height, downscale, quantize)
+    render_video_cli(video_path, fps, width, height, downscale, quantize, output_format)
@@ -8,6 +8,7 @@ import 'package:http/http.dart' as http;
 import 'package:shared_preferences/shared_preferences.dart';
 import 'package:uuid/uuid.dart';
 import '../providers/app_state.dart';
+import '../services/game_input_sender.dart';
 
 class TetrisControllerPage extends ConsumerStatefulWidget {
   const TetrisControllerPage({super.key});
@@ -19,6 +20,8 @@ class TetrisControllerPage extends ConsumerStatefulWidget {
 class _TetrisControllerPageState extends ConsumerState<TetrisControllerPage> {
   String? _playerId;
   Timer? _heartbeatTimer;
+  // UDP input channel; null (or not ready) means commands go over HTTP
+  GameInputSender? _input;
 
   @override
   void initState() {
@@ -59,6 +62,7 @@ class _TetrisControllerPageState extends ConsumerState<TetrisControllerPage> {
       
       if (response.statusCode == 200) {
         debugPrint('Joined Tetris game: ${response.body}');
+        await _connectInput(fppIp, jsonDecode(response.body) as Map<String, dynamic>);
       } else {
         debugPrint('Failed to join game: ${response.statusCode} ${response.body}');
       }
@@ -67,7 +71,41 @@ class _TetrisControllerPageState extends ConsumerState<TetrisControllerPage> {
     }
   }
 
+  Future<void> _connectInput(String fppIp, Map<String, dynamic> joined) async {
+    final port = joined['input_port'];
+    if (port is! int) {
+      return;
+    }
+    final sender = GameInputSender(
+      host: fppIp,
+      port: port,
+      playerId: _playerId!,
+      slot: (joined['player_index'] as int?) ?? 0,
+      onLost: _onInputLost,
+    );
+    if (await sender.connect()) {
+      _input = sender;
+      debugPrint('Game input over UDP port $port');
+    } else {
+      debugPrint('UDP game input unavailable, using HTTP');
+    }
+  }
+
+  // The server no longer knows this player on UDP (restart, idle timeout):
+  // use HTTP for now and join again, which reconnects the UDP channel.
+  void _onInputLost() {
+    _input = null;
+    if (!mounted) {
+      return;
+    }
+    debugPrint('UDP game input lost, rejoining');
+    _joinGame();
+  }
+
   Future<void> _sendHeartbeat() async {
+    if (_input?.send('HEARTBEAT') ?? false) {
+      return;
+    }
     try {
       final fppIp = ref.read(fppIpProvider);
       await http.post(
@@ -96,6 +134,9 @@ class _TetrisControllerPageState extends ConsumerState<TetrisControllerPage> {
   }
 
   Future<void> _sendCommand(String command) async {
+    if (_input?.send(command) ?? false) {
+      return;
+    }
     try {
       final fppIp = ref.read(fppIpProvider);
       await http.post(
@@ -114,6 +155,7 @@ class _TetrisControllerPageState extends ConsumerState<TetrisControllerPage> {
   @override
   void dispose() {
     _heartbeatTimer?.cancel();
+    _input?.close();
     _leaveGame();
     super.dispose();
   }
@@ -0,0 +1,165 @@
+import 'dart:async';
+import 'dart:io';
+import 'dart:typed_data';
+import 'dart:convert';
+import 'dart:developer' as developer;
+
+/// Sends game button presses over the server's UDP input channel
+/// (TwinklyWall/game_input.py) instead of one HTTP POST per press.
+///
+/// Packets are 20 bytes: "TI", version, slot, command, flags, 2 reserved,
+/// u32 sequence, u64 client ms. The server acks each one, which is used to
+/// measure round-trip time. If the HELLO is not acked the caller should keep
+/// using the HTTP endpoint. If the server later rejects a packet (it
+/// restarted, or the player timed out or left) or stops acking, the sender
+/// closes itself and calls [onLost], so the caller can fall back to HTTP
+/// or join again.
+class GameInputSender {
+  static const List<String> commands = [
+    'HELLO',
+    'HEARTBEAT',
+    'MOVE_LEFT',
+    'MOVE_RIGHT',
+    'ROTATE_LEFT',
+    'ROTATE_RIGHT',
+    'MOVE_DOWN',
+    'HARD_DROP',
+    'MOVE_LEFT_HELD',
+    'MOVE_RIGHT_HELD',
+  ];
+  static const int _ackOk = 0;
+  static const int _ackUnknownPlayer = 1;
+  static const int _ackBadPacket = 3;
+  // Sends in a row without any ack before the channel is given up on
+  static const int _maxUnacked = 8;
+
+  final String host;
+  final int port;
+  final String playerId;
+  final int slot;
+
+  /// Called once when an open channel is closed by a rejected or missing ack.
+  final void Function()? onLost;
+
+  RawDatagramSocket? _socket;
+  InternetAddress? _address;
+  int _seq = 0;
+  bool _ready = false;
+  Completer<bool>? _helloAck;
+  final Stopwatch _clock = Stopwatch()..start();
+  final Map<int, int> _sentAt = {};
+  int _unacked = 0;
+
+  /// Most recent round-trip time in ms (null until the first ack).
+  double? lastRttMs;
+
+  GameInputSender({
+    required this.host,
+    required this.port,
+    required this.playerId,
+    required this.slot,
+    this.onLost,
+  });
+
+  bool get isReady => _ready;
+
+  /// Bind the socket and register this player. Returns false if the server
+  /// did not ack within [timeout].
+  Future<bool> connect({Duration timeout = const Duration(milliseconds: 500)}) async {
+    try {
+      _address = InternetAddress(host);
+      _socket = await RawDatagramSocket.bind(InternetAddress.anyIPv4, 0);
+      _socket!.listen(_onEvent);
+      _helloAck = Completer<bool>();
+      _send(0, extra: utf8.encode(playerId));
+      _ready = await _helloAck!.future.timeout(timeout, onTimeout: () => false);
+    } catch (e) {
+      developer.log('GameInputSender connect failed: $e');
+      _ready = false;
+    }
+    if (!_ready) {
+      close();
+    }
+    return _ready;
+  }
+
+  /// Send a command by name. Returns false if the channel is not usable.
+  bool send(String command) {
+    final code = commands.indexOf(command);
+    if (!_ready || code < 0) {
+      return false;
+    }
+    if (_unacked >= _maxUnacked) {
+      developer.log('GameInputSender: no acks for $_unacked packets, giving up on UDP');
+      _lost();
+      return false;
+    }
+    _unacked++;
+    _send(code);
+    return true;
+  }
+
+  void _send(int code, {List<int>? extra}) {
+    _seq = (_seq + 1) & 0xFFFFFFFF;
+    final nowMs = _clock.elapsedMilliseconds;
+    final header = ByteData(20)
+      ..setUint8(0, 0x54) // 'T'
+      ..setUint8(1, 0x49) // 'I'
+      ..setUint8(2, 1)
+      ..setUint8(3, slot)
+      ..setUint8(4, code)
+      ..setUint8(5, 0)
+      ..setUint32(8, _seq, Endian.little)
+      ..setUint64(12, nowMs, Endian.little);
+    final bytes = BytesBuilder(copy: false)..add(header.buffer.asUint8List());
+    if (extra != null) {
+      bytes.add(extra);
+    }
+    _sentAt[_seq] = _clock.elapsedMicroseconds;
+    if (_sentAt.length > 64) {
+      _sentAt.remove(_sentAt.keys.first);
+    }
+    _socket?.send(bytes.takeBytes(), _address!, port);
+  }
+
+  void _onEvent(RawSocketEvent event) {
+    if (event != RawSocketEvent.read) {
+      return;
+    }
+    final datagram = _socket?.receive();
+    if (datagram == null || datagram.data.length < 20) {
+      return;
+    }
+    final data = ByteData.sublistView(datagram.data);
+    if (data.getUint8(0) != 0x54 || data.getUint8(1) != 0x41) {
+      return;
+    }
+    final status = data.getUint8(3);
+    final seq = data.getUint32(4, Endian.little);
+    _unacked = 0;
+    final sentUs = _sentAt.remove(seq);
+    if (sentUs != null) {
+      lastRttMs = (_clock.elapsedMicroseconds - sentUs) / 1000.0;
+    }
+    final helloAck = _helloAck;
+    if (helloAck != null && !helloAck.isCompleted) {
+      helloAck.complete(status == _ackOk);
+      return;
+    }
+    if (_ready && (status == _ackUnknownPlayer || status == _ackBadPacket)) {
+      developer.log('GameInputSender: server rejected packet $seq (status $status)');
+      _lost();
+    }
+  }
+
+  void _lost() {
+    close();
+    onLost?.call();
+  }
+
+  void close() {
+    _ready = false;
+    _socket?.close();
+    _socket = null;
+  }
+}